@@ -0,0 +1,143 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from src.constants import (APP_HOST, APP_PORT, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_QUEUE_SIZE,
+                           PREDICTION_WORKERS, PREDICTION_MAX_BATCH_RECORDS, SCHEMA_FILE_PATH, SERVING_PROFILE_FILE_PATH,
+                           SERVING_PROFILE_FLUSH_SECONDS, DATA_DRIFT_BASELINE_FILE_PATH, DATA_DRIFT_PSI_THRESHOLD,
+                           DATA_DRIFT_KS_THRESHOLD)
+from src.logger import logging
+from src.pipline.prediction_pipeline import LoanDataClassifier
+from src.utils.drift import DatasetProfile, ServingProfile, compare_profiles
+from src.utils.main_utils import read_yaml_file
+from src.utils.micro_batcher import MicroBatcher, QueueFullError
+
+
+class LoanRequest(BaseModel):
+    """
+    Raw applicant fields, the same columns the model was trained on. id is a model feature, so it is required
+    """
+    id: int
+    annual_income: float
+    debt_to_income_ratio: float
+    credit_score: float
+    loan_amount: float
+    interest_rate: float
+    gender: str
+    marital_status: str
+    education_level: str
+    employment_status: str
+    loan_purpose: str
+    grade_subgrade: str
+
+
+class LoanPrediction(BaseModel):
+    probability: float
+    loan_paid_back: int
+
+
+classifier = LoanDataClassifier()
+executor = ThreadPoolExecutor(max_workers=PREDICTION_WORKERS, thread_name_prefix="predict")
+
+
+def predict_batch(records: list) -> list:
+    """
+    One vectorized model call for a batch of records, runs in the executor
+    """
+    return classifier.predict_proba(records).tolist()
+
+
+# every scored batch is added to the serving profile on its own thread, off the request path
+serving_profile = ServingProfile(read_yaml_file(SCHEMA_FILE_PATH), SERVING_PROFILE_FILE_PATH)
+batcher = MicroBatcher(predict_batch, executor, max_batch_size=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+                       max_concurrent_batches=PREDICTION_WORKERS, max_queue_size=MICRO_BATCH_MAX_QUEUE_SIZE,
+                       on_batch=serving_profile.observe)
+
+
+def to_prediction(probability: float) -> LoanPrediction:
+    return LoanPrediction(probability=probability, loan_paid_back=int(probability >= classifier.load_model().threshold))
+
+
+async def flush_serving_profile() -> None:
+    """
+    Merge the served records into the stored serving profile every SERVING_PROFILE_FLUSH_SECONDS
+    """
+    while True:
+        await asyncio.sleep(SERVING_PROFILE_FLUSH_SECONDS)
+        try:
+            await asyncio.wrap_future(serving_profile.flush())
+        except Exception as e:
+            logging.error(f"Serving profile flush failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the model is loaded and every prediction thread warmed up before the first request is accepted, off the event loop
+    loop = asyncio.get_running_loop()
+    model = await loop.run_in_executor(None, classifier.load_model)
+    await loop.run_in_executor(None, model.warm_up_threads, executor, PREDICTION_WORKERS)
+    await batcher.start()
+    flush_task = asyncio.create_task(flush_serving_profile())
+    logging.info(f"Prediction service ready: batches of up to {MICRO_BATCH_MAX_SIZE} records, "
+                 f"{MICRO_BATCH_MAX_WAIT_MS} ms max wait, {PREDICTION_WORKERS} workers")
+    yield
+    flush_task.cancel()
+    await batcher.stop()
+    executor.shutdown(wait=True)
+    await loop.run_in_executor(None, serving_profile.close)
+
+
+app = FastAPI(title="Loan Payback Prediction", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {"status": "ok", **batcher.stats}
+
+
+@app.get("/drift")
+async def drift() -> dict:
+    """
+    Drift of the records served so far against the baseline profile of the model in production
+    """
+    if not os.path.exists(DATA_DRIFT_BASELINE_FILE_PATH):
+        raise HTTPException(status_code=404, detail="No drift baseline has been promoted yet")
+    served = await asyncio.wrap_future(serving_profile.flush())
+    baseline = DatasetProfile.load(DATA_DRIFT_BASELINE_FILE_PATH)
+    return compare_profiles(baseline, served, DATA_DRIFT_PSI_THRESHOLD, DATA_DRIFT_KS_THRESHOLD)
+
+
+@app.post("/predict", response_model=LoanPrediction)
+async def predict(request: LoanRequest) -> LoanPrediction:
+    """
+    Score one applicant, concurrent requests are micro-batched into one model call
+    """
+    try:
+        probability = await batcher.submit(request.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return to_prediction(probability)
+
+
+@app.post("/predict/batch", response_model=List[LoanPrediction])
+async def predict_many(requests: List[LoanRequest]) -> List[LoanPrediction]:
+    """
+    Score a list of applicants, in chunks of at most MICRO_BATCH_MAX_SIZE records which take the same model call
+    slots as the micro-batches, a large list cannot starve /predict or run more model calls than the workers
+    """
+    if len(requests) > PREDICTION_MAX_BATCH_RECORDS:
+        raise HTTPException(status_code=422, detail=f"At most {PREDICTION_MAX_BATCH_RECORDS} records per request, "
+                                                    f"got {len(requests)}")
+    records = [request.model_dump() for request in requests]
+    probabilities = await batcher.submit_many(records)
+    return [to_prediction(probability) for probability in probabilities]
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=APP_HOST, port=APP_PORT)
@@ -0,0 +1,88 @@
+"""
+Import time budget of a module of the src package, measured with `python -X importtime`.
+
+    python benchmarks/import_time.py                      # prediction entry point, default budget
+    python benchmarks/import_time.py --module src.pipline.training_pipeline --budget-ms 0
+
+Every run imports the module in a fresh interpreter. The interpreter startup imports (measured with
+`-c pass`) are subtracted, the median over the runs is compared to the budget. The run also fails when
+one of the forbidden packages (ML libraries the entry point must not load) shows up in the import tree.
+Exit code 0 within budget, 1 on a regression. A budget of 0 only reports.
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULE = "src.pipline.prediction_pipeline"
+DEFAULT_BUDGET_MS = 300.0
+DEFAULT_FORBIDDEN = ("sklearn", "imblearn", "lightgbm", "xgboost", "catboost", "pandas", "pymongo", "boto3")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Returns (self_us, cumulative_us, depth, module) of every `import time:` line
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.lstrip()
+        # one leading space, then two more per nesting level
+        depth = (len(name) - len(module) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, module))
+    return entries
+
+
+def measure(code: str) -> list:
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"`{code}` failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def total_ms(entries: list) -> float:
+    return sum(cumulative for _, cumulative, depth, _ in entries if depth == 0) / 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--forbid", nargs="*", default=list(DEFAULT_FORBIDDEN),
+                        help="top level packages the module may not import")
+    parser.add_argument("--top", type=int, default=10, help="number of heaviest top level imports to list")
+    args = parser.parse_args()
+
+    startup = [measure("pass") for _ in range(args.runs)]
+    startup_ms = statistics.median(total_ms(entries) for entries in startup)
+    startup_modules = {module for _, _, _, module in startup[-1]}
+    runs = [measure(f"import {args.module}") for _ in range(args.runs)]
+    import_ms = statistics.median(total_ms(entries) for entries in runs) - startup_ms
+
+    print(f"{args.module}: {import_ms:.1f} ms (median of {args.runs} runs, {startup_ms:.1f} ms interpreter startup excluded)")
+    heaviest = sorted((e for e in runs[-1] if e[2] == 0 and e[3] not in startup_modules),
+                      key=lambda e: e[1], reverse=True)[:args.top]
+    for _, cumulative, _, module in heaviest:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    failed = False
+    imported = {module.split(".")[0] for _, _, _, module in runs[-1]}
+    forbidden = sorted(imported.intersection(args.forbid))
+    if forbidden:
+        print(f"FAIL: {args.module} imports {', '.join(forbidden)}")
+        failed = True
+    if args.budget_ms > 0 and import_ms > args.budget_ms:
+        print(f"FAIL: {import_ms:.1f} ms is over the budget of {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
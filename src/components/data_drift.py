@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pandas import DataFrame
+
+from src.logger import logging
+from src.exception import MyException
+from src.utils.main_utils import read_yaml_file, iter_dataframe_chunks
+from src.utils.drift import DatasetProfile, compare_profiles
+from src.entity.config_entity import DataDriftConfig
+from src.entity.artifact_entity import DataIngestionArtifact, DataDriftArtifact
+from src.constants import SCHEMA_FILE_PATH
+
+class DataDrift:
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_drift_config: DataDriftConfig):
+        """
+        :param data_ingestion_artifact: Output reference of data ingestion
+        :param data_drift_config: Configuration for data drift
+        """
+        try:
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_drift_config = data_drift_config
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _iter_chunks(self, source):
+        chunk_size = self.data_drift_config.chunk_size
+        if isinstance(source, DataFrame):
+            for start in range(0, len(source), chunk_size):
+                yield source.iloc[start:start + chunk_size]
+        else:
+            yield from iter_dataframe_chunks(source, chunk_size)
+
+    def profile_dataset(self, source)-> DatasetProfile:
+        """
+        Method Name :   profile_dataset
+        Description :   This method summarizes a dataframe or file chunk by chunk, every chunk gets its own
+                        profile which is merged into the running one, so memory stays constant
+
+        Output      :   Return DatasetProfile of the dataset
+        On Failure  :   Write on exception log and then raise an exception
+        """
+        try:
+            profile = DatasetProfile.from_schema(self._schema_config, self.data_drift_config.sketch_size)
+            for chunk in self._iter_chunks(source):
+                profile.merge(DatasetProfile.from_schema(self._schema_config, self.data_drift_config.sketch_size).update(chunk))
+            return profile
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def initiate_data_drift(self)-> DataDriftArtifact:
+        """
+        Method Name :   initiate_data_drift
+        Description :   This method profiles train and test, compares test against train and train against the
+                        baseline of the last promoted model. The train profile only becomes the new baseline when
+                        the model trained on it is accepted, the model pusher promotes it
+
+        Output      :   Return DataDriftArtifact object
+        On Failure  :   Write on exception log and then raise an exception
+        """
+        try:
+            logging.info("Starting data drift check")
+            if self.data_ingestion_artifact.train_df is not None and self.data_ingestion_artifact.test_df is not None:
+                sources = [self.data_ingestion_artifact.train_df, self.data_ingestion_artifact.test_df]
+            else:
+                sources = [self.data_ingestion_artifact.trained_file_path, self.data_ingestion_artifact.test_file_path]
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                train_profile, test_profile = executor.map(self.profile_dataset, sources)
+
+            psi_threshold, ks_threshold = self.data_drift_config.psi_threshold, self.data_drift_config.ks_threshold
+            drift_report = {"train_vs_test": compare_profiles(train_profile, test_profile, psi_threshold, ks_threshold)}
+            baseline_profile_file_path = self.data_drift_config.baseline_profile_file_path
+            if os.path.exists(baseline_profile_file_path):
+                baseline_profile = DatasetProfile.load(baseline_profile_file_path)
+                drift_report["baseline_vs_train"] = compare_profiles(baseline_profile, train_profile, psi_threshold, ks_threshold)
+            else:
+                logging.info("No drift baseline from an earlier training run, skipping the baseline comparison")
+
+            drift_detected = any(comparison["drift_detected"] for comparison in drift_report.values())
+            for name, comparison in drift_report.items():
+                if comparison["drift_detected"]:
+                    logging.warning(f"Drift detected in {name}: {comparison['drifted_columns']}")
+
+            os.makedirs(self.data_drift_config.data_drift_dir, exist_ok=True)
+            with open(self.data_drift_config.drift_report_file_path, "w") as report_file:
+                json.dump({"drift_detected": drift_detected, **drift_report}, report_file, indent=4)
+            train_profile.save(self.data_drift_config.train_profile_file_path)
+
+            data_drift_artifact = DataDriftArtifact(
+                drift_detected=drift_detected,
+                drift_report_file_path=self.data_drift_config.drift_report_file_path,
+                train_profile_file_path=self.data_drift_config.train_profile_file_path
+            )
+            logging.info(f"Data drift artifact: {data_drift_artifact}")
+            return data_drift_artifact
+        except Exception as e:
+            raise MyException(e, sys)
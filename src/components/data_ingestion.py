@@ -1,40 +1,187 @@
 import os 
 import sys 
+import json
+import itertools
+from datetime import datetime
 import pandas as pd
 from pandas import DataFrame
-from sklearn.model_selection import train_test_split
 
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import MyException
 from src.logger import logging
 from src.data_access.proj1_data import Proj1Data
+from src.components.data_validation import DataValidation
+from src.utils.main_utils import save_dataframe, read_dataframe, append_dataframe, write_json_file
+from src.utils.main_utils import read_yaml_file, schema_dtypes, apply_schema_dtypes
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.artifact_writer import AsyncArtifactWriter, ChunkedDataFrameWriter
+from src.utils.sampling import hash_test_mask
+
+LOCAL_CSV_PATH = os.path.join("NoteBooks\data", "train.csv")
 
 class DataIngestion:
-    def __init__(self,data_ingestion_config:DataIngestionConfig=DataIngestionConfig()):
+    def __init__(self,data_ingestion_config:DataIngestionConfig=DataIngestionConfig(), artifact_writer:AsyncArtifactWriter=None):
         """
         :param data_ingestion_config: configuration for data ingestion
+        :param artifact_writer: optional background writer, when given the train/test frames are handed to the
+                                next stage in memory and the files are written asynchronously
         """
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_writer = artifact_writer
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self._schema_dtypes = schema_dtypes(self._schema_config)
 
         except Exception as e:
             raise MyException(e,sys)
 
+    def _save(self, file_path: str, dataframe: DataFrame)-> None:
+        """
+        Saves the dataframe now or, with an artifact writer, on the background writer thread
+        """
+        if self.artifact_writer is not None:
+            self.artifact_writer.submit(save_dataframe, file_path, dataframe)
+        else:
+            save_dataframe(file_path, dataframe)
+
+    def read_watermark(self):
+        """
+        Returns the watermark value of the persistent feature store or None if there is none yet.
+        """
+        try:
+            watermark_file_path = self.data_ingestion_config.watermark_file_path
+            if not os.path.exists(watermark_file_path) or not os.path.exists(self.data_ingestion_config.persistent_feature_store_file_path):
+                return None
+            with open(watermark_file_path, "r") as watermark_file:
+                watermark = json.load(watermark_file)
+            if watermark.get("column") != self.data_ingestion_config.watermark_column:
+                logging.info(f"Watermark column changed from {watermark.get('column')}, rebuilding the feature store")
+                return None
+            return watermark["value"]
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def export_incremental(self, my_data: Proj1Data)->DataFrame:
+        """
+        Method Name :   export_incremental
+        Description :   This method fetches only documents above the stored watermark from mongodb, appends them to
+                        the persistent feature store and returns the merged data. The first run does a full export.
+
+        Output      :   the complete dataset (cached rows + new rows) is returned as a dataframe
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            store_file_path = self.data_ingestion_config.persistent_feature_store_file_path
+            watermark_column = self.data_ingestion_config.watermark_column
+            watermark = self.read_watermark()
+
+            query = None if watermark is None else {watermark_column: {"$gt": watermark}}
+            logging.info(f"Incremental export with watermark {watermark_column} > {watermark}")
+            delta = my_data.export_collection_as_dataframe(
+                collection_name = self.data_ingestion_config.collection_name,
+                stream = True,
+                batch_size = self.data_ingestion_config.export_batch_size,
+                query = query
+            )
+            logging.info(f"Fetched {len(delta)} new rows from MongoDB")
+
+            os.makedirs(os.path.dirname(store_file_path), exist_ok=True)
+            if watermark is None:
+                dataframe = delta
+                save_dataframe(store_file_path, dataframe)
+            else:
+                cached = read_dataframe(store_file_path)
+                logging.info(f"Loaded {len(cached)} cached rows from persistent feature store: {store_file_path}")
+                # rows above the watermark can already be in the store when a run appended them but stopped
+                # before writing the watermark, they are dropped instead of being stored twice
+                delta = delta[~delta[watermark_column].isin(cached[watermark_column])]
+                if len(delta) == 0:
+                    dataframe = cached
+                else:
+                    delta = delta[cached.columns]
+                    append_dataframe(store_file_path, delta)
+                    dataframe = pd.concat([cached, delta], ignore_index=True)
+
+            new_watermark = dataframe[watermark_column].max() if len(dataframe) > 0 else None
+            if new_watermark is not None and new_watermark != watermark:
+                # the watermark only advances after the store holds the rows, and is replaced atomically
+                write_json_file(self.data_ingestion_config.watermark_file_path, {
+                    "column": watermark_column,
+                    "value": new_watermark.item() if hasattr(new_watermark, "item") else new_watermark,
+                    "rows": len(dataframe),
+                    "updated_at": datetime.now().isoformat()
+                })
+                logging.info(f"Advanced watermark to {watermark_column} = {new_watermark}")
+            return dataframe
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def validate_collection(self)-> dict:
+        """
+        Method Name :   validate_collection
+        Description :   This method checks the documents about to be exported (the whole collection, or only the
+                        rows above the watermark in incremental mode) with statistics computed inside MongoDB and
+                        rejects a bad batch before anything is exported. It is skipped when MongoDB is unreachable,
+                        the export then falls back to the local CSV anyway.
+
+        Output      :   the server side statistics, None when they could not be computed
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            query = None
+            if self.data_ingestion_config.incremental:
+                watermark = self.read_watermark()
+                if watermark is not None:
+                    query = {self.data_ingestion_config.watermark_column: {"$gt": watermark}}
+            try:
+                statistics = Proj1Data().compute_collection_statistics(
+                    collection_name = self.data_ingestion_config.collection_name,
+                    query = query
+                )
+            except Exception as e:
+                logging.warning(f"Could not compute MongoDB statistics, skipping pre-export validation: {str(e)}")
+                return None
+            if statistics["n_rows"] == 0:
+                return statistics
+            errors = DataValidation.check_statistics(statistics["columns"], self._schema_config)
+            if errors:
+                raise Exception(f"Rejected [{self.data_ingestion_config.collection_name}] before export: {'; '.join(errors)}")
+            logging.info(f"Pre-export validation passed for {statistics['n_rows']} documents")
+            return statistics
+        except Exception as e:
+            raise MyException(e,sys)
+
     def export_data_into_feature_store(self)->DataFrame:
         """
         Method Name :   export_data_into_feature_store
-        Description :   This method exports data from mongodb to csv file or loads from local CSV
+        Description :   This method exports data from mongodb to the feature store file or loads from local CSV
         
         Output      :   data is returned as artifact of data ingestion components
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
+            if self.data_ingestion_config.validate_before_export:
+                self.validate_collection()
             # Try MongoDB first
             logging.info(f"Attempting to export data from MongoDB")
             try:
                 my_data = Proj1Data()
-                dataframe = my_data.export_collection_as_dataframe(collection_name = self.data_ingestion_config.collection_name)
+                if self.data_ingestion_config.incremental:
+                    dataframe = self.export_incremental(my_data)
+                elif self.data_ingestion_config.export_partitions > 1:
+                    dataframe = my_data.export_collection_parallel(
+                        collection_name = self.data_ingestion_config.collection_name,
+                        n_partitions = self.data_ingestion_config.export_partitions,
+                        max_workers = self.data_ingestion_config.export_workers,
+                        batch_size = self.data_ingestion_config.export_batch_size
+                    )
+                else:
+                    dataframe = my_data.export_collection_as_dataframe(
+                        collection_name = self.data_ingestion_config.collection_name,
+                        stream = self.data_ingestion_config.stream_export,
+                        batch_size = self.data_ingestion_config.export_batch_size
+                    )
                 if dataframe is not None and len(dataframe) > 0:
                     logging.info(f"Successfully retrieved data from MongoDB. Shape: {dataframe.shape}")
                 else:
@@ -42,7 +189,7 @@ class DataIngestion:
             except Exception as e:
                 logging.warning(f"Failed to get data from MongoDB: {str(e)}")
                 # Fallback to local CSV
-                csv_path = os.path.join("NoteBooks\data", "train.csv")
+                csv_path = LOCAL_CSV_PATH
                 if os.path.exists(csv_path):
                     logging.info(f"Loading data from local CSV: {csv_path}")
                     dataframe = pd.read_csv(csv_path)
@@ -58,23 +205,30 @@ class DataIngestion:
             if '_id' in dataframe.columns:
                 logging.info("Dropping MongoDB '_id' column from dataframe before saving feature store")
                 dataframe = dataframe.drop(columns=['_id'])
+            # no-op for the typed streaming export, shrinks the full/CSV fallback reads
+            dataframe = apply_schema_dtypes(dataframe, self._schema_dtypes, stage="data_ingestion")
 
-            dataframe.to_csv(feature_store_file_path,index = False, header = True)
+            self._save(feature_store_file_path, dataframe)
             return dataframe
         except Exception as e:
             raise MyException(e,sys)
 
-    def split_data_as_train_test(self,dataframe:DataFrame)-> None:
+    def split_data_as_train_test(self,dataframe:DataFrame)-> tuple:
         """
         Method Name :   split_data_as_train_test
         Description :   This method splits the dataframe into train set and test set based on split ratio 
         
-        Output      :   Folder is created in s3 bucket
+        Output      :   train and test files are written and the (train_set, test_set) frames are returned
         On Failure  :   Write an exception log and then raise an exception
         """
         logging.info("Entered split_data_as_train_test method of Data_Ingesstion class")
         try:
-            train_set, test_set = train_test_split(dataframe, test_size= self.data_ingestion_config.train_test_split_ratio)
+            if self.data_ingestion_config.split_mode == "hash":
+                test_mask = self.test_mask(dataframe)
+                train_set, test_set = dataframe[~test_mask], dataframe[test_mask]
+            else:
+                from sklearn.model_selection import train_test_split
+                train_set, test_set = train_test_split(dataframe, test_size= self.data_ingestion_config.train_test_split_ratio)
             logging.info("Performed train test split on the dataframe")
             logging.info(
                 "Exited split_data_as_train_test mmethod of Data_Ingestion class"
@@ -83,10 +237,71 @@ class DataIngestion:
             os.makedirs(dir_path, exist_ok=True)
 
             logging.info(f"Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path,index=False,header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path,index=False,header=True)
+            self._save(self.data_ingestion_config.training_file_path, train_set)
+            self._save(self.data_ingestion_config.testing_file_path, test_set)
             
             logging.info(f"Expored train and test file path")
+            return train_set, test_set
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def test_mask(self, dataframe: DataFrame):
+        """
+        Boolean test set membership of the rows, hashed from the split key so it is the same for every chunk and run
+        """
+        return hash_test_mask(dataframe[self.data_ingestion_config.split_key].to_numpy(),
+                              self.data_ingestion_config.train_test_split_ratio)
+
+    def iter_source_chunks(self):
+        """
+        Method Name :   iter_source_chunks
+        Description :   This method streams the collection from mongodb chunk by chunk, or the local CSV when
+                        mongodb is not reachable, with the schema dtypes applied to every chunk
+
+        Output      :   iterator of dataframe chunks
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            chunk_size = self.data_ingestion_config.chunk_size
+            try:
+                chunks = Proj1Data().iter_collection_chunks(
+                    collection_name = self.data_ingestion_config.collection_name,
+                    batch_size = self.data_ingestion_config.export_batch_size,
+                    chunk_size = chunk_size
+                )
+                # the first chunk surfaces connection errors and empty collections before anything is written
+                chunks = itertools.chain([next(chunks)], chunks)
+                logging.info(f"Streaming [{self.data_ingestion_config.collection_name}] from MongoDB in chunks of {chunk_size} rows")
+            except Exception as e:
+                logging.warning(f"Failed to stream data from MongoDB: {str(e)}")
+                if not os.path.exists(LOCAL_CSV_PATH):
+                    raise Exception(f"No data available - both MongoDB and local CSV ({LOCAL_CSV_PATH}) failed")
+                logging.info(f"Streaming data from local CSV: {LOCAL_CSV_PATH}")
+                chunks = pd.read_csv(LOCAL_CSV_PATH, chunksize=chunk_size)
+            return (apply_schema_dtypes(chunk, self._schema_dtypes) for chunk in chunks)
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def split_chunks_as_train_test(self, chunks)-> tuple:
+        """
+        Method Name :   split_chunks_as_train_test
+        Description :   This method hash splits every chunk on its own and appends it to the feature store, train
+                        and test files, memory is bounded by the chunk size
+
+        Output      :   (number of train rows, number of test rows)
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            with ChunkedDataFrameWriter(self.data_ingestion_config.feature_store_file_path) as feature_store, \
+                 ChunkedDataFrameWriter(self.data_ingestion_config.training_file_path) as train_file, \
+                 ChunkedDataFrameWriter(self.data_ingestion_config.testing_file_path) as test_file:
+                for chunk in chunks:
+                    test_mask = self.test_mask(chunk)
+                    feature_store.write(chunk)
+                    train_file.write(chunk[~test_mask])
+                    test_file.write(chunk[test_mask])
+            logging.info(f"Wrote {train_file.n_rows} train and {test_file.n_rows} test rows chunk by chunk")
+            return train_file.n_rows, test_file.n_rows
         except Exception as e:
             raise MyException(e,sys)
 
@@ -100,17 +315,30 @@ class DataIngestion:
         """
         logging.info(f"Entered the initiate_data_ingestion method of Data_Ingestion class")
         try:
+            if self.data_ingestion_config.chunked and not self.data_ingestion_config.incremental:
+                # every chunk is split on its own, only the key hash keeps a row in the same set across chunks
+                if self.data_ingestion_config.split_mode != "hash":
+                    raise ValueError(f"Chunked ingestion needs split_mode 'hash', got '{self.data_ingestion_config.split_mode}'")
+                if self.data_ingestion_config.validate_before_export:
+                    self.validate_collection()
+                self.split_chunks_as_train_test(self.iter_source_chunks())
+                return DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,
+                                             test_file_path=self.data_ingestion_config.testing_file_path)
+
             dataframe = self.export_data_into_feature_store()
 
             logging.info("Got the data from mongoDB")
 
-            self.split_data_as_train_test(dataframe)
+            train_set, test_set = self.split_data_as_train_test(dataframe)
 
             logging.info("Performed train test split in the dataset")
 
             logging.info("Exited initiate_data_ingestion method of Data_Ingestion class")
 
             data_ingestion_artifact = DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,test_file_path=self.data_ingestion_config.testing_file_path)
+            if self.artifact_writer is not None:
+                data_ingestion_artifact.train_df = train_set
+                data_ingestion_artifact.test_df = test_set
 
             logging.info(f"Data ingestion artifact: {data_ingestion_artifact}")
             return data_ingestion_artifact
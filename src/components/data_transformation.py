@@ -1,58 +1,131 @@
+import os
 import sys
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler,  OrdinalEncoder
-from imblearn.under_sampling import RandomUnderSampler
+from typing import TYPE_CHECKING
 
-from src.constants import TARGET_COLUMN,SCHEMA_FILE_PATH
+if TYPE_CHECKING:
+    from sklearn.preprocessing import StandardScaler
+
+from src.constants import TARGET_COLUMN,SCHEMA_FILE_PATH,DATA_TRANSFORMATION_OUTLIER_MAX_FIT_ROWS,QUANTILE_SKETCH_SIZE
+from src.constants import DATA_TRANSFORMATION_FEATURE_DTYPE, DATA_TRANSFORMATION_TARGET_DTYPE
 from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
 from src.entity.artifact_entity import DataValidationArtifact
+from src.entity.transformers import OutlierClipper, CompiledFeatureTransform
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file
+from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file, read_dataframe, schema_categorical_dtypes
+from src.utils.main_utils import schema_dtypes, apply_schema_dtypes, log_memory_report
+from src.utils.main_utils import iter_dataframe_chunks, count_dataframe_rows
+from src.utils.artifact_writer import AsyncArtifactWriter
+from src.utils.sketches import QuantileSketch
+from src.utils.sampling import stratified_fold_ids, fold_balanced_indices, balanced_sample_weights
+
+EMPLOYMENT_MAPPING = {
+    'Unemployed': 0,
+    'Student': 1,
+    'Self-employed': 2,
+    'Employed': 3,
+    'Retired': 2
+}
+
+EDUCATION_MAPPING = {
+    'High School': 1,
+    'Other': 2,
+    'Bachelor\'s': 3,
+    'Master\'s': 4,
+    'PhD': 5
+}
+
+ENCODED_CATEGORICAL_COLUMNS = ['gender', 'marital_status', 'loan_purpose', 'grade']
 
 
 class DataTransformation:
     def __init__(self, data_ingestion_artifact: DataIngestionArtifact,
                  data_transformation_config: DataTransformationConfig,
-                 data_validation_artifact: DataValidationArtifact):
+                 data_validation_artifact: DataValidationArtifact,
+                 artifact_writer: AsyncArtifactWriter = None):
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_transformation_config = data_transformation_config
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_writer = artifact_writer
             self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self._categorical_dtypes = schema_categorical_dtypes(self._schema_config)
+            self._schema_dtypes = schema_dtypes(self._schema_config)
         except Exception as e:
             raise MyException(e, sys)
         
     @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns: list = None, dtype: dict = None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path, columns=columns, dtype=dtype)
         except Exception as e:
             raise MyException(e, sys)
+
+    def apply_schema_dtypes(self, df: pd.DataFrame, stage: str = None) -> pd.DataFrame:
+        """
+        Convert the columns to the physical dtypes of the schema (category columns with the fixed categories).
+        Columns that already have the right dtype (e.g. read with it) are left as they are.
+        """
+        try:
+            return apply_schema_dtypes(df, self._schema_dtypes, stage=stage)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def fit_categorical_encoders(self, df: pd.DataFrame = None) -> dict:
+        """
+        Return the categories of every categorical column used by the feature pipeline, including the
+        derived 'grade' (first letter of grade_subgrade). The codes of a column are the positions in this list.
+        """
+        try:
+            categories = {column: list(dtype.categories) for column, dtype in self._categorical_dtypes.items()}
+            categories['grade'] = sorted({value[0] for value in categories['grade_subgrade']})
+            for column in self._categorical_dtypes:
+                if df is not None and column in df.columns:
+                    n_missing = int((df[column].cat.codes == -1).sum())
+                    if n_missing:
+                        logging.warning(f"{n_missing} training rows of [{column}] are missing")
+            return categories
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def category_lookup(series: pd.Series, table: np.ndarray) -> np.ndarray:
+        """
+        Map a category column through a per-category value table using the integer codes.
+        table has one entry per category plus a trailing entry used for missing values (code -1).
+        """
+        return table[series.cat.codes.to_numpy()]
         
     
-    def remove_outliers(self, df: pd.DataFrame)-> pd.DataFrame:
+    def fit_outlier_clipper(self, df: pd.DataFrame)-> OutlierClipper:
         """
-        remove outliers from numerical columns using IQR method.
+        Fit the IQR clipping bounds of the numerical columns on the training data.
         """
         try:
-            numerical_columns = ["annual_income","debt_to_income_ratio","credit_score","loan_amount","interest_rate"]
-            for col in numerical_columns:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
-            return df
+            numerical_columns = [c for c in self._schema_config["numerical_columns"] if c != TARGET_COLUMN]
+            return OutlierClipper(
+                columns=numerical_columns, max_fit_rows=DATA_TRANSFORMATION_OUTLIER_MAX_FIT_ROWS
+            ).fit(df)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def remove_outliers(self, df: pd.DataFrame, clipper: OutlierClipper)-> pd.DataFrame:
+        """
+        remove outliers from numerical columns with the bounds fitted on the training data.
+        """
+        try:
+            # transform returns a new frame, the input may be shared with the background writer
+            return clipper.transform(df)
         except Exception as e:
             raise MyException(e, sys)
         
-    def create_new_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def create_new_features(self, df: pd.DataFrame, categories: dict) -> pd.DataFrame:
         """
         Create new features to enhance model performance.
+        Categorical inputs are expected as category dtype, lookups run on their integer codes.
         """
         try:
             df = df.copy()
@@ -67,34 +140,30 @@ class DataTransformation:
                 (df['loan_amount'] / df['annual_income']) * 0.2
             )
             if 'grade_subgrade' in df.columns:
-                df['grade'] = df['grade_subgrade'].str[0]
-                df['subgrade_num'] = df['grade_subgrade'].str[1].astype(int)
+                grade_subgrade = df['grade_subgrade'].cat.categories
+                grade_codes = np.array([categories['grade'].index(value[0]) for value in grade_subgrade] + [-1], dtype=np.int8)
+                subgrades = np.array([int(value[1]) for value in grade_subgrade] + [np.nan])
+                df['grade'] = pd.Categorical.from_codes(
+                    self.category_lookup(df['grade_subgrade'], grade_codes), categories=categories['grade']
+                )
+                df['subgrade_num'] = self.category_lookup(df['grade_subgrade'], subgrades)
 
-
-            employment_mapping = {
-                'Unemployed': 0,
-                'Student': 1,
-                 'Self-employed': 2,
-                'Employed': 3,
-                'Retired': 2
-            }
-            df['employment_stability'] = df['employment_status'].map(employment_mapping)
-
-            education_mapping = {
-                'High School': 1,
-                'Other': 2,
-                'Bachelor\'s': 3,
-                'Master\'s': 4,
-                'PhD': 5
-            }
-            df['education_num'] = df['education_level'].map(education_mapping)
+            employment = df['employment_status'].cat.categories
+            education = df['education_level'].cat.categories
+            df['employment_stability'] = self.category_lookup(
+                df['employment_status'], np.array([EMPLOYMENT_MAPPING.get(c, np.nan) for c in employment] + [np.nan])
+            )
+            df['education_num'] = self.category_lookup(
+                df['education_level'], np.array([EDUCATION_MAPPING.get(c, np.nan) for c in education] + [np.nan])
+            )
             return df
         except Exception as e:
             raise MyException(e, sys)
 
-    def preprocess_data(self, df: pd.DataFrame)-> pd.DataFrame:
+    def preprocess_data(self, df: pd.DataFrame, categories: dict)-> pd.DataFrame:
         """
-        Preprocess the data by dropping unnecessary columns and encoding categorical features.
+        Preprocess the data by dropping unnecessary columns and encoding categorical features
+        with the categories fitted on the training data (unknown or missing values encode to -1).
         """
         try:
             # make copies so original dfs are not modified unexpectedly
@@ -113,16 +182,17 @@ class DataTransformation:
                     'subgrade_num', 'employment_stability', 'education_num'
                 ]
                 # categorical features
-                categorical_cols = ['gender', 'marital_status', 'loan_purpose', 'grade']
+                categorical_cols = ENCODED_CATEGORICAL_COLUMNS
 
                 # Keep only categorical columns that actually exist
                 categorical_cols = [c for c in categorical_cols if c in df.columns]
 
-                # Encode categorical columns robustly
-                if categorical_cols:
-                    enc = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1)
-                    enc.fit(df[categorical_cols])
-                    df[categorical_cols] = enc.transform(df[categorical_cols])
+                # Encode categorical columns, for category dtype columns the codes are read without a copy
+                for col in categorical_cols:
+                    series = df[col]
+                    if not (isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == categories[col]):
+                        series = series.astype(pd.CategoricalDtype(categories=categories[col]))
+                    df[col] = series.cat.codes
     
             return df
         except Exception as e:
@@ -136,6 +206,7 @@ class DataTransformation:
         Returns (X_train_scaled, X_test_scaled, scaler)
         """
         try:
+            from sklearn.preprocessing import StandardScaler
             stander = StandardScaler()
             X_train_scaled = stander.fit_transform(X_train)
             X_test_scaled = stander.transform(X_test)
@@ -144,6 +215,180 @@ class DataTransformation:
             raise MyException(e, sys)
         
 
+    def compute_folds(self, train_target: np.ndarray) -> np.ndarray:
+        """
+        Stratified fold id (int8) of every train row, computed once and stored next to the train array
+        so trainers and tuners only slice by it
+        """
+        try:
+            folds = stratified_fold_ids(train_target, self.data_transformation_config.n_folds,
+                                        self.data_transformation_config.fold_random_state)
+            logging.info(f"Assigned train rows to {self.data_transformation_config.n_folds} stratified folds")
+            return folds
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def compute_balancing(self, train_target: np.ndarray, train_folds: np.ndarray) -> tuple:
+        """
+        Returns (balanced row index, per row sample weights) of the full train array. The index undersamples
+        every fold separately so any combination of training folds stays balanced.
+        """
+        try:
+            balanced_index = fold_balanced_indices(train_target, train_folds, self.data_transformation_config.fold_random_state)
+            sample_weight = balanced_sample_weights(train_target)
+            logging.info(f"Balanced index keeps {len(balanced_index)} of {len(train_target)} train rows")
+            return balanced_index, sample_weight
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def compile_feature_transform(self, outlier_clipper: OutlierClipper, categories: dict, scaler: "StandardScaler",
+                                  feature_columns: list) -> CompiledFeatureTransform:
+        """
+        Fold the fitted clipping bounds, categorical tables and scaler into a pure numpy transform.
+        """
+        try:
+            raw_columns = [c for c in self._schema_config["columns"] if c != TARGET_COLUMN]
+            return CompiledFeatureTransform(
+                raw_columns=raw_columns,
+                feature_columns=feature_columns,
+                clip_columns=outlier_clipper.columns,
+                lower=outlier_clipper.lower_,
+                upper=outlier_clipper.upper_,
+                categories=categories,
+                input_dtypes={
+                    column: dtype for column, dtype in self._schema_dtypes.items()
+                    if not isinstance(dtype, pd.CategoricalDtype)
+                },
+                employment_mapping=EMPLOYMENT_MAPPING,
+                education_mapping=EDUCATION_MAPPING,
+                mean=scaler.mean_,
+                scale=scaler.scale_
+            )
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def build_model_input(self, df: pd.DataFrame, outlier_clipper: OutlierClipper, categories: dict) -> pd.DataFrame:
+        """
+        Apply clipping, feature creation and encoding to one frame or chunk.
+        """
+        try:
+            df = self.apply_schema_dtypes(df)
+            df = self.remove_outliers(df, outlier_clipper)
+            df = self.create_new_features(df, categories)
+            return self.preprocess_data(df, categories)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def initiate_chunked_data_transformation(self) -> DataTransformationArtifact:
+        """
+        Out-of-core variant of initiate_data_transformation, peak memory is bounded by the chunk size.
+
+        pass 1 streams the training file once for quantile sketches (clipping bounds) and class counts,
+        pass 2 fits the scaler with partial_fit on the transformed chunks,
+        pass 3 transforms train and test chunk by chunk straight into preallocated .npy memmaps.
+        """
+        try:
+            chunk_size = self.data_transformation_config.chunk_size
+            train_file_path = self.data_ingestion_artifact.trained_file_path
+            test_file_path = self.data_ingestion_artifact.test_file_path
+            iter_chunks = lambda file_path: iter_dataframe_chunks(file_path, chunk_size, dtype=self._schema_dtypes)
+            if count_dataframe_rows(train_file_path) == 0:
+                raise Exception(f"Training file {train_file_path} has no rows, the transformation cannot be fitted")
+            categories = self.fit_categorical_encoders()
+
+            logging.info(f"Pass 1: streaming statistics over {train_file_path} in chunks of {chunk_size} rows")
+            numerical_columns = [c for c in self._schema_config["numerical_columns"] if c != TARGET_COLUMN]
+            sketches = {column: QuantileSketch(size=QUANTILE_SKETCH_SIZE) for column in numerical_columns}
+            class_counts = {}
+            missing_categories = {column: 0 for column in self._categorical_dtypes}
+            for chunk in iter_chunks(train_file_path):
+                for column in numerical_columns:
+                    sketches[column].update(chunk[column].to_numpy(dtype=np.float64))
+                for label, count in chunk[TARGET_COLUMN].value_counts().items():
+                    class_counts[label] = class_counts.get(label, 0) + int(count)
+                for column in missing_categories:
+                    missing_categories[column] += int((chunk[column].cat.codes == -1).sum())
+            for column, n_missing in missing_categories.items():
+                if n_missing:
+                    logging.warning(f"{n_missing} training rows of [{column}] are missing")
+
+            outlier_clipper = OutlierClipper(columns=numerical_columns)
+            q1 = np.array([sketches[column].quantile(0.25) for column in numerical_columns])
+            q3 = np.array([sketches[column].quantile(0.75) for column in numerical_columns])
+            outlier_clipper.set_bounds(q1 - outlier_clipper.iqr_multiplier * (q3 - q1), q3 + outlier_clipper.iqr_multiplier * (q3 - q1))
+
+            logging.info(f"Class counts {class_counts}")
+
+            logging.info("Pass 2: fitting the scaler incrementally")
+            from sklearn.preprocessing import StandardScaler
+            scaler = StandardScaler()
+            feature_columns = None
+            for chunk in iter_chunks(train_file_path):
+                model_input = self.build_model_input(chunk, outlier_clipper, categories).drop(columns=[TARGET_COLUMN])
+                feature_columns = list(model_input.columns)
+                scaler.partial_fit(model_input.to_numpy(dtype=np.float64))
+            compiled_transform = self.compile_feature_transform(outlier_clipper, categories, scaler, feature_columns)
+
+            logging.info("Pass 3: transforming train and test into memory mapped arrays")
+            config = self.data_transformation_config
+            os.makedirs(os.path.dirname(config.transformed_train_file_path), exist_ok=True)
+            n_train, n_test, n_features = sum(class_counts.values()), count_dataframe_rows(test_file_path), len(feature_columns)
+            open_memmap = lambda file_path, dtype, shape: np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+            train_arr = open_memmap(config.transformed_train_file_path, DATA_TRANSFORMATION_FEATURE_DTYPE, (n_train, n_features))
+            train_target_arr = open_memmap(config.transformed_train_target_file_path, DATA_TRANSFORMATION_TARGET_DTYPE, (n_train,))
+            test_arr = open_memmap(config.transformed_test_file_path, DATA_TRANSFORMATION_FEATURE_DTYPE, (n_test, n_features))
+            test_target_arr = open_memmap(config.transformed_test_target_file_path, DATA_TRANSFORMATION_TARGET_DTYPE, (n_test,))
+
+            offset = 0
+            for chunk in iter_chunks(train_file_path):
+                model_input = self.build_model_input(chunk, outlier_clipper, categories)
+                features = scaler.transform(model_input.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64))
+                n_rows = len(model_input)
+                train_arr[offset:offset + n_rows] = features
+                train_target_arr[offset:offset + n_rows] = model_input[TARGET_COLUMN].to_numpy()
+                offset += n_rows
+            train_folds = self.compute_folds(train_target_arr)
+            train_balanced_index, train_sample_weight = self.compute_balancing(train_target_arr, train_folds)
+            save_numpy_array_data(config.transformed_train_folds_file_path, train_folds)
+            save_numpy_array_data(config.transformed_train_balanced_index_file_path, train_balanced_index)
+            save_numpy_array_data(config.transformed_train_sample_weight_file_path, train_sample_weight)
+
+            offset = 0
+            for chunk in iter_chunks(test_file_path):
+                model_input = self.build_model_input(chunk, outlier_clipper, categories)
+                n_rows = len(model_input)
+                test_arr[offset:offset + n_rows] = scaler.transform(
+                    model_input.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+                )
+                test_target_arr[offset:offset + n_rows] = model_input[TARGET_COLUMN].to_numpy()
+                offset += n_rows
+            for memmap in (train_arr, train_target_arr, test_arr, test_target_arr):
+                memmap.flush()
+            del train_arr, train_target_arr, test_arr, test_target_arr
+            logging.info("Train & Test arrays written successfully")
+
+            transformer = {
+                "outlier_clipper": outlier_clipper,
+                "categories": categories,
+                "scaler": scaler,
+                "feature_columns": feature_columns,
+                "compiled_transform": compiled_transform
+            }
+            save_object(self.data_transformation_config.transformed_object_file_path, transformer)
+
+            return DataTransformationArtifact(
+                transformed_object_file_path=config.transformed_object_file_path,
+                transformed_train_file_path=config.transformed_train_file_path,
+                transformed_test_file_path=config.transformed_test_file_path,
+                transformed_train_target_file_path=config.transformed_train_target_file_path,
+                transformed_test_target_file_path=config.transformed_test_target_file_path,
+                transformed_train_folds_file_path=config.transformed_train_folds_file_path,
+                transformed_train_balanced_index_file_path=config.transformed_train_balanced_index_file_path,
+                transformed_train_sample_weight_file_path=config.transformed_train_sample_weight_file_path
+            )
+        except Exception as e:
+            raise MyException(e, sys)
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         """
         Initiate data transformation process.
@@ -152,28 +397,39 @@ class DataTransformation:
             logging.info("Reading training and testing data")
             if not self.data_validation_artifact.validation_status:
                 raise Exception(self.data_validation_artifact.message)
+            if self.data_transformation_config.chunk_size > 0 and self.data_ingestion_artifact.train_df is None:
+                return self.initiate_chunked_data_transformation()
             # load train & test data
-            train_df = self.read_data(self.data_ingestion_artifact.trained_file_path) 
-            test_df = self.read_data(self.data_ingestion_artifact.test_file_path)
+            if self.data_ingestion_artifact.train_df is not None and self.data_ingestion_artifact.test_df is not None:
+                train_df = self.data_ingestion_artifact.train_df
+                test_df = self.data_ingestion_artifact.test_df
+            else:
+                train_df = self.read_data(self.data_ingestion_artifact.trained_file_path, dtype=self._schema_dtypes) 
+                test_df = self.read_data(self.data_ingestion_artifact.test_file_path, dtype=self._schema_dtypes)
+            train_df = self.apply_schema_dtypes(train_df)
+            test_df = self.apply_schema_dtypes(test_df)
+            log_memory_report("data_transformation", train_df)
             logging.info("Train & Test Data Loaded Successfully")
+            categories = self.fit_categorical_encoders(train_df)
 
             # remove outliers
             logging.info("Removing outliers from training and testing data")
 
-            train_df = self.remove_outliers(train_df)
-            test_df = self.remove_outliers(test_df)
+            outlier_clipper = self.fit_outlier_clipper(train_df)
+            train_df = self.remove_outliers(train_df, outlier_clipper)
+            test_df = self.remove_outliers(test_df, outlier_clipper)
             logging.info("Outliers removed successfully")
 
             # create new features
             logging.info("Creating new features for training and testing data")
-            train_df = self.create_new_features(train_df)
-            test_df = self.create_new_features(test_df)
+            train_df = self.create_new_features(train_df, categories)
+            test_df = self.create_new_features(test_df, categories)
             logging.info("New features created successfully")
 
             # preprocess data
             logging.info("Preprocessing training & testing data")
-            train_df = self.preprocess_data(train_df)
-            test_df = self.preprocess_data(test_df)
+            train_df = self.preprocess_data(train_df, categories)
+            test_df = self.preprocess_data(test_df, categories)
             logging.info("Preprocessing completed successfully")
 
             # train test split
@@ -198,40 +454,64 @@ class DataTransformation:
             )
             logging.info("Standard scaling applied successfully")
 
-            # Appling under sampling to handle class imbalance
-            logging.info("Applying under sampling to handle class imbalance in training data")
-
-            # Apply under sampling
-            undersampler = RandomUnderSampler(random_state=42)
-            input_features_train_resampled, train_target = undersampler.fit_resample(
-                input_features_train_arr, train_target
+            compiled_transform = self.compile_feature_transform(
+                outlier_clipper, categories, scaler, list(train_df_input.columns)
             )
-            logging.info("Under sampling applied successfully")
-            train_arr = np.c_[input_features_train_resampled, np.array(train_target)]
-            test_arr = np.c_[input_features_test_arr, np.array(test_target)]
+
+            # features and target are kept as separate fixed dtype arrays so they can be memory mapped as is,
+            # the full train set is stored, class imbalance is handled by the balancing index / sample weights
+            train_arr = input_features_train_arr.astype(DATA_TRANSFORMATION_FEATURE_DTYPE, copy=False)
+            test_arr = input_features_test_arr.astype(DATA_TRANSFORMATION_FEATURE_DTYPE, copy=False)
+            train_target_arr = np.asarray(train_target, dtype=DATA_TRANSFORMATION_TARGET_DTYPE)
+            test_target_arr = np.asarray(test_target, dtype=DATA_TRANSFORMATION_TARGET_DTYPE)
+            train_folds = self.compute_folds(train_target_arr)
+            train_balanced_index, train_sample_weight = self.compute_balancing(train_target_arr, train_folds)
             logging.info("Train & Test arrays created successfully")
 
             transformer = {
+                "outlier_clipper": outlier_clipper,
+                "categories": categories,
                 "scaler": scaler,
-                "undersampler": undersampler,
-                "feature_columns": list(train_df_input.columns)
+                "feature_columns": list(train_df_input.columns),
+                "compiled_transform": compiled_transform
             }
 
-            save_object(
-                self.data_transformation_config.transformed_object_file_path,transformer
-            )
-            save_numpy_array_data(
-                self.data_transformation_config.transformed_train_file_path,array=train_arr
-            )
-            save_numpy_array_data(
-                self.data_transformation_config.transformed_test_file_path,array=test_arr
-            )
+            saves = [
+                (save_object, self.data_transformation_config.transformed_object_file_path, transformer),
+                (save_numpy_array_data, self.data_transformation_config.transformed_train_file_path, train_arr),
+                (save_numpy_array_data, self.data_transformation_config.transformed_test_file_path, test_arr),
+                (save_numpy_array_data, self.data_transformation_config.transformed_train_target_file_path, train_target_arr),
+                (save_numpy_array_data, self.data_transformation_config.transformed_test_target_file_path, test_target_arr),
+                (save_numpy_array_data, self.data_transformation_config.transformed_train_folds_file_path, train_folds),
+                (save_numpy_array_data, self.data_transformation_config.transformed_train_balanced_index_file_path, train_balanced_index),
+                (save_numpy_array_data, self.data_transformation_config.transformed_train_sample_weight_file_path, train_sample_weight),
+            ]
+            for save_fn, file_path, obj in saves:
+                if self.artifact_writer is not None:
+                    self.artifact_writer.submit(save_fn, file_path, obj)
+                else:
+                    save_fn(file_path, obj)
             logging.info("Saving tranformation object and transformed files..")
 
-            return DataTransformationArtifact(
+            data_transformation_artifact = DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+                transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path,
+                transformed_train_folds_file_path=self.data_transformation_config.transformed_train_folds_file_path,
+                transformed_train_balanced_index_file_path=self.data_transformation_config.transformed_train_balanced_index_file_path,
+                transformed_train_sample_weight_file_path=self.data_transformation_config.transformed_train_sample_weight_file_path
             )
+            if self.artifact_writer is not None:
+                data_transformation_artifact.train_arr = train_arr
+                data_transformation_artifact.test_arr = test_arr
+                data_transformation_artifact.train_target = train_target_arr
+                data_transformation_artifact.test_target = test_target_arr
+                data_transformation_artifact.train_folds = train_folds
+                data_transformation_artifact.train_balanced_index = train_balanced_index
+                data_transformation_artifact.train_sample_weight = train_sample_weight
+                data_transformation_artifact.transformed_object = transformer
+            return data_transformation_artifact
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
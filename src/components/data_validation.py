@@ -1,11 +1,13 @@
 import json 
 import os
 import sys
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pandas import DataFrame
 from src.logger import logging
 from src.exception import MyException
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import read_yaml_file, read_dataframe, read_dataframe_schema, schema_dtypes, log_memory_report
 from src.entity.config_entity import DataValidationConfig
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.constants import SCHEMA_FILE_PATH
@@ -20,6 +22,7 @@ class DataValidation:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
             self._schema_config = read_yaml_file( file_path = SCHEMA_FILE_PATH)
+            self._schema_dtypes = schema_dtypes(self._schema_config)
         except Exception as e:
             raise MyException(e,sys)
         
@@ -70,12 +73,136 @@ class DataValidation:
             raise MyException(e,sys) 
         
     @staticmethod
-    def read_data(file_path)-> pd.DataFrame:
+    def read_data(file_path, columns: list = None, dtype: dict = None)-> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            dataframe = read_dataframe(file_path, columns=columns, dtype=dtype)
+            log_memory_report("data_validation", dataframe)
+            return dataframe
         except Exception as e:
             raise MyException(e,sys)
-        
+
+    def compute_statistics(self, dataframe: DataFrame)-> dict:
+        """
+        Method Name :   compute_statistics
+        Description :   This method computes the null counts, min/max, dtype and category set of all columns
+                        with one vectorized reduction per statistic
+
+        Output      :   Return dict of column -> statistics
+        On Failure  :   Write on exception log and then raise an exception
+        """
+        try:
+            null_counts = dataframe.isna().sum()
+            numeric = dataframe.select_dtypes(include=["number", "bool"])
+            bounds = numeric.agg(["min", "max"]) if len(dataframe) and len(numeric.columns) else None
+            statistics = {}
+            for column in dataframe.columns:
+                series = dataframe[column]
+                column_stats = {"dtype": str(series.dtype), "null_count": int(null_counts[column])}
+                if column in numeric.columns:
+                    column_stats["min"] = float(bounds.at["min", column]) if bounds is not None else None
+                    column_stats["max"] = float(bounds.at["max", column]) if bounds is not None else None
+                    if series.dtype.kind == "f" and bounds is not None:
+                        values = series.to_numpy()
+                        column_stats["is_integral"] = bool(np.all(np.isnan(values) | (np.mod(values, 1) == 0)))
+                else:
+                    if isinstance(series.dtype, pd.CategoricalDtype):
+                        codes = series.cat.codes.to_numpy()
+                        observed = series.cat.categories[np.unique(codes[codes >= 0])]
+                    else:
+                        observed = pd.unique(series.dropna())
+                    column_stats["categories"] = sorted(str(value) for value in observed)
+                    column_stats["cardinality"] = len(column_stats["categories"])
+                statistics[column] = column_stats
+            return statistics
+        except Exception as e:
+            raise MyException(e,sys)
+
+    @staticmethod
+    def _dtype_conforms(declared, column_stats: dict)-> bool:
+        if declared is None:
+            return True
+        actual = column_stats["dtype"]
+        if isinstance(declared, pd.CategoricalDtype):
+            # text columns are cast on read, the values themselves are checked against the vocabulary
+            return actual in ("category", "object", "string", "str")
+        if "min" not in column_stats or column_stats["dtype"] in ("category", "object", "string", "str"):
+            return False
+        if declared.kind in "iu":
+            # integer columns must not hold nulls or fractions and must fit the declared width
+            info = np.iinfo(declared)
+            return (
+                column_stats["null_count"] == 0
+                and column_stats.get("is_integral", True)
+                and (column_stats["min"] is None or (info.min <= column_stats["min"] and column_stats["max"] <= info.max))
+            )
+        return True
+
+    @staticmethod
+    def check_statistics(statistics: dict, schema_config: dict)-> list:
+        """
+        Method Name :   check_statistics
+        Description :   This method checks column statistics against the dtypes, not_null_columns, ranges and
+                        categories declared in the schema. The statistics may come from compute_statistics or
+                        from Proj1Data.compute_collection_statistics, so a collection can be checked before export
+
+        Output      :   Return list of error messages, empty when the dataset is valid
+        On Failure  :   Write on exception log and then raise an exception
+        """
+        try:
+            errors = []
+            declared_dtypes = schema_dtypes(schema_config)
+            for column, column_stats in statistics.items():
+                if not DataValidation._dtype_conforms(declared_dtypes.get(column), column_stats):
+                    errors.append(f"{column}: dtype {column_stats['dtype']} does not conform to {declared_dtypes[column]}")
+            for column in schema_config.get("not_null_columns", []):
+                if column in statistics and statistics[column]["null_count"] > 0:
+                    errors.append(f"{column}: {statistics[column]['null_count']} null values")
+            for column, (low, high) in schema_config.get("ranges", {}).items():
+                column_stats = statistics.get(column)
+                if column_stats is None or column_stats.get("min") is None:
+                    continue
+                if (low is not None and column_stats["min"] < low) or (high is not None and column_stats["max"] > high):
+                    errors.append(f"{column}: values [{column_stats['min']}, {column_stats['max']}] outside [{low}, {high}]")
+            # unknown values only show up in raw statistics (collection statistics, uncast frames), the schema
+            # cast rejects them with a SchemaError and a null category fails not_null_columns
+            for column, categories in schema_config.get("categories", {}).items():
+                if column not in statistics or "categories" not in statistics[column]:
+                    continue
+                unknown = sorted(set(statistics[column]["categories"]) - set(map(str, categories)))
+                if unknown:
+                    errors.append(f"{column}: unknown categories {unknown}")
+            return errors
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def validate_dataset(self, name: str, source)-> tuple:
+        """
+        Method Name :   validate_dataset
+        Description :   This method runs every check of one dataset (a dataframe or a file path) in a single pass.
+                        For a file the column checks run on its stored schema and only the schema columns are read
+
+        Output      :   Return (statistics, list of error messages)
+        On Failure  :   Write on exception log and then raise an exception
+        """
+        try:
+            if isinstance(source, DataFrame):
+                dataframe = stored = source
+            else:
+                stored = read_dataframe_schema(source)
+                columns = [column for column in self._schema_config["columns"] if column in stored.columns]
+                dataframe = DataValidation.read_data(file_path=source, columns=columns)
+            errors = []
+            if not self.validate_number_of_columns(dataframe=stored):
+                errors.append(f"Column are missing in {name} dataframe")
+            if not self.is_columns_exist(dataframe=stored):
+                errors.append(f"Columns are missing in {name} dataframe")
+            statistics = self.compute_statistics(dataframe)
+            errors.extend(f"{name} {error}" for error in DataValidation.check_statistics(statistics, self._schema_config))
+            logging.info(f"Validated {name} dataframe ({len(dataframe)} rows): {len(errors)} errors")
+            return {"n_rows": len(dataframe), "columns": statistics}, errors
+        except Exception as e:
+            raise MyException(e,sys)
+
     def initiate_data_validation(self)-> DataValidationArtifact:
         """
         Method Name :   initiate_data_validation
@@ -85,40 +212,22 @@ class DataValidation:
         On Failure  :   Write on exception log and then raise an exception
         """
         try:
-            validation_error_msg = "" 
             logging.info("Starting data validation")
-            train_df, test_df = (
-                DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
-                DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path)
-            )
-
-            # checking the col len of dataframe for train\test df
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += f"Column are missing in training dataframe"
+            if self.data_ingestion_artifact.train_df is not None and self.data_ingestion_artifact.test_df is not None:
+                # in-memory hand-off, the files may still be in flight on the background writer
+                sources = {"train": self.data_ingestion_artifact.train_df, "test": self.data_ingestion_artifact.test_df}
             else:
-                logging.info("All required columns are present in train dataframe")
+                sources = {"train": self.data_ingestion_artifact.trained_file_path, "test": self.data_ingestion_artifact.test_file_path}
 
-            status = self.validate_number_of_columns(dataframe=test_df)
-            if not status:
-                validation_error_msg += f"Column are missing in test dataframe"
-            else:
-                logging.info("Alll required columns are present in test dataframe")
-            
-            # validating col dtypes for train\test
-            status = self.is_columns_exist(dataframe=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in train dataframe"
-            else:
-                logging.info(f"All categorical/int columns present in train dataframe {status}")
-            
-            status = self.is_columns_exist(dataframe=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe"
-            else:
-                logging.info(f"All categorical/int columns present in test dataframe {status}")
+            # train and test are read and checked concurrently, parquet decoding and the reductions release the GIL
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                results = dict(zip(sources, executor.map(self.validate_dataset, sources.keys(), sources.values())))
 
-            validation_status = len(validation_error_msg) == 0
+            errors = [error for _, dataset_errors in results.values() for error in dataset_errors]
+            for error in errors:
+                logging.info(f"Validation error: {error}")
+            validation_error_msg = "; ".join(errors)
+            validation_status = len(errors) == 0
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
@@ -133,7 +242,8 @@ class DataValidation:
             # Save the validation status as a json file
             validation_report = {
                 "validation_status" : validation_status,
-                "message" : validation_error_msg.strip()
+                "message" : validation_error_msg.strip(),
+                "statistics" : {name: statistics for name, (statistics, _) in results.items()}
             }
 
             with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_numpy_array_data, save_numpy_array_data
+from src.components.model_trainer import build_model, fit_model
+
+# hyperparameter holding the number of boosting rounds of each library
+ROUNDS_PARAMETER = {"lightgbm": "n_estimators", "xgboost": "n_estimators", "catboost": "iterations"}
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _init_worker(n_threads: int)-> None:
+    # native thread pools of a trial may not grow past its budget
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(n_threads)
+
+
+def _run_trial(trial: dict, model_name: str, n_threads: int, random_state: int, early_stopping_rounds: int,
+               array_file_paths: dict)-> dict:
+    """
+    Train one configuration for trial["rounds"] boosting rounds and return its validation roc_auc.
+    Runs in a worker process which attaches to the train arrays as read-only memory maps, only the
+    file paths are sent to it.
+    """
+    result = dict(trial, n_threads=n_threads)
+    try:
+        from sklearn.metrics import roc_auc_score
+        x = load_numpy_array_data(array_file_paths["x"])
+        y = load_numpy_array_data(array_file_paths["y"])
+        train_index = load_numpy_array_data(array_file_paths["train_index"])
+        valid_index = load_numpy_array_data(array_file_paths["valid_index"])
+        sample_weight = None
+        if array_file_paths.get("sample_weight"):
+            sample_weight = load_numpy_array_data(array_file_paths["sample_weight"])[train_index]
+
+        params = dict(trial["params"], **{ROUNDS_PARAMETER[model_name]: trial["rounds"]})
+        model = build_model(model_name, params, n_threads, random_state, early_stopping_rounds)
+        stats = fit_model(model_name, model, x[train_index], y[train_index], x[valid_index], y[valid_index], early_stopping_rounds,
+                          sample_weight)
+        score = roc_auc_score(y[valid_index], model.predict_proba(x[valid_index])[:, 1])
+        result.update(stats, score=float(score), status="ok")
+    except Exception as e:
+        result.update(score=None, status="failed", error=str(e))
+    return result
+
+
+class HyperparameterSearch:
+    """
+    Successive halving search over the space of config/model.yaml.
+
+    Every rung trains the surviving configurations in a process pool for a growing number of boosting
+    rounds and promotes the best 1 / reduction_factor of them. Workers share the memmapped .npy train
+    arrays and row indices through the page cache instead of receiving pickled copies, and every trial gets
+    os.cpu_count() // n_workers threads so concurrent trials do not oversubscribe the cores.
+    Each finished trial is appended to a JSON lines results file.
+    """
+    def __init__(self, model_name: str, base_params: dict, search_config: dict, results_file_path: str,
+                 random_state: int = 42, early_stopping_rounds: int = None):
+        """
+        :param model_name: one of lightgbm, xgboost, catboost
+        :param base_params: parameters of models.<model_name>, the sampled values override them
+        :param search_config: 'search' section of config/model.yaml
+        :param results_file_path: JSON lines file every trial result is appended to
+        """
+        try:
+            self.model_name = model_name
+            self.base_params = dict(base_params)
+            self.search_config = search_config
+            self.space = search_config["space"][model_name]
+            self.results_file_path = results_file_path
+            self.random_state = random_state
+            self.early_stopping_rounds = early_stopping_rounds
+            self.n_workers = max(1, min(search_config["n_workers"], os.cpu_count() or 1))
+            self.n_threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+            self._rng = np.random.default_rng(random_state)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def sample_params(self)-> dict:
+        """
+        Draw one configuration from the search space on top of the base parameters
+        """
+        params = dict(self.base_params)
+        for name, spec in self.space.items():
+            kind = spec["type"]
+            if kind == "uniform":
+                params[name] = float(self._rng.uniform(spec["low"], spec["high"]))
+            elif kind == "loguniform":
+                params[name] = float(np.exp(self._rng.uniform(np.log(spec["low"]), np.log(spec["high"]))))
+            elif kind == "int":
+                params[name] = int(self._rng.integers(spec["low"], spec["high"], endpoint=True))
+            elif kind == "choice":
+                params[name] = spec["values"][int(self._rng.integers(len(spec["values"])))]
+            else:
+                raise ValueError(f"Unknown search space type [{kind}] for {name}")
+        return params
+
+    def _record(self, result: dict)-> None:
+        with open(self.results_file_path, "a") as results_file:
+            results_file.write(json.dumps(result) + "\n")
+
+    def run(self, x_file_path: str, y_file_path: str, train_index: np.ndarray, valid_index: np.ndarray,
+            sample_weight_file_path: str = None)-> dict:
+        """
+        Method Name :   run
+        Description :   This method runs the successive halving search on the memmapped train arrays, every trial
+                        trains on the rows of train_index (weighted by the stored per row sample weights when
+                        sample_weight_file_path is given) and is scored on the rows of valid_index
+
+        Output      :   Returns the result of the best trial of the last rung, its 'params' hold the configuration
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            os.makedirs(os.path.dirname(self.results_file_path), exist_ok=True)
+            search_dir = os.path.dirname(self.results_file_path)
+            array_file_paths = {"x": x_file_path, "y": y_file_path, "sample_weight": sample_weight_file_path}
+            for name, index in (("train_index", train_index), ("valid_index", valid_index)):
+                array_file_paths[name] = os.path.join(search_dir, f"{name}.npy")
+                save_numpy_array_data(array_file_paths[name], index, dtype=np.int64)
+
+            eta = self.search_config["reduction_factor"]
+            max_rounds = self.search_config["max_rounds"]
+            rounds = min(self.search_config["min_rounds"], max_rounds)
+            candidates = [{"trial_id": i, "params": self.sample_params()} for i in range(self.search_config["n_trials"])]
+            logging.info(f"Searching {len(candidates)} {self.model_name} configurations with {self.n_workers} workers "
+                         f"x {self.n_threads} threads")
+
+            rung = 0
+            with ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker, initargs=(self.n_threads,)) as executor:
+                while True:
+                    start = time.perf_counter()
+                    futures = [
+                        executor.submit(_run_trial, dict(candidate, rung=rung, rounds=rounds), self.model_name, self.n_threads,
+                                        self.random_state, self.early_stopping_rounds, array_file_paths)
+                        for candidate in candidates
+                    ]
+                    results = []
+                    for future in as_completed(futures):
+                        result = future.result()
+                        self._record(result)
+                        results.append(result)
+                    results = sorted((r for r in results if r["status"] == "ok"), key=lambda r: r["score"], reverse=True)
+                    if not results:
+                        raise Exception(f"Every trial of rung {rung} failed, see {self.results_file_path}")
+                    logging.info(f"Rung {rung}: {len(candidates)} trials x {rounds} rounds in {time.perf_counter() - start:.1f}s, "
+                                 f"best roc_auc {results[0]['score']:.5f} (trial {results[0]['trial_id']})")
+                    if len(results) == 1 or rounds >= max_rounds:
+                        break
+                    candidates = [{"trial_id": r["trial_id"], "params": r["params"]} for r in results[:max(1, len(results) // eta)]]
+                    rounds = min(rounds * eta, max_rounds)
+                    rung += 1
+            return results[0]
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from src.exception import MyException
+from src.logger import logging
+from src.constants import TARGET_COLUMN
+from src.utils.main_utils import load_object, load_numpy_array_data, save_numpy_array_data, iter_dataframe_chunks
+from src.utils.metrics import prepare_scores, weighted_metrics
+from src.entity.config_entity import ModelEvaluationConfig
+from src.entity.estimator import LoanModel
+from src.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact
+
+
+def predict_in_batches(model, x, batch_size: int)-> np.ndarray:
+    """
+    Positive class probability of every row of the transformed array x, predicted batch_size rows at a time
+    so only one batch of a memory mapped array is paged in and copied at once
+    """
+    try:
+        # a LoanModel scores raw records, the test array is already transformed by this run's feature transform
+        model = model.trained_model if isinstance(model, LoanModel) else model
+        scores = np.empty(len(x), dtype=np.float64)
+        for start in range(0, len(x), batch_size):
+            scores[start:start + batch_size] = model.predict_proba(x[start:start + batch_size])[:, 1]
+        return scores
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def predict_raw_in_batches(model: LoanModel, chunks)-> tuple:
+    """
+    Positive class probability and target of every raw test row, every chunk of rows transformed by the
+    model's own compiled feature transform. Returns (scores, targets) in the order of the chunks
+    """
+    try:
+        scores, targets = [], []
+        for chunk in chunks:
+            scores.append(model.predict_proba(chunk)[:, 1])
+            targets.append(chunk[TARGET_COLUMN].to_numpy())
+        return np.concatenate(scores), np.concatenate(targets)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def _bootstrap_block(prepared_file_paths: dict, n_rows: int, n_replicates: int, seed: np.random.SeedSequence,
+                     block_size: int)-> dict:
+    """
+    Metrics of n_replicates bootstrap resamples for every model. Runs in a worker process which attaches to
+    the prepared score arrays as read-only memory maps.
+
+    The resamples are drawn as one n_replicates x n_rows matrix of Poisson(1) row counts, the large sample
+    equivalent of drawing n_rows indices with replacement, in the original row order. Every model sees the
+    same matrix, so differences between the models are paired. The counts stay float32 and a replicate
+    longer than block_size rows is scored block_size rows at a time.
+    """
+    counts = np.random.default_rng(seed).poisson(1.0, size=(n_replicates, n_rows)).astype(np.float32)
+    results = {}
+    for model_key, file_paths in prepared_file_paths.items():
+        prepared = {name: load_numpy_array_data(file_path) for name, file_path in file_paths.items()}
+        chunk_size = max(1, block_size // n_replicates)
+        results[model_key] = weighted_metrics(prepared, counts[:, prepared["order"]], chunk_size=chunk_size)
+    return results
+
+
+class ModelEvaluation:
+    def __init__(self, model_eval_config: ModelEvaluationConfig, data_ingestion_artifact: DataIngestionArtifact,
+                 data_transformation_artifact: DataTransformationArtifact, model_trainer_artifact: ModelTrainerArtifact):
+        """
+        :param model_eval_config: Configuration for model evaluation
+        :param data_ingestion_artifact: Output reference of data ingestion artifact stage, the raw test rows
+        :param data_transformation_artifact: Output reference of data transformation artifact stage
+        :param model_trainer_artifact: Output reference of model trainer artifact stage
+        """
+        try:
+            self.model_eval_config = model_eval_config
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_transformation_artifact = data_transformation_artifact
+            self.model_trainer_artifact = model_trainer_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_test_arrays(self)-> tuple:
+        """
+        Returns (x_test, y_test), the in-memory arrays when the previous stage handed them over,
+        otherwise read-only memory maps of the .npy files
+        """
+        artifact = self.data_transformation_artifact
+        if artifact.test_arr is not None and artifact.test_target is not None:
+            return artifact.test_arr, artifact.test_target
+        return (load_numpy_array_data(artifact.transformed_test_file_path),
+                load_numpy_array_data(artifact.transformed_test_target_file_path))
+
+    def iter_raw_test_chunks(self, columns: list):
+        """
+        Yields the raw test rows (the given columns) batch_size rows at a time, slices of the in-memory dataframe
+        when the ingestion stage handed it over, otherwise chunks read from the test file
+        """
+        batch_size = self.model_eval_config.batch_size
+        test_df = self.data_ingestion_artifact.test_df
+        if test_df is not None:
+            for start in range(0, len(test_df), batch_size):
+                yield test_df.iloc[start:start + batch_size][columns]
+        else:
+            yield from iter_dataframe_chunks(self.data_ingestion_artifact.test_file_path, batch_size, columns=columns)
+
+    def score_production_model(self, production_model, y_test: np.ndarray)-> np.ndarray:
+        """
+        Method Name :   score_production_model
+        Description :   This method scores the production model on the raw test rows through its own feature
+                        transform. The test array was transformed with the encoders and scaler fitted in this run,
+                        which are not the ones the production model was trained on
+
+        Output      :   Returns the positive class probability of every test row
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if not isinstance(production_model, LoanModel):
+                raise Exception(f"Production model {type(production_model).__name__} is not a LoanModel, "
+                                "without its feature transform it cannot be compared with the trained model")
+            columns = production_model.transform.raw_columns + [TARGET_COLUMN]
+            scores, targets = predict_raw_in_batches(production_model, self.iter_raw_test_chunks(columns))
+            if not np.array_equal(targets, y_test):
+                raise Exception("The raw test rows do not line up with the transformed test array")
+            return scores
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_production_model(self):
+        """
+        Returns the model currently in production, None when no model has been promoted yet
+        """
+        try:
+            production_model_file_path = self.model_eval_config.production_model_file_path
+            if not os.path.exists(production_model_file_path):
+                return None
+            return load_object(file_path=production_model_file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def bootstrap(self, prepared: dict)-> dict:
+        """
+        Method Name :   bootstrap
+        Description :   This method computes the metrics of n_bootstrap paired resamples of the test set for every
+                        model. The resamples are split into blocks of at most bootstrap_block_size weights which are
+                        spread over a process pool, every block with its own child seed so results do not depend on
+                        the number of workers. A single resample of more than bootstrap_block_size rows is scored in
+                        chunks of rows
+
+        Output      :   Returns {model_key: {metric: np.ndarray of n_bootstrap values}}
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.model_eval_config
+            n_rows = len(next(iter(prepared.values()))["y"])
+            bootstrap_dir = os.path.join(config.model_evaluation_dir, "bootstrap")
+            prepared_file_paths = {}
+            for model_key, arrays in prepared.items():
+                prepared_file_paths[model_key] = {}
+                for name, array in arrays.items():
+                    file_path = os.path.join(bootstrap_dir, f"{model_key}_{name}.npy")
+                    save_numpy_array_data(file_path, array)
+                    prepared_file_paths[model_key][name] = file_path
+
+            per_block = max(1, config.bootstrap_block_size // n_rows)
+            block_sizes = [min(per_block, config.n_bootstrap - start) for start in range(0, config.n_bootstrap, per_block)]
+            seeds = np.random.SeedSequence(config.random_state).spawn(len(block_sizes))
+            n_workers = max(1, min(config.n_workers, len(block_sizes), os.cpu_count() or 1))
+            logging.info(f"Bootstrapping {config.n_bootstrap} resamples of {n_rows} rows in {len(block_sizes)} blocks "
+                         f"with {n_workers} workers")
+
+            if n_workers == 1:
+                blocks = [_bootstrap_block(prepared_file_paths, n_rows, size, seed, config.bootstrap_block_size)
+                          for size, seed in zip(block_sizes, seeds)]
+            else:
+                with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                    futures = [executor.submit(_bootstrap_block, prepared_file_paths, n_rows, size, seed,
+                                               config.bootstrap_block_size)
+                               for size, seed in zip(block_sizes, seeds)]
+                    blocks = [future.result() for future in futures]
+            return {
+                model_key: {metric: np.concatenate([block[model_key][metric] for block in blocks]) for metric in blocks[0][model_key]}
+                for model_key in prepared
+            }
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _summarize(self, value: float, replicates: np.ndarray = None)-> dict:
+        summary = {"value": float(value)}
+        if replicates is not None:
+            alpha = (1 - self.model_eval_config.confidence_level) / 2
+            low, high = np.nanquantile(replicates, [alpha, 1 - alpha])
+            summary.update(ci_low=float(low), ci_high=float(high))
+        return summary
+
+    def initiate_model_evaluation(self)-> ModelEvaluationArtifact:
+        """
+        Method Name :   initiate_model_evaluation
+        Description :   This method scores the trained model on the test array and the production model on the raw
+                        test rows through its own feature transform, both in batches, and compares roc_auc, log loss, f1 and calibration with bootstrap confidence intervals. The
+                        trained model is accepted when there is no production model or when the lower confidence
+                        bound of its roc_auc gain is above changed_threshold_score
+
+        Output      :   Returns model evaluation artifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logging.info("Entered initiate_model_evaluation method of ModelEvaluation class")
+        try:
+            config = self.model_eval_config
+            start = time.perf_counter()
+            x_test, y_test = self.load_test_arrays()
+            models = {"trained": load_object(file_path=self.model_trainer_artifact.trained_model_file_path)}
+            production_model = self.get_production_model()
+            if production_model is not None:
+                models["production"] = production_model
+            else:
+                logging.info("No production model found, the trained model is accepted without comparison")
+
+            # each model is scored on the features of its own transform, the test array is the trained model's
+            scores = {"trained": predict_in_batches(models["trained"], x_test, config.batch_size)}
+            if production_model is not None:
+                scores["production"] = self.score_production_model(production_model, y_test)
+            prepared = {model_key: prepare_scores(y_test, model_scores, config.calibration_bins)
+                        for model_key, model_scores in scores.items()}
+            n_rows = len(y_test)
+            point = {model_key: weighted_metrics(arrays, np.ones((1, n_rows)), config.bootstrap_block_size)
+                     for model_key, arrays in prepared.items()}
+            replicates = self.bootstrap(prepared) if config.n_bootstrap > 0 else None
+
+            report = {"n_test_rows": int(n_rows), "n_bootstrap": config.n_bootstrap, "confidence_level": config.confidence_level}
+            for model_key in prepared:
+                report[model_key] = {
+                    metric: self._summarize(values[0], None if replicates is None else replicates[model_key][metric])
+                    for metric, values in point[model_key].items()
+                }
+
+            if production_model is None:
+                is_model_accepted = True
+                changed_accuracy = report["trained"]["roc_auc"]["value"]
+            else:
+                report["difference"] = {
+                    metric: self._summarize(point["trained"][metric][0] - point["production"][metric][0],
+                                            None if replicates is None else replicates["trained"][metric] - replicates["production"][metric])
+                    for metric in point["trained"]
+                }
+                roc_auc_gain = report["difference"]["roc_auc"]
+                changed_accuracy = roc_auc_gain["value"]
+                is_model_accepted = roc_auc_gain.get("ci_low", roc_auc_gain["value"]) > config.changed_threshold_score
+            report.update(is_model_accepted=is_model_accepted, evaluation_seconds=time.perf_counter() - start)
+            logging.info(f"Model evaluation: accepted={is_model_accepted}, roc_auc change {changed_accuracy:.5f} "
+                         f"in {report['evaluation_seconds']:.1f}s")
+
+            os.makedirs(config.model_evaluation_dir, exist_ok=True)
+            with open(config.evaluation_report_file_path, "w") as report_file:
+                json.dump(report, report_file, indent=4)
+
+            model_evaluation_artifact = ModelEvaluationArtifact(
+                is_model_accepted=is_model_accepted,
+                changed_accuracy=changed_accuracy,
+                trained_model_path=self.model_trainer_artifact.trained_model_file_path,
+                production_model_path=config.production_model_file_path if production_model is not None else None,
+                evaluation_report_file_path=config.evaluation_report_file_path
+            )
+            logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
+            return model_evaluation_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -0,0 +1,84 @@
+import os
+import sys
+import shutil
+
+from src.exception import MyException
+from src.logger import logging
+from src.entity.config_entity import ModelPusherConfig
+from src.entity.artifact_entity import ModelTrainerArtifact, ModelEvaluationArtifact, ModelPusherArtifact, DataDriftArtifact
+
+
+class ModelPusher:
+    def __init__(self, model_evaluation_artifact: ModelEvaluationArtifact, model_trainer_artifact: ModelTrainerArtifact,
+                 model_pusher_config: ModelPusherConfig = ModelPusherConfig(), data_drift_artifact: DataDriftArtifact = None):
+        """
+        :param model_evaluation_artifact: Output reference of model evaluation artifact stage
+        :param model_trainer_artifact: Output reference of model trainer artifact stage
+        :param model_pusher_config: Configuration for model pusher
+        :param data_drift_artifact: Output reference of data drift artifact stage, its train profile becomes the
+                                    drift baseline of the promoted model
+        """
+        try:
+            self.model_evaluation_artifact = model_evaluation_artifact
+            self.model_trainer_artifact = model_trainer_artifact
+            self.model_pusher_config = model_pusher_config
+            self.data_drift_artifact = data_drift_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def promotions(self)-> list:
+        """
+        Returns the (trained file, production file) pairs promoted together
+        """
+        trainer, config = self.model_trainer_artifact, self.model_pusher_config
+        promotions = [
+            (trainer.feature_transform_file_path, config.feature_transform_file_path),
+            (trainer.compiled_model_file_path, config.compiled_model_file_path),
+        ]
+        if self.data_drift_artifact is not None:
+            promotions.append((self.data_drift_artifact.train_profile_file_path, config.baseline_profile_file_path))
+        promotions += [
+            # replaced last, model evaluation compares the next run against it
+            (trainer.trained_model_file_path, config.production_model_file_path),
+        ]
+        missing = [source for source, _ in promotions if source is None or not os.path.exists(source)]
+        if missing:
+            raise Exception(f"Cannot promote the trained model, missing files: {missing}")
+        return promotions
+
+    def initiate_model_pusher(self)-> ModelPusherArtifact:
+        """
+        Method Name :   initiate_model_pusher
+        Description :   This method promotes an accepted model: the LoanModel, the compiled booster and the feature
+                        transform are copied into the production model directory, where model evaluation and the
+                        prediction service load them from, and the train profile replaces the drift baseline. Every
+                        file is copied next to its target first and then renamed over it, a reader never sees a partly
+                        written file
+
+        Output      :   Returns model pusher artifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if not self.model_evaluation_artifact.is_model_accepted:
+                raise Exception("Only an accepted model can be promoted to production")
+            promotions = self.promotions()
+            staged = []
+            for source, target in promotions:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                staged_file_path = f"{target}.tmp"
+                shutil.copyfile(source, staged_file_path)
+                staged.append((staged_file_path, target))
+            for staged_file_path, target in staged:
+                os.replace(staged_file_path, target)
+                logging.info(f"Promoted {target}")
+
+            model_pusher_artifact = ModelPusherArtifact(
+                production_model_file_path=self.model_pusher_config.production_model_file_path,
+                compiled_model_file_path=self.model_pusher_config.compiled_model_file_path,
+                feature_transform_file_path=self.model_pusher_config.feature_transform_file_path,
+                baseline_profile_file_path=self.model_pusher_config.baseline_profile_file_path if self.data_drift_artifact else None
+            )
+            logging.info(f"Model pusher artifact: {model_pusher_artifact}")
+            return model_pusher_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -0,0 +1,342 @@
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_numpy_array_data, load_object, read_yaml_file, save_object
+from src.utils.sampling import fold_indices
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.estimator import LoanModel
+from src.entity.tree_ensemble import export_tree_ensemble
+from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
+
+SUPPORTED_MODELS = ("lightgbm", "xgboost", "catboost")
+
+
+def resolve_n_jobs(n_jobs: int)-> int:
+    """
+    Turns -1/None/0 into an explicit thread count so every library gets the same number
+    """
+    return (os.cpu_count() or 1) if n_jobs in (None, 0, -1) else int(n_jobs)
+
+
+def current_rss_mb()-> float:
+    """
+    Current resident set size of this process in MiB, None where /proc is missing (macOS, Windows)
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class FitMemorySampler:
+    """
+    Samples the resident set size of the process on a background thread while the block runs, so the
+    memory of one fit is measured instead of the process lifetime peak (ru_maxrss) which earlier stages
+    or fits set. The boosters release the GIL while they train, the sampler thread keeps running.
+    Peaks shorter than the sampling interval can be missed.
+    """
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.before_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self)-> None:
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+
+    def _run(self)-> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def __enter__(self)-> "FitMemorySampler":
+        self.before_mb = current_rss_mb()
+        self.peak_mb = self.before_mb
+        if self.before_mb is not None:
+            self._thread = threading.Thread(target=self._run, name="fit-memory-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info)-> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+
+    @property
+    def increase_mb(self)-> float:
+        """
+        How far the resident set size rose above its value before the block, None when it cannot be read
+        """
+        return None if self.before_mb is None else self.peak_mb - self.before_mb
+
+
+def build_model(model_name: str, params: dict, n_jobs: int, random_state: int, early_stopping_rounds: int):
+    """
+    Create an unfitted histogram based booster, the library is imported only when it is used
+    model_name: str one of SUPPORTED_MODELS
+    params: dict hyperparameters from config/model.yaml
+    n_jobs: int number of threads the booster may use
+    """
+    try:
+        if model_name == "lightgbm":
+            from lightgbm import LGBMClassifier
+            return LGBMClassifier(**params, n_jobs=n_jobs, random_state=random_state)
+        if model_name == "xgboost":
+            from xgboost import XGBClassifier
+            return XGBClassifier(**params, n_jobs=n_jobs, random_state=random_state, early_stopping_rounds=early_stopping_rounds)
+        if model_name == "catboost":
+            from catboost import CatBoostClassifier
+            return CatBoostClassifier(**params, thread_count=n_jobs, random_seed=random_state)
+        raise ValueError(f"Unknown model [{model_name}], expected one of {SUPPORTED_MODELS}")
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def fit_model(model_name: str, model, x_train, y_train, x_valid, y_valid, early_stopping_rounds: int,
+              sample_weight=None)-> dict:
+    """
+    Fit the model with early stopping on the validation split and return its training statistics:
+    train time, iterations run, best iteration, iterations/sec, and the peak resident memory during the fit
+    with its increase over the resident memory before the fit
+    sample_weight: optional per row weight of x_train
+    """
+    try:
+        start = time.perf_counter()
+        with FitMemorySampler() as memory:
+            if model_name == "lightgbm":
+                import lightgbm
+                model.fit(x_train, y_train, sample_weight=sample_weight, eval_set=[(x_valid, y_valid)], eval_metric="auc",
+                          callbacks=[lightgbm.early_stopping(early_stopping_rounds, verbose=False)])
+            elif model_name == "xgboost":
+                model.fit(x_train, y_train, sample_weight=sample_weight, eval_set=[(x_valid, y_valid)], verbose=False)
+            else:
+                model.fit(x_train, y_train, sample_weight=sample_weight, eval_set=(x_valid, y_valid),
+                          early_stopping_rounds=early_stopping_rounds, use_best_model=True)
+        train_time = time.perf_counter() - start
+        if model_name == "lightgbm":
+            n_iterations, best_iteration = model.booster_.current_iteration(), model.best_iteration_
+        elif model_name == "xgboost":
+            n_iterations, best_iteration = model.get_booster().num_boosted_rounds(), model.best_iteration
+        else:
+            n_iterations = len(next(iter(model.get_evals_result()["validation"].values())))
+            best_iteration = model.get_best_iteration()
+        return {
+            "train_time_seconds": train_time,
+            "n_iterations": int(n_iterations),
+            "best_iteration": int(best_iteration),
+            "iterations_per_second": n_iterations / train_time if train_time > 0 else None,
+            "fit_peak_memory_mb": memory.peak_mb,
+            "fit_memory_increase_mb": memory.increase_mb,
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+class ModelTrainer:
+    def __init__(self, data_transformation_artifact: DataTransformationArtifact, model_trainer_config: ModelTrainerConfig):
+        """
+        :param data_transformation_artifact: Output reference of data transformation artifact stage
+        :param model_trainer_config: Configuration for model training
+        """
+        try:
+            self.data_transformation_artifact = data_transformation_artifact
+            self.model_trainer_config = model_trainer_config
+            self.model_config = read_yaml_file(file_path=model_trainer_config.model_config_file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_arrays(self)-> dict:
+        """
+        Returns the transformed arrays (x_train, y_train, train_folds, balanced_index, sample_weight, x_test, y_test),
+        the in-memory arrays when the previous stage handed them over, otherwise read-only memory maps of the .npy files
+        """
+        try:
+            artifact = self.data_transformation_artifact
+            if artifact.train_arr is not None and artifact.train_target is not None:
+                return {
+                    "x_train": artifact.train_arr, "y_train": artifact.train_target, "train_folds": artifact.train_folds,
+                    "balanced_index": artifact.train_balanced_index, "sample_weight": artifact.train_sample_weight,
+                    "x_test": artifact.test_arr, "y_test": artifact.test_target,
+                }
+            return {
+                "x_train": load_numpy_array_data(artifact.transformed_train_file_path),
+                "y_train": load_numpy_array_data(artifact.transformed_train_target_file_path),
+                "train_folds": load_numpy_array_data(artifact.transformed_train_folds_file_path),
+                "balanced_index": load_numpy_array_data(artifact.transformed_train_balanced_index_file_path),
+                "sample_weight": load_numpy_array_data(artifact.transformed_train_sample_weight_file_path),
+                "x_test": load_numpy_array_data(artifact.transformed_test_file_path),
+                "y_test": load_numpy_array_data(artifact.transformed_test_target_file_path),
+            }
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_feature_transform(self):
+        """
+        Returns the compiled feature transform of the data transformation stage, in-memory when it was handed over
+        """
+        try:
+            transformer = self.data_transformation_artifact.transformed_object
+            if transformer is None:
+                transformer = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            return transformer["compiled_transform"]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def export_compiled_model(self, model_name: str, model, transform, x_test: np.ndarray)-> dict:
+        """
+        Method Name :   export_compiled_model
+        Description :   This method converts the trained booster into a numpy TreeEnsemble, checks it against the
+                        native predictions on the first rows of the test array and saves it with the feature transform,
+                        so serving can load both without lightgbm/xgboost/catboost or sklearn
+
+        Output      :   Returns the export statistics for the training report
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.model_trainer_config
+            ensemble = export_tree_ensemble(model_name, model)
+            x_check = np.asarray(x_test[:config.export_check_rows])
+            max_difference = float(np.max(np.abs(
+                ensemble.predict_proba(x_check)[:, 1] - model.predict_proba(x_check)[:, 1]
+            ), initial=0.0))
+            if max_difference > config.export_tolerance:
+                raise Exception(f"Compiled {model_name} model differs from the native predictions by {max_difference:.2e}, "
+                                f"more than the tolerance {config.export_tolerance}")
+            ensemble.save(config.compiled_model_file_path)
+            save_object(config.feature_transform_file_path, transform)
+            logging.info(f"Exported {ensemble.n_trees} trees to {config.compiled_model_file_path}, "
+                         f"max probability difference {max_difference:.2e}")
+            return {"n_trees": ensemble.n_trees, "max_depth": ensemble.max_depth, "max_difference": max_difference}
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def select_training_rows(self, arrays: dict)-> tuple:
+        """
+        Returns (train_index, valid_index, sample_weight or None) for the configured validation fold and balancing:
+        'undersample' trains on the stored balanced index, 'weights' on every row with the stored sample weights,
+        'none' on every row unweighted
+        """
+        try:
+            validation_fold = self.model_config["validation_fold"]
+            balancing = self.model_config.get("balancing", "undersample")
+            train_index, valid_index = fold_indices(arrays["train_folds"], validation_fold)
+            if balancing == "undersample":
+                balanced_index = np.asarray(arrays["balanced_index"])
+                return balanced_index[arrays["train_folds"][balanced_index] != validation_fold], valid_index, None
+            if balancing == "weights":
+                return train_index, valid_index, np.asarray(arrays["sample_weight"])[train_index]
+            if balancing == "none":
+                return train_index, valid_index, None
+            raise ValueError(f"Unknown balancing [{balancing}], expected undersample, weights or none")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def get_metrics(y_true: np.ndarray, y_score: np.ndarray)-> ClassificationMetricArtifact:
+        """
+        Classification metrics of predicted probabilities, labels are taken at the 0.5 threshold
+        """
+        try:
+            from sklearn.metrics import roc_auc_score, f1_score, precision_score, recall_score
+            y_pred = (y_score >= 0.5).astype(np.uint8)
+            return ClassificationMetricArtifact(
+                roc_auc_score=float(roc_auc_score(y_true, y_score)),
+                f1_score=float(f1_score(y_true, y_pred)),
+                precision_score=float(precision_score(y_true, y_pred)),
+                recall_score=float(recall_score(y_true, y_pred))
+            )
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def initiate_model_trainer(self)-> ModelTrainerArtifact:
+        """
+        Method Name :   initiate_model_trainer
+        Description :   This method trains the booster configured in config/model.yaml on the training folds,
+                        rebalanced with the stored index or weights, with early stopping on the validation fold
+                        and scores it on the test array. The booster is saved together with the compiled feature
+                        transform as a LoanModel
+
+        Output      :   Returns model trainer artifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logging.info("Entered initiate_model_trainer method of ModelTrainer class")
+        try:
+            arrays = self.load_arrays()
+            x_train, y_train, x_test, y_test = arrays["x_train"], arrays["y_train"], arrays["x_test"], arrays["y_test"]
+            model_name = self.model_config["model_name"]
+            n_jobs = resolve_n_jobs(self.model_config.get("n_jobs", -1))
+            random_state = self.model_config.get("random_state", 42)
+            early_stopping_rounds = self.model_config["early_stopping_rounds"]
+
+            train_index, valid_index, sample_weight = self.select_training_rows(arrays)
+            params, search_result = self.model_config["models"][model_name], None
+            search_config = self.model_config.get("search", {})
+            if search_config.get("enabled"):
+                # imported here, the search module builds on the helpers of this one
+                from src.components.hyperparameter_search import HyperparameterSearch
+                search = HyperparameterSearch(model_name, params, search_config, self.model_trainer_config.search_results_file_path,
+                                              random_state=random_state, early_stopping_rounds=early_stopping_rounds)
+                search_result = search.run(self.data_transformation_artifact.transformed_train_file_path,
+                                           self.data_transformation_artifact.transformed_train_target_file_path,
+                                           train_index, valid_index,
+                                           self.data_transformation_artifact.transformed_train_sample_weight_file_path
+                                           if sample_weight is not None else None)
+                params = search_result["params"]
+                logging.info(f"Using parameters of search trial {search_result['trial_id']}: {params}")
+            model = build_model(model_name, params, n_jobs, random_state, early_stopping_rounds)
+            logging.info(f"Training {model_name} on {len(train_index)} rows with {n_jobs} threads")
+            training_stats = fit_model(
+                model_name, model, x_train[train_index], y_train[train_index],
+                x_train[valid_index], y_train[valid_index], early_stopping_rounds, sample_weight
+            )
+            logging.info(f"Trained {model_name}: {training_stats}")
+
+            metric_artifact = self.get_metrics(y_test, model.predict_proba(x_test)[:, 1])
+            logging.info(f"Test metrics: {metric_artifact}")
+            if metric_artifact.roc_auc_score < self.model_config["expected_score"]:
+                raise Exception(f"Trained model roc_auc {metric_artifact.roc_auc_score:.4f} is below the expected score {self.model_config['expected_score']}")
+
+            transform = self.load_feature_transform()
+            loan_model = LoanModel(transform=transform, trained_model=model,
+                                   batch_size=self.model_trainer_config.prediction_batch_size)
+            save_object(self.model_trainer_config.trained_model_file_path, loan_model)
+            export_stats = self.export_compiled_model(model_name, model, transform, x_test)
+            with open(self.model_trainer_config.training_report_file_path, "w") as report_file:
+                json.dump({
+                    "model_name": model_name,
+                    "balancing": self.model_config.get("balancing", "undersample"),
+                    "n_jobs": n_jobs,
+                    "n_train_rows": int(len(train_index)),
+                    "n_valid_rows": int(len(valid_index)),
+                    **training_stats,
+                    "params": params,
+                    "search": None if search_result is None else {
+                        "trial_id": search_result["trial_id"], "score": search_result["score"],
+                        "results_file_path": self.model_trainer_config.search_results_file_path
+                    },
+                    "metrics": metric_artifact.__dict__,
+                    "compiled_model": export_stats,
+                }, report_file, indent=4)
+
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path=self.model_trainer_config.trained_model_file_path,
+                training_report_file_path=self.model_trainer_config.training_report_file_path,
+                metric_artifact=metric_artifact,
+                compiled_model_file_path=self.model_trainer_config.compiled_model_file_path,
+                feature_transform_file_path=self.model_trainer_config.feature_transform_file_path
+            )
+            logging.info(f"Model trainer artifact: {model_trainer_artifact}")
+            return model_trainer_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
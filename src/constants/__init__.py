@@ -5,12 +5,20 @@ from datetime import datetime
 DATABASE_NAME = "Loan_PayBack"
 COLLECTION_NAME = "loan_payback_data"
 MONGODB_URL_KEY = "MONGODB_URL"
+MONGODB_EXPORT_BATCH_SIZE: int = 10000
+MONGODB_EXPORT_CHUNK_SIZE: int = 50000
+MONGODB_PARTITION_KEY: str = "id"
 
 # Data Ingestion - Use the actual collection name that has data
 DATA_INGESTION_COLLECTION_NAME: str = "loan_payback_data"
 
 PIPELINE_NAME:str = ""
 ARTIFACTS_DIR: str = "artifacts"
+# Hand DataFrames/arrays between stages in memory and write the files on a background thread
+TRAINING_PIPELINE_IN_MEMORY: bool = False
+# Skip validation/transformation when their inputs, config and code are unchanged since an earlier run
+TRAINING_PIPELINE_STAGE_CACHE: bool = True
+STAGE_CACHE_DIR: str = os.path.join(ARTIFACTS_DIR, "stage_cache")
 
 MODEL_FILE_NAME = "model.pkl"
 
@@ -19,9 +27,13 @@ TARGET_COLUMN = "loan_paid_back"
 CURRENT_YEAR = datetime.now().year
 PREPOCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
-FILE_NAME: str = "loan_data.csv"
-TRAIN_FILE_NAME: str = "train.csv"
-TEST_FILE_NAME: str = "test.csv"
+# Format of the dataframe artifacts passed between stages: parquet, feather, arrow or csv
+DATA_ARTIFACT_FORMAT: str = "parquet"
+DATA_ARTIFACT_COMPRESSION: str = "zstd"
+
+FILE_NAME: str = f"loan_data.{DATA_ARTIFACT_FORMAT}"
+TRAIN_FILE_NAME: str = f"train.{DATA_ARTIFACT_FORMAT}"
+TEST_FILE_NAME: str = f"test.{DATA_ARTIFACT_FORMAT}"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 
 
@@ -36,6 +48,20 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATION: float = 0.25
+# "hash" assigns every row to train/test from a stable hash of DATA_INGESTION_SPLIT_KEY, "random" uses train_test_split
+DATA_INGESTION_SPLIT_MODE: str = "hash"
+DATA_INGESTION_SPLIT_KEY: str = "id"
+# stream MongoDB (or the local CSV) chunk by chunk straight into the feature store and train/test files
+DATA_INGESTION_CHUNKED: bool = False
+DATA_INGESTION_STREAM_EXPORT: bool = True
+DATA_INGESTION_EXPORT_PARTITIONS: int = 1
+DATA_INGESTION_EXPORT_WORKERS: int = 4
+DATA_INGESTION_INCREMENTAL: bool = False
+DATA_INGESTION_PERSISTENT_STORE_DIR: str = os.path.join(ARTIFACTS_DIR, "feature_store")
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.json"
+DATA_INGESTION_WATERMARK_COLUMN: str = "id"
+# check the collection (or the incremental batch) with server side statistics and reject it before exporting
+DATA_INGESTION_VALIDATE_BEFORE_EXPORT: bool = False
 
 """
 Data Validation realted contant start with DATA_VALIDATION VAR NAME
@@ -44,10 +70,113 @@ DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
 
 
+"""
+Data Drift related constant start with DATA_DRIFT VAR NAME
+"""
+DATA_DRIFT_DIR_NAME: str = "data_drift"
+DATA_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+DATA_DRIFT_PROFILE_FILE_NAME: str = "train_profile.json"
+# profile of the last training run, kept outside the run specific artifacts directory
+DATA_DRIFT_BASELINE_FILE_PATH: str = os.path.join(ARTIFACTS_DIR, "drift_baseline", "profile.json")
+DATA_DRIFT_PSI_THRESHOLD: float = 0.2
+DATA_DRIFT_KS_THRESHOLD: float = 0.1
+DATA_DRIFT_N_BINS: int = 10
+DATA_DRIFT_CHUNK_SIZE: int = 100_000
+
+
 """
 Data Transformation ralated constant start with DATA_TRANSFORMATION VAR NAME
 """
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
+# above this many training rows the outlier bounds are fitted on a random sample
+DATA_TRANSFORMATION_OUTLIER_MAX_FIT_ROWS: int = 1_000_000
+# transformed arrays are stored with fixed numeric dtypes so they can be memory mapped without pickle
+DATA_TRANSFORMATION_FEATURE_DTYPE: str = "float32"
+DATA_TRANSFORMATION_TARGET_DTYPE: str = "uint8"
+TRAIN_TARGET_FILE_NAME: str = "train_target.npy"
+TEST_TARGET_FILE_NAME: str = "test_target.npy"
+# stratified fold id of every transformed train row, stored as int8 next to the train array
+TRAIN_FOLDS_FILE_NAME: str = "train_folds.npy"
+DATA_TRANSFORMATION_N_FOLDS: int = 5
+DATA_TRANSFORMATION_FOLD_RANDOM_STATE: int = 42
+# class rebalancing is stored as a row index (per fold undersampling) and as per row weights, the full
+# train array is never resampled so strategies can be switched in config/model.yaml without re-running
+TRAIN_BALANCED_INDEX_FILE_NAME: str = "train_balanced_index.npy"
+TRAIN_SAMPLE_WEIGHT_FILE_NAME: str = "train_sample_weight.npy"
+# rows per chunk for the out-of-core transformation, 0 loads train/test fully into memory
+DATA_TRANSFORMATION_CHUNK_SIZE: int = 0
+QUANTILE_SKETCH_SIZE: int = 2048
+
+
+"""
+MODEL TRAINER related constant start with MODEL_TRAINER var name
+"""
+MODEL_TRAINER_DIR_NAME: str = "model_trainer"
+MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
+MODEL_TRAINER_TRAINED_MODEL_NAME: str = MODEL_FILE_NAME
+MODEL_TRAINER_REPORT_FILE_NAME: str = "report.yaml"
+MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
+MODEL_TRAINER_SEARCH_DIR: str = "search"
+MODEL_TRAINER_SEARCH_RESULTS_FILE_NAME: str = "trials.jsonl"
+# rows per batch of the saved LoanModel when scoring raw records
+MODEL_TRAINER_PREDICTION_BATCH_SIZE: int = 1024
+# the booster is also exported as numpy arrays (scored without any ML library) next to the feature transform,
+# the export has to match the native predictions on the first rows of the test set within the tolerance
+MODEL_TRAINER_COMPILED_MODEL_NAME: str = "model.npz"
+MODEL_TRAINER_FEATURE_TRANSFORM_NAME: str = "feature_transform.pkl"
+MODEL_TRAINER_EXPORT_CHECK_ROWS: int = 10_000
+MODEL_TRAINER_EXPORT_TOLERANCE: float = 1e-5
+
+
+"""
+MODEL EVALUATION related constant start with MODEL_EVALUATION var name
+"""
+MODEL_EVALUATION_DIR_NAME: str = "model_evaluation"
+MODEL_EVALUATION_REPORT_FILE_NAME: str = "report.yaml"
+# model currently serving predictions, the trained model is compared against it
+MODEL_EVALUATION_PRODUCTION_MODEL_FILE_PATH: str = os.path.join(ARTIFACTS_DIR, "production_model", MODEL_FILE_NAME)
+# the trained model is accepted when the lower confidence bound of its roc_auc gain exceeds this
+MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.0
+MODEL_EVALUATION_N_BOOTSTRAP: int = 200
+MODEL_EVALUATION_CONFIDENCE_LEVEL: float = 0.95
+MODEL_EVALUATION_N_WORKERS: int = 4
+MODEL_EVALUATION_RANDOM_STATE: int = 42
+MODEL_EVALUATION_CALIBRATION_BINS: int = 10
+# test rows scored per predict_proba call
+MODEL_EVALUATION_BATCH_SIZE: int = 1_000_000
+# resample weights per bootstrap task, replicates x rows, bounds the memory of every worker
+MODEL_EVALUATION_BOOTSTRAP_BLOCK_SIZE: int = 10_000_000
+
+
+"""
+MODEL PREDICTION related constant
+"""
+PREDICTION_MODEL_DIR: str = os.path.dirname(MODEL_EVALUATION_PRODUCTION_MODEL_FILE_PATH)
+
 
+"""
+MODEL PUSHER related constant start with MODEL_PUSHER var name
+"""
+# an accepted model is copied here, model evaluation compares the next trained model against it and the
+# prediction service loads its compiled booster and feature transform from it
+MODEL_PUSHER_PRODUCTION_MODEL_DIR: str = PREDICTION_MODEL_DIR
+
+
+"""
+APP related constant
+"""
+APP_HOST = "0.0.0.0"
+APP_PORT = 5000
+# concurrent /predict requests are scored together once MICRO_BATCH_MAX_SIZE records are queued or the first
+# of them has waited MICRO_BATCH_MAX_WAIT_MS, PREDICTION_WORKERS model calls run at once in a thread pool
+MICRO_BATCH_MAX_SIZE: int = 256
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+MICRO_BATCH_MAX_QUEUE_SIZE: int = 10_000
+PREDICTION_WORKERS: int = 2
+# records accepted by one /predict/batch request, scored MICRO_BATCH_MAX_SIZE at a time in the same worker slots
+PREDICTION_MAX_BATCH_RECORDS: int = 10_000
+# profile of the served records, compared with DATA_DRIFT_BASELINE_FILE_PATH, merged into the file every interval
+SERVING_PROFILE_FILE_PATH: str = os.path.join(ARTIFACTS_DIR, "serving_profile", "profile.json")
+SERVING_PROFILE_FLUSH_SECONDS: float = 60.0
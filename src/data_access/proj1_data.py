@@ -1,27 +1,180 @@
 import sys
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Iterator, Optional
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, SCHEMA_FILE_PATH, MONGODB_EXPORT_BATCH_SIZE, MONGODB_EXPORT_CHUNK_SIZE, MONGODB_PARTITION_KEY
 from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml_file, schema_dtypes, log_memory_report, cast_integer_values, cast_category_values
 
 class Proj1Data:
     """
     A class to export MongoDB records as a pandas DataFrame.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, mongo_client: Optional[MongoDBClient] = None) -> None:
         """
         Initializes the MongoDB client connection.
+
+        :param mongo_client: Optional already connected client (e.g. one wrapping a local mongod or
+                             mongomock for tests). Defaults to the shared MongoDBClient.
+        """
+        try:
+            self.mongo_client = mongo_client if mongo_client is not None else MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        """
+        Returns the collection from the default or specified database.
+        """
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def _schema_dtypes(self) -> dict:
+        """
+        Builds the column -> dtype mapping used to preallocate the export buffers from the schema 'dtypes'.
+        Columns without a declared dtype are stored as float64 when numerical, as object otherwise.
+        """
+        declared = schema_dtypes(self._schema_config)
+        numerical_columns = set(self._schema_config["numerical_columns"])
+        return {
+            column: declared.get(column, np.dtype("float64") if column in numerical_columns else np.dtype(object))
+            for column in self._schema_config["columns"]
+        }
+
+    def _schema_projection(self) -> dict:
+        """
+        Builds a projection from config/schema.yaml so only schema columns are fetched and '_id' never is.
+        """
+        projection = {column: 1 for column in self._schema_config["columns"]}
+        projection["_id"] = 0
+        return projection
+
+    @staticmethod
+    def _documents_to_arrays(documents: list, dtypes: dict) -> dict:
+        """
+        Converts a batch of documents into one typed numpy array per column.
+        """
+        arrays = {}
+        for column, dtype in dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                arrays[column] = cast_category_values([document.get(column) for document in documents], dtype, column)
+            elif dtype.kind == "f":
+                values = [document.get(column) for document in documents]
+                arrays[column] = np.array([np.nan if v is None or v == "na" else v for v in values], dtype=dtype)
+            elif dtype.kind in "iu":
+                arrays[column] = cast_integer_values([document.get(column) for document in documents], dtype, column)
+            else:
+                arrays[column] = np.array([document.get(column) for document in documents], dtype=dtype)
+        return arrays
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                               batch_size: int = MONGODB_EXPORT_BATCH_SIZE,
+                               chunk_size: int = MONGODB_EXPORT_CHUNK_SIZE,
+                               query: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a MongoDB collection as DataFrame chunks of at most chunk_size rows.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to export.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+        batch_size : int
+            Number of documents the cursor fetches per network round trip.
+        chunk_size : int
+            Number of rows per yielded DataFrame.
+        query : Optional[dict]
+            Filter applied on the server. Defaults to the whole collection.
+
+        Yields:
+        -------
+        pd.DataFrame
+            DataFrame chunk with the schema columns in schema order and pre-set dtypes.
         """
         try:
-            self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            collection = self._get_collection(collection_name, database_name)
+            dtypes = self._schema_dtypes()
+            cursor = collection.find(query or {}, self._schema_projection(), batch_size=batch_size)
+            try:
+                while True:
+                    documents = list(itertools.islice(cursor, chunk_size))
+                    if not documents:
+                        break
+                    yield pd.DataFrame(self._documents_to_arrays(documents, dtypes), copy=False)
+            finally:
+                cursor.close()
         except Exception as e:
             raise MyException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+    @staticmethod
+    def _allocate_buffers(dtypes: dict, capacity: int) -> dict:
+        """
+        Preallocates one column array of capacity rows per column, category columns are buffered as their integer codes.
+        """
+        return {
+            column: np.empty(capacity, dtype=pd.Categorical([], dtype=dtype).codes.dtype if isinstance(dtype, pd.CategoricalDtype) else dtype)
+            for column, dtype in dtypes.items()
+        }
+
+    @staticmethod
+    def _fill_buffers(columns: dict, dtypes: dict, chunk: pd.DataFrame, start: int) -> None:
+        """
+        Copies a chunk into rows [start, start + len(chunk)) of the column buffers.
+        """
+        end = start + len(chunk)
+        for column in columns:
+            values = chunk[column]
+            columns[column][start:end] = values.cat.codes.to_numpy() if isinstance(dtypes[column], pd.CategoricalDtype) else values.to_numpy()
+
+    @staticmethod
+    def _buffers_to_dataframe(columns: dict, dtypes: dict, rows) -> pd.DataFrame:
+        """
+        Wraps the selected rows (a slice or an index array) of the column buffers as a DataFrame.
+        """
+        return pd.DataFrame({
+            column: pd.Categorical.from_codes(array[rows], dtype=dtypes[column])
+            if isinstance(dtypes[column], pd.CategoricalDtype) else array[rows]
+            for column, array in columns.items()
+        }, copy=False)
+
+    def _export_collection_streaming(self, collection_name: str, database_name: Optional[str],
+                                     batch_size: int, chunk_size: int, query: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Streams the collection chunk by chunk into preallocated column arrays so peak memory
+        stays close to the size of the final DataFrame.
+        """
+        collection = self._get_collection(collection_name, database_name)
+        dtypes = self._schema_dtypes()
+        # a filtered export (e.g. an incremental delta) is usually far smaller than the collection
+        capacity = chunk_size if query else max(collection.estimated_document_count(), chunk_size)
+        columns = self._allocate_buffers(dtypes, capacity)
+
+        n_rows = 0
+        for chunk in self.iter_collection_chunks(collection_name, database_name, batch_size, chunk_size, query=query):
+            end = n_rows + len(chunk)
+            if end > capacity:
+                # the estimated count is only a hint, grow geometrically if documents were added meanwhile
+                capacity = max(end, int(capacity * 1.5))
+                columns = {column: np.resize(array, capacity) for column, array in columns.items()}
+            self._fill_buffers(columns, dtypes, chunk, n_rows)
+            n_rows = end
+
+        return self._buffers_to_dataframe(columns, dtypes, slice(0, n_rows))
+
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None,
+                                       stream: bool = False, batch_size: int = MONGODB_EXPORT_BATCH_SIZE,
+                                       chunk_size: int = MONGODB_EXPORT_CHUNK_SIZE,
+                                       query: Optional[dict] = None) -> pd.DataFrame:
         """
         Exports an entire MongoDB collection as a pandas DataFrame.
 
@@ -31,6 +184,15 @@ class Proj1Data:
             The name of the MongoDB collection to export.
         database_name : Optional[str]
             Name of the database (optional). Defaults to DATABASE_NAME.
+        stream : bool
+            If True, fetch the schema columns with a batched cursor into preallocated column arrays
+            instead of materializing every document as a dict first.
+        batch_size : int
+            Cursor batch size used in streaming mode.
+        chunk_size : int
+            Number of documents converted per step in streaming mode.
+        query : Optional[dict]
+            Filter applied on the server, e.g. to fetch only documents above a watermark.
 
         Returns:
         -------
@@ -38,20 +200,246 @@ class Proj1Data:
             DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
         """
         try:
-            # Access specified collection from the default or specified database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
-
             # Convert collection data to DataFrame and preprocess
             print("Fetching data from mongoDB")
-            df = pd.DataFrame(list(collection.find()))
+            if stream:
+                logging.info(f"Streaming export of collection [{collection_name}] with batch size {batch_size}")
+                df = self._export_collection_streaming(collection_name, database_name, batch_size, chunk_size, query)
+            else:
+                collection = self._get_collection(collection_name, database_name)
+                df = pd.DataFrame(list(collection.find(query or {})))
             print(f"Data fecthed with len: {len(df)}")
+            log_memory_report("mongodb_export", df)
             # if "id" in df.columns.to_list():
             #     df = df.drop(columns=["id"], axis=1)
             # df.replace({"na":np.nan},inplace=True)
             return df
 
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def compute_collection_statistics(self, collection_name: str, database_name: Optional[str] = None,
+                                      query: Optional[dict] = None) -> dict:
+        """
+        Computes validation statistics of the schema columns on the server with one $facet aggregation.
+
+        Numerical columns are summarized by a single $group (count, null/missing count, non numeric count,
+        fractional count, min, max, mean), every categorical column by a $group over its distinct values.
+        Only these summaries cross the network, no document is exported. Missing fields, nulls and the
+        'na' placeholder all count as null, like they become NaN in the exported DataFrame.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to summarize.
+        query : Optional[dict]
+            Filter applied on the server, e.g. the watermark query of an incremental batch.
+
+        Returns:
+        -------
+        dict
+            {"n_rows": ..., "columns": {column: statistics}} in the layout DataValidation.check_statistics expects.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            dtypes = self._schema_dtypes()
+            categorical_columns = [column for column, dtype in dtypes.items() if isinstance(dtype, pd.CategoricalDtype) or dtype == object]
+            numerical_columns = [column for column in dtypes if column not in categorical_columns]
+
+            def is_null(column):
+                return {"$in": [{"$ifNull": [f"${column}", None]}, [None, "na"]]}
+
+            def count_if(condition):
+                return {"$sum": {"$cond": [condition, 1, 0]}}
+
+            numeric_group = {"_id": None, "n_rows": {"$sum": 1}}
+            for i, column in enumerate(numerical_columns):
+                value = f"${column}"
+                number = {"$cond": [{"$isNumber": value}, value, None]}
+                numeric_group[f"null_{i}"] = count_if(is_null(column))
+                numeric_group[f"count_{i}"] = count_if({"$isNumber": value})
+                numeric_group[f"fractional_{i}"] = {"$sum": {"$cond": [
+                    {"$isNumber": value}, {"$cond": [{"$eq": [{"$mod": [value, 1]}, 0]}, 0, 1]}, 0
+                ]}}
+                numeric_group[f"min_{i}"] = {"$min": number}
+                numeric_group[f"max_{i}"] = {"$max": number}
+                numeric_group[f"mean_{i}"] = {"$avg": number}
+            facets = {"numeric": [{"$group": numeric_group}]}
+            for i, column in enumerate(categorical_columns):
+                facets[f"categorical_{i}"] = [{"$group": {"_id": f"${column}", "count": {"$sum": 1}}}]
+
+            result = next(collection.aggregate([{"$match": query or {}}, {"$facet": facets}], allowDiskUse=True))
+            numeric = result["numeric"][0] if result["numeric"] else {"n_rows": 0}
+            n_rows = numeric["n_rows"]
+
+            def as_float(value):
+                # ints and floats are reported alike, the way DataValidation.compute_statistics reports them
+                return None if value is None else float(value)
+
+            statistics = {}
+            for i, column in enumerate(numerical_columns):
+                count, null_count = numeric.get(f"count_{i}", 0), numeric.get(f"null_{i}", 0)
+                non_numeric = n_rows - count - null_count
+                statistics[column] = {
+                    # what the column would load as: object when any value is not a number
+                    "dtype": "object" if non_numeric else ("float64" if null_count or numeric.get(f"fractional_{i}") else "int64"),
+                    "count": count,
+                    "null_count": null_count,
+                    "min": as_float(numeric.get(f"min_{i}")),
+                    "max": as_float(numeric.get(f"max_{i}")),
+                    "mean": as_float(numeric.get(f"mean_{i}")),
+                    "is_integral": not numeric.get(f"fractional_{i}"),
+                }
+            for i, column in enumerate(categorical_columns):
+                groups = result[f"categorical_{i}"]
+                null_count = sum(group["count"] for group in groups if group["_id"] in (None, "na"))
+                categories = sorted(str(group["_id"]) for group in groups if group["_id"] not in (None, "na"))
+                statistics[column] = {
+                    "dtype": "object",
+                    "count": n_rows - null_count,
+                    "null_count": null_count,
+                    "categories": categories,
+                    "cardinality": len(categories),
+                }
+            logging.info(f"Computed server side statistics of [{collection_name}] over {n_rows} documents")
+            return {"n_rows": n_rows, "columns": statistics}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def compute_partition_queries(self, collection_name: str, n_partitions: int,
+                                  database_name: Optional[str] = None,
+                                  partition_key: str = MONGODB_PARTITION_KEY) -> list:
+        """
+        Splits the collection into contiguous key ranges of roughly equal size.
+
+        Boundaries come from a server side $bucketAuto over partition_key. Servers (or stand-ins such
+        as mongomock) without $bucketAuto fall back to splitting the [min, max] key range evenly.
+        Documents without the key are returned by an extra trailing partition so nothing is lost.
+
+        Returns:
+        -------
+        list
+            One MongoDB filter per partition, in ascending key order.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            boundaries = None
+            try:
+                buckets = list(collection.aggregate([
+                    {"$match": {partition_key: {"$ne": None}}},
+                    {"$bucketAuto": {"groupBy": f"${partition_key}", "buckets": n_partitions}}
+                ], allowDiskUse=True))
+                if buckets:
+                    boundaries = [bucket["_id"]["min"] for bucket in buckets] + [buckets[-1]["_id"]["max"]]
+            except Exception as e:
+                logging.warning(f"$bucketAuto not available ({e}), falling back to an even split of the key range")
+
+            if boundaries is None:
+                first = collection.find_one({partition_key: {"$ne": None}}, {partition_key: 1}, sort=[(partition_key, 1)])
+                last = collection.find_one({partition_key: {"$ne": None}}, {partition_key: 1}, sort=[(partition_key, -1)])
+                if first is None:
+                    return [{}]
+                low, high = first[partition_key], last[partition_key]
+                if isinstance(low, (int, float)) and isinstance(high, (int, float)) and high > low:
+                    boundaries = list(np.unique(np.linspace(low, high, n_partitions + 1)).tolist())
+                    if isinstance(low, int) and isinstance(high, int):
+                        boundaries = sorted(set(int(b) for b in boundaries))
+                else:
+                    boundaries = [low, high]
+
+            queries = []
+            for i, lower in enumerate(boundaries[:-1]):
+                upper = boundaries[i + 1]
+                upper_operator = "$lte" if i == len(boundaries) - 2 else "$lt"
+                queries.append({partition_key: {"$gte": lower, upper_operator: upper}})
+            if not queries:
+                queries.append({partition_key: boundaries[0]})
+            queries.append({partition_key: None})
+            return queries
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _export_partition(self, collection_name: str, database_name: Optional[str], query: dict,
+                          batch_size: int, chunk_size: int, columns: dict, dtypes: dict,
+                          offset: int, capacity: int) -> tuple:
+        """
+        Reads one key range into rows [offset, offset + capacity) of the shared column buffers.
+
+        Returns (rows written, overflow, stats). Rows beyond capacity (documents inserted after the
+        partition was counted) are returned as overflow DataFrame chunks instead of being dropped.
+        """
+        start = time.perf_counter()
+        written, overflow = 0, []
+        for chunk in self.iter_collection_chunks(collection_name, database_name, batch_size, chunk_size, query=query):
+            fits = min(len(chunk), capacity - written)
+            if fits:
+                self._fill_buffers(columns, dtypes, chunk.iloc[:fits], offset + written)
+                written += fits
+            if fits < len(chunk):
+                overflow.append(chunk.iloc[fits:])
+        elapsed = time.perf_counter() - start
+        rows = written + sum(len(chunk) for chunk in overflow)
+        return written, overflow, {"query": query, "rows": rows, "seconds": elapsed, "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0}
+
+    def export_collection_parallel(self, collection_name: str, n_partitions: int, max_workers: int,
+                                   database_name: Optional[str] = None,
+                                   partition_key: str = MONGODB_PARTITION_KEY,
+                                   batch_size: int = MONGODB_EXPORT_BATCH_SIZE,
+                                   chunk_size: int = MONGODB_EXPORT_CHUNK_SIZE) -> pd.DataFrame:
+        """
+        Exports a collection by reading key range partitions concurrently.
+
+        All worker threads share the pooled MongoClient of this instance, so each partition uses its
+        own connection from the pool. Every partition is counted first, the final column arrays are
+        preallocated once and each worker fills the slice of its partition, so the result is in
+        ascending key order whichever partition finishes first and no intermediate DataFrame is
+        concatenated. Only when the collection changed between counting and reading are the partitions
+        stitched together from their slices and overflow rows.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to export.
+        n_partitions : int
+            Number of key ranges to split the collection into.
+        max_workers : int
+            Number of partitions read at the same time.
+        partition_key : str
+            Field used to range partition the collection.
+
+        Returns:
+        -------
+        pd.DataFrame
+            DataFrame with the schema columns of every document in the collection.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            dtypes = self._schema_dtypes()
+            queries = self.compute_partition_queries(collection_name, n_partitions, database_name, partition_key)
+            logging.info(f"Exporting collection [{collection_name}] in {len(queries)} partitions with {max_workers} workers")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                counts = list(executor.map(collection.count_documents, queries))
+                offsets = np.concatenate(([0], np.cumsum(counts))).tolist()
+                columns = self._allocate_buffers(dtypes, offsets[-1])
+                results = list(executor.map(
+                    lambda i: self._export_partition(collection_name, database_name, queries[i], batch_size, chunk_size,
+                                                     columns, dtypes, offsets[i], counts[i]),
+                    range(len(queries))
+                ))
+
+            self.partition_stats = [stats for _, _, stats in results]
+            for i, stats in enumerate(self.partition_stats):
+                logging.info(f"Partition {i} {stats['query']}: {stats['rows']} rows in {stats['seconds']:.2f}s "
+                             f"({stats['rows_per_sec']:.0f} rows/sec)")
+
+            if all(written == count and not overflow for (written, overflow, _), count in zip(results, counts)):
+                return self._buffers_to_dataframe(columns, dtypes, slice(None))
+
+            logging.warning(f"Collection [{collection_name}] changed during the export, stitching the partitions")
+            frames = []
+            for (written, overflow, _), offset in zip(results, offsets):
+                frames.append(self._buffers_to_dataframe(columns, dtypes, slice(offset, offset + written)))
+                frames.extend(overflow)
+            return pd.concat(frames, ignore_index=True)
+        except Exception as e:
+            raise MyException(e, sys)
@@ -1,14 +1,24 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from  src.constants import *
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Optional
+
+def in_memory_field() -> Any:
+    """
+    Optional live object carried next to a file path when the pipeline runs in in-memory mode.
+    Excluded from repr and comparisons, the file path stays the source of truth.
+    """
+    return field(default=None, repr=False, compare=False, metadata={"in_memory": True})
 
 
 @dataclass
 class DataIngestionArtifact:
     trained_file_path: str
     test_file_path: str
+    train_df: Optional[Any] = in_memory_field()
+    test_df: Optional[Any] = in_memory_field()
 
 @dataclass
 class DataValidationArtifact:
@@ -16,8 +26,57 @@ class DataValidationArtifact:
     message: str
     validation_report_file_path: str
 
+@dataclass
+class DataDriftArtifact:
+    drift_detected: bool
+    drift_report_file_path: str
+    train_profile_file_path: str
+
 @dataclass
 class DataTransformationArtifact:
     transformed_train_file_path: str
     transformed_test_file_path: str
-    transformed_object_file_path: str
\ No newline at end of file
+    transformed_object_file_path: str
+    transformed_train_target_file_path: str
+    transformed_test_target_file_path: str
+    transformed_train_folds_file_path: str
+    transformed_train_balanced_index_file_path: str
+    transformed_train_sample_weight_file_path: str
+    train_arr: Optional[Any] = in_memory_field()
+    test_arr: Optional[Any] = in_memory_field()
+    train_target: Optional[Any] = in_memory_field()
+    test_target: Optional[Any] = in_memory_field()
+    train_folds: Optional[Any] = in_memory_field()
+    train_balanced_index: Optional[Any] = in_memory_field()
+    train_sample_weight: Optional[Any] = in_memory_field()
+    transformed_object: Optional[Any] = in_memory_field()
+
+@dataclass
+class ClassificationMetricArtifact:
+    roc_auc_score: float
+    f1_score: float
+    precision_score: float
+    recall_score: float
+
+@dataclass
+class ModelTrainerArtifact:
+    trained_model_file_path: str
+    training_report_file_path: str
+    metric_artifact: ClassificationMetricArtifact
+    compiled_model_file_path: Optional[str] = None
+    feature_transform_file_path: Optional[str] = None
+
+@dataclass
+class ModelEvaluationArtifact:
+    is_model_accepted: bool
+    changed_accuracy: float
+    trained_model_path: str
+    production_model_path: Optional[str]
+    evaluation_report_file_path: str
+
+@dataclass
+class ModelPusherArtifact:
+    production_model_file_path: str
+    compiled_model_file_path: str
+    feature_transform_file_path: str
+    baseline_profile_file_path: Optional[str] = None
@@ -10,6 +10,8 @@ class TrainingPipelineConfig:
     pipeline_name: str = PIPELINE_NAME
     artifacts_dir: str = os.path.join(ARTIFACTS_DIR, TIMESTAMP)
     timestamp: str = TIMESTAMP
+    in_memory: bool = TRAINING_PIPELINE_IN_MEMORY
+    stage_cache: bool = TRAINING_PIPELINE_STAGE_CACHE
 
 training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
 
@@ -19,16 +21,90 @@ class DataIngestionConfig:
     training_file_path: str = os.path.join(data_ingestiom_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)
     testing_file_path: str = os.path.join(data_ingestiom_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATION
+    split_mode: str = DATA_INGESTION_SPLIT_MODE
+    split_key: str = DATA_INGESTION_SPLIT_KEY
+    chunked: bool = DATA_INGESTION_CHUNKED
+    chunk_size: int = MONGODB_EXPORT_CHUNK_SIZE
     collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    stream_export: bool = DATA_INGESTION_STREAM_EXPORT
+    export_batch_size: int = MONGODB_EXPORT_BATCH_SIZE
+    export_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS
+    export_workers: int = DATA_INGESTION_EXPORT_WORKERS
+    incremental: bool = DATA_INGESTION_INCREMENTAL
+    persistent_feature_store_file_path: str = os.path.join(DATA_INGESTION_PERSISTENT_STORE_DIR, FILE_NAME)
+    watermark_file_path: str = os.path.join(DATA_INGESTION_PERSISTENT_STORE_DIR, DATA_INGESTION_WATERMARK_FILE_NAME)
+    watermark_column: str = DATA_INGESTION_WATERMARK_COLUMN
+    validate_before_export: bool = DATA_INGESTION_VALIDATE_BEFORE_EXPORT
 
 @dataclass
 class DataValidationConfig:
     data_validationConfig: str = os.path.join(training_pipeline_config.artifacts_dir,DATA_VALIDATION_DIR_NAME)
     validation_report_file_path: str = os.path.join(data_validationConfig, DATA_VALIDATION_REPORT_FILE_NAME)
 
+@dataclass
+class DataDriftConfig:
+    data_drift_dir: str = os.path.join(training_pipeline_config.artifacts_dir, DATA_DRIFT_DIR_NAME)
+    drift_report_file_path: str = os.path.join(data_drift_dir, DATA_DRIFT_REPORT_FILE_NAME)
+    train_profile_file_path: str = os.path.join(data_drift_dir, DATA_DRIFT_PROFILE_FILE_NAME)
+    baseline_profile_file_path: str = DATA_DRIFT_BASELINE_FILE_PATH
+    psi_threshold: float = DATA_DRIFT_PSI_THRESHOLD
+    ks_threshold: float = DATA_DRIFT_KS_THRESHOLD
+    chunk_size: int = DATA_DRIFT_CHUNK_SIZE
+    sketch_size: int = QUANTILE_SKETCH_SIZE
+
 @dataclass
 class DataTransformationConfig:
     data_transformation_dir: str = os.path.join(training_pipeline_config.artifacts_dir, DATA_TRANSFORMATION_DIR_NAME)
-    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_FILE_NAME.replace("csv", "npy"))
-    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_FILE_NAME.replace("csv", "npy"))
-    transformed_object_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, PREPOCESSING_OBJECT_FILE_NAME)
\ No newline at end of file
+    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, os.path.splitext(TRAIN_FILE_NAME)[0] + ".npy")
+    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, os.path.splitext(TEST_FILE_NAME)[0] + ".npy")
+    transformed_train_target_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_TARGET_FILE_NAME)
+    transformed_test_target_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_TARGET_FILE_NAME)
+    transformed_train_folds_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_FOLDS_FILE_NAME)
+    transformed_train_balanced_index_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_BALANCED_INDEX_FILE_NAME)
+    transformed_train_sample_weight_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_SAMPLE_WEIGHT_FILE_NAME)
+    transformed_object_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, PREPOCESSING_OBJECT_FILE_NAME)
+    chunk_size: int = DATA_TRANSFORMATION_CHUNK_SIZE
+    n_folds: int = DATA_TRANSFORMATION_N_FOLDS
+    fold_random_state: int = DATA_TRANSFORMATION_FOLD_RANDOM_STATE
+
+@dataclass
+class ModelTrainerConfig:
+    model_trainer_dir: str = os.path.join(training_pipeline_config.artifacts_dir, MODEL_TRAINER_DIR_NAME)
+    trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_TRAINED_MODEL_NAME)
+    training_report_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_REPORT_FILE_NAME)
+    model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+    search_dir: str = os.path.join(model_trainer_dir, MODEL_TRAINER_SEARCH_DIR)
+    search_results_file_path: str = os.path.join(search_dir, MODEL_TRAINER_SEARCH_RESULTS_FILE_NAME)
+    prediction_batch_size: int = MODEL_TRAINER_PREDICTION_BATCH_SIZE
+    compiled_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_COMPILED_MODEL_NAME)
+    feature_transform_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_FEATURE_TRANSFORM_NAME)
+    export_check_rows: int = MODEL_TRAINER_EXPORT_CHECK_ROWS
+    export_tolerance: float = MODEL_TRAINER_EXPORT_TOLERANCE
+
+@dataclass
+class ModelEvaluationConfig:
+    model_evaluation_dir: str = os.path.join(training_pipeline_config.artifacts_dir, MODEL_EVALUATION_DIR_NAME)
+    evaluation_report_file_path: str = os.path.join(model_evaluation_dir, MODEL_EVALUATION_REPORT_FILE_NAME)
+    production_model_file_path: str = MODEL_EVALUATION_PRODUCTION_MODEL_FILE_PATH
+    changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
+    n_bootstrap: int = MODEL_EVALUATION_N_BOOTSTRAP
+    confidence_level: float = MODEL_EVALUATION_CONFIDENCE_LEVEL
+    n_workers: int = MODEL_EVALUATION_N_WORKERS
+    random_state: int = MODEL_EVALUATION_RANDOM_STATE
+    calibration_bins: int = MODEL_EVALUATION_CALIBRATION_BINS
+    batch_size: int = MODEL_EVALUATION_BATCH_SIZE
+    bootstrap_block_size: int = MODEL_EVALUATION_BOOTSTRAP_BLOCK_SIZE
+
+@dataclass
+class ModelPusherConfig:
+    production_model_dir: str = MODEL_PUSHER_PRODUCTION_MODEL_DIR
+    production_model_file_path: str = os.path.join(MODEL_PUSHER_PRODUCTION_MODEL_DIR, MODEL_FILE_NAME)
+    compiled_model_file_path: str = os.path.join(MODEL_PUSHER_PRODUCTION_MODEL_DIR, MODEL_TRAINER_COMPILED_MODEL_NAME)
+    feature_transform_file_path: str = os.path.join(MODEL_PUSHER_PRODUCTION_MODEL_DIR, MODEL_TRAINER_FEATURE_TRANSFORM_NAME)
+    baseline_profile_file_path: str = DATA_DRIFT_BASELINE_FILE_PATH
+
+@dataclass
+class LoanPredictorConfig:
+    compiled_model_file_path: str = os.path.join(PREDICTION_MODEL_DIR, MODEL_TRAINER_COMPILED_MODEL_NAME)
+    feature_transform_file_path: str = os.path.join(PREDICTION_MODEL_DIR, MODEL_TRAINER_FEATURE_TRANSFORM_NAME)
+    batch_size: int = MODEL_TRAINER_PREDICTION_BATCH_SIZE
@@ -1 +1,139 @@
- 
\ No newline at end of file
+import sys
+import threading
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.entity.transformers import CompiledFeatureTransform
+
+
+class LoanModel:
+    """
+    Fitted feature transform and trained booster bundled into one object for scoring raw applicant records.
+
+    Inputs (one record dict, a list of dicts or a DataFrame with the raw columns) are scored batch_size rows
+    at a time. Every thread gets its own preallocated float64 transform buffer and float32 model input buffer
+    (the dtype the booster was trained on), so concurrent calls neither share nor reallocate them per request.
+    """
+    def __init__(self, transform: CompiledFeatureTransform, trained_model: object, batch_size: int = 1024,
+                 threshold: float = 0.5, model_dtype: str = "float32"):
+        """
+        :param transform: compiled feature transform of the data transformation stage
+        :param trained_model: fitted classifier with predict_proba on the transformed feature matrix
+        :param batch_size: rows per transform / predict_proba call
+        :param threshold: positive class probability from which predict returns 1
+        :param model_dtype: dtype of the arrays the model was trained on
+        """
+        self.transform = transform
+        self.trained_model = trained_model
+        self.batch_size = batch_size
+        self.threshold = threshold
+        self.model_dtype = np.dtype(model_dtype)
+        self._local = threading.local()
+
+    def __getstate__(self) -> dict:
+        # the per thread buffers are not picklable and are rebuilt lazily after loading
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _buffers(self) -> tuple:
+        """
+        Returns the (transform, model input) buffers of the calling thread, allocated on its first call
+        """
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            shape = (self.batch_size, len(self.transform.feature_columns))
+            buffers = (np.empty(shape, dtype=np.float64), np.empty(shape, dtype=self.model_dtype))
+            self._local.buffers = buffers
+        return buffers
+
+    def _batches(self, data):
+        """
+        Yields (start, raw batch) of at most batch_size rows in the form CompiledFeatureTransform accepts
+        """
+        if isinstance(data, dict):
+            data = [data]
+        # a DataFrame can only be passed in when pandas was imported, serving with dicts never imports it
+        pandas = sys.modules.get("pandas")
+        if pandas is not None and isinstance(data, pandas.DataFrame):
+            data = data[self.transform.raw_columns].to_numpy(dtype=object)
+        for start in range(0, len(data), self.batch_size):
+            yield start, data[start:start + self.batch_size]
+
+    def predict_proba(self, data) -> np.ndarray:
+        """
+        Class probabilities (n_rows x 2) of a record dict, a list of record dicts or a DataFrame
+        """
+        try:
+            n_rows = 1 if isinstance(data, dict) else len(data)
+            probabilities = np.empty((n_rows, 2), dtype=np.float64)
+            features, model_input = self._buffers()
+            for start, batch in self._batches(data):
+                n = len(batch)
+                self.transform.transform(batch, out=features)
+                np.copyto(model_input[:n], features[:n], casting="same_kind")
+                probabilities[start:start + n] = self.trained_model.predict_proba(model_input[:n])
+            return probabilities
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict(self, data) -> np.ndarray:
+        """
+        Predicted label (1 = loan paid back) of a record dict, a list of record dicts or a DataFrame
+        """
+        return (self.predict_proba(data)[:, 1] >= self.threshold).astype(np.uint8)
+
+    def sample_record(self) -> dict:
+        """
+        A valid raw record: numeric fields in the middle of their clipping bounds, categoricals at their first category
+        """
+        transform = self.transform
+        record = {}
+        for column in transform.raw_columns:
+            if column in transform.clip_columns:
+                i = transform.clip_columns.index(column)
+                record[column] = float((transform.lower[i] + transform.upper[i]) / 2)
+            elif column in transform.code_tables:
+                record[column] = next(iter(transform.code_tables[column]), None)
+            else:
+                record[column] = 0
+        return record
+
+    def warm_up(self) -> "LoanModel":
+        """
+        Score a single record and a full batch so the calling thread's buffers, the lookup tables and the
+        booster's lazily built predictor exist before the first real request
+        """
+        try:
+            record = self.sample_record()
+            self.predict_proba(record)
+            self.predict_proba([record] * self.batch_size)
+            logging.info(f"Warmed up LoanModel with batches of {self.batch_size} rows")
+            return self
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def warm_up_threads(self, executor, n_threads: int, timeout: float = 60.0) -> "LoanModel":
+        """
+        Run warm_up once on each of the n_threads threads of executor, the buffers are per thread so warming up
+        the loading thread alone leaves the other workers to allocate theirs on a real request. The jobs wait on
+        a barrier until all of them run, so no thread can pick up a second one. Must not be called from a thread
+        of executor itself
+        """
+        try:
+            barrier = threading.Barrier(n_threads, timeout=timeout)
+
+            def warm_up_thread():
+                barrier.wait()
+                self.warm_up()
+
+            for future in [executor.submit(warm_up_thread) for _ in range(n_threads)]:
+                future.result()
+            return self
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -0,0 +1,199 @@
+import sys
+import numpy as np
+from typing import TYPE_CHECKING
+
+# only type hints use pandas, unpickling a CompiledFeatureTransform for serving does not import it
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.exception import MyException
+
+
+class OutlierClipper:
+    """
+    IQR based outlier clipper fitted on the training data.
+
+    The lower/upper bounds of all columns are stored as numpy arrays so the same clipping can be
+    applied to test data and at inference time with a single np.clip call.
+    """
+    def __init__(self, columns: list, iqr_multiplier: float = 1.5, max_fit_rows: int = None, random_state: int = 42):
+        """
+        :param columns: numerical columns to clip
+        :param iqr_multiplier: bounds are Q1 - k * IQR and Q3 + k * IQR
+        :param max_fit_rows: fit the quartiles on a random sample of this many rows when the data is larger
+        :param random_state: seed of the sample
+        """
+        self.columns = list(columns)
+        self.iqr_multiplier = iqr_multiplier
+        self.max_fit_rows = max_fit_rows
+        self.random_state = random_state
+        self.lower_ = None
+        self.upper_ = None
+
+    def fit(self, df: "pd.DataFrame") -> "OutlierClipper":
+        """
+        Compute the clipping bounds of every column in one vectorized quantile pass
+        """
+        try:
+            data = df[self.columns]
+            if self.max_fit_rows is not None and len(data) > self.max_fit_rows:
+                data = data.sample(n=self.max_fit_rows, random_state=self.random_state)
+            q1, q3 = data.quantile([0.25, 0.75]).to_numpy(dtype=np.float64)
+            iqr = q3 - q1
+            self.lower_ = q1 - self.iqr_multiplier * iqr
+            self.upper_ = q3 + self.iqr_multiplier * iqr
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def set_bounds(self, lower: np.ndarray, upper: np.ndarray) -> "OutlierClipper":
+        """
+        Use bounds computed elsewhere (e.g. from streaming quantile sketches)
+        """
+        self.lower_ = np.asarray(lower, dtype=np.float64)
+        self.upper_ = np.asarray(upper, dtype=np.float64)
+        return self
+
+    def clip_array(self, values: np.ndarray) -> np.ndarray:
+        """
+        Clip a 2-D block whose columns are in the order of self.columns
+        """
+        return np.clip(values, self.lower_, self.upper_)
+
+    def transform(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        """
+        Return a new frame with the fitted columns clipped, the input frame is left untouched
+        """
+        try:
+            if self.lower_ is None:
+                raise ValueError("OutlierClipper is not fitted yet")
+            clipped = self.clip_array(df[self.columns].to_numpy(dtype=np.float64))
+            return df.assign(**{column: clipped[:, i] for i, column in enumerate(self.columns)})
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+class CompiledFeatureTransform:
+    """
+    Pure numpy version of the training feature pipeline for low latency scoring.
+
+    Maps raw applicant fields (a dict, a list of dicts or a 2-D array with the columns in
+    raw_columns order) to the scaled model input matrix: outlier clipping, ratio/risk features,
+    categorical lookups and standard scaling are folded into precomputed arrays and tables,
+    no pandas or sklearn is touched at call time.
+    """
+    def __init__(self, raw_columns: list, feature_columns: list, clip_columns: list, lower: np.ndarray,
+                 upper: np.ndarray, categories: dict, employment_mapping: dict, education_mapping: dict,
+                 mean: np.ndarray, scale: np.ndarray, input_dtypes: dict = None):
+        """
+        :param raw_columns: raw input fields in the order expected for 2-D array input
+        :param feature_columns: model input columns in output order
+        :param clip_columns: numerical columns clipped with lower/upper
+        :param categories: fitted categories per categorical column (raw columns plus the derived grade),
+                           values outside them are treated as missing like the category dtype does
+        :param employment_mapping: employment_status -> employment_stability
+        :param education_mapping: education_level -> education_num
+        :param mean: scaler mean per feature column
+        :param scale: scaler scale per feature column
+        :param input_dtypes: physical dtype the training data stored each numeric raw column in, inputs are
+                             rounded through it so serving sees exactly the values training saw
+        """
+        try:
+            self.raw_columns = list(raw_columns)
+            self.feature_columns = list(feature_columns)
+            self.clip_columns = list(clip_columns)
+            self.lower = np.asarray(lower, dtype=np.float64)
+            self.upper = np.asarray(upper, dtype=np.float64)
+            self.mean = np.asarray(mean, dtype=np.float64)
+            self.scale = np.asarray(scale, dtype=np.float64)
+            self.input_dtypes = {column: np.dtype(dtype) for column, dtype in (input_dtypes or {}).items()}
+            self._raw_index = {column: i for i, column in enumerate(self.raw_columns)}
+            self._feature_index = {column: i for i, column in enumerate(self.feature_columns)}
+
+            # value -> ordinal code tables, unknown values encode to -1 like OrdinalEncoder(unknown_value=-1)
+            self.code_tables = {
+                column: {value: float(code) for code, value in enumerate(values)}
+                for column, values in categories.items()
+            }
+            self.employment_table = {c: float(employment_mapping.get(c, np.nan)) for c in categories["employment_status"]}
+            self.education_table = {c: float(education_mapping.get(c, np.nan)) for c in categories["education_level"]}
+            grade_table = self.code_tables["grade"]
+            self.grade_subgrade_table = {
+                value: (grade_table.get(value[0], -1.0), float(value[1])) for value in categories["grade_subgrade"]
+            }
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _as_columns(self, records) -> tuple:
+        """
+        Returns (n_rows, column getter) for dict, list of dicts or 2-D array input
+        """
+        if isinstance(records, dict):
+            records = [records]
+        if isinstance(records, (list, tuple)) and records and isinstance(records[0], dict):
+            return len(records), lambda column: [record.get(column) for record in records]
+        array = np.asarray(records, dtype=object)
+        if array.ndim == 1:
+            array = array.reshape(1, -1)
+        return array.shape[0], lambda column: array[:, self._raw_index[column]]
+
+    def _numeric(self, values, name: str) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        dtype = self.input_dtypes.get(name)
+        if dtype is not None and dtype.kind == "f":
+            values = values.astype(dtype).astype(np.float64)
+        return values
+
+    @staticmethod
+    def _lookup(values, table: dict, default: float, n: int) -> np.ndarray:
+        return np.fromiter((table.get(value, default) for value in values), dtype=np.float64, count=n)
+
+    def transform(self, records, out: np.ndarray = None) -> np.ndarray:
+        """
+        Return the scaled model input matrix (n_rows x len(feature_columns)) for the raw records
+        out: optional preallocated float64 array with at least n_rows rows, the result is written to its first
+             n_rows rows instead of a new array
+        """
+        try:
+            n, column = self._as_columns(records)
+            numeric = np.empty((n, len(self.clip_columns)), dtype=np.float64)
+            for i, name in enumerate(self.clip_columns):
+                numeric[:, i] = self._numeric(column(name), name)
+            numeric = np.clip(numeric, self.lower, self.upper)
+            values = {name: numeric[:, i] for i, name in enumerate(self.clip_columns)}
+
+            annual_income = values["annual_income"]
+            loan_amount = values["loan_amount"]
+            interest_rate = values["interest_rate"]
+            values["income_to_loan_ratio"] = annual_income / loan_amount
+            values["affordability_ratio"] = (annual_income / 12) / (loan_amount * interest_rate / 1200)
+            values["risk_score"] = (
+                values["debt_to_income_ratio"] * 0.3 +
+                (800 - values["credit_score"]) / 800 * 0.3 +
+                interest_rate / 25 * 0.2 +
+                (loan_amount / annual_income) * 0.2
+            )
+
+            grade_subgrade = np.array(
+                [self.grade_subgrade_table.get(value, (-1.0, np.nan)) for value in column("grade_subgrade")],
+                dtype=np.float64
+            ).reshape(n, 2)
+            values["grade"] = grade_subgrade[:, 0]
+            values["subgrade_num"] = grade_subgrade[:, 1]
+            values["employment_stability"] = self._lookup(column("employment_status"), self.employment_table, np.nan, n)
+            values["education_num"] = self._lookup(column("education_level"), self.education_table, np.nan, n)
+            for name in ("gender", "marital_status", "loan_purpose"):
+                values[name] = self._lookup(column(name), self.code_tables[name], -1.0, n)
+            if "id" in self._feature_index:
+                values["id"] = self._numeric(column("id"), "id")
+
+            features = np.empty((n, len(self.feature_columns)), dtype=np.float64) if out is None else out[:n]
+            for name, i in self._feature_index.items():
+                features[:, i] = values[name]
+            features -= self.mean
+            features /= self.scale
+            return features
+        except Exception as e:
+            raise MyException(e, sys)
+
+    __call__ = transform
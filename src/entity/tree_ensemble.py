@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+from src.exception import MyException
+
+# how a node treats missing values: NONE replaces NaN by 0 before comparing (LightGBM missing_type None),
+# NAN sends NaN to the default child, ZERO sends NaN and 0 to the default child (LightGBM missing_type Zero)
+MISSING_NONE, MISSING_NAN, MISSING_ZERO = 0, 1, 2
+LIGHTGBM_MISSING_TYPES = {"None": MISSING_NONE, "NaN": MISSING_NAN, "Zero": MISSING_ZERO}
+FORMAT_VERSION = 1
+
+
+class TreeEnsemble:
+    """
+    Boosted binary classifier stored as flat numpy arrays and evaluated with numpy only.
+
+    Every node of every tree is one position of the node arrays: split feature, threshold, left/right child,
+    default direction and missing value handling, leaf value. A row goes left when its value is <= the
+    threshold. Leaves point to themselves, so a batch is scored by moving all (row, tree) pairs down one level
+    per step for max_depth steps with no branching per tree. The probability is the sigmoid of base_score plus
+    the sum of the reached leaf values, library specific scaling is folded into the leaves at export.
+    """
+    ARRAY_FIELDS = ("feature", "threshold", "left", "right", "default_left", "missing_type", "value", "roots")
+    # (row, tree) pairs moved through the trees at once, bounds the temporaries of one step
+    MAX_BATCH_PAIRS = 4_000_000
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, missing_type: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 base_score: float, max_depth: int, n_features: int, input_dtype: str = "float32"):
+        """
+        :param roots: node position of the root of every tree
+        :param base_score: raw score (log odds) added to the sum of the leaves
+        :param max_depth: depth of the deepest tree
+        :param n_features: number of input columns
+        :param input_dtype: dtype the native model compares its inputs in, rows are cast to it before scoring
+        """
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing_type = np.asarray(missing_type, dtype=np.int8)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.input_dtype = np.dtype(input_dtype)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def decision_function(self, x) -> np.ndarray:
+        """
+        Raw score (log odds) of every row of the 2-D feature matrix x
+        """
+        try:
+            x = np.asarray(x, dtype=self.input_dtype)
+            if x.ndim == 1:
+                x = x.reshape(1, -1)
+            if x.shape[1] != self.n_features:
+                raise ValueError(f"Expected {self.n_features} features, got {x.shape[1]}")
+            scores = np.empty(len(x), dtype=np.float64)
+            rows_per_batch = max(1, self.MAX_BATCH_PAIRS // max(1, self.n_trees))
+            for start in range(0, len(x), rows_per_batch):
+                batch = x[start:start + rows_per_batch]
+                rows = np.arange(len(batch))[:, None]
+                node = np.tile(self.roots, (len(batch), 1))
+                for _ in range(self.max_depth):
+                    values = batch[rows, self.feature[node]].astype(np.float64)
+                    missing_type = self.missing_type[node]
+                    is_nan = np.isnan(values)
+                    values[is_nan & (missing_type == MISSING_NONE)] = 0.0
+                    missing = (is_nan & (missing_type != MISSING_NONE)) | ((missing_type == MISSING_ZERO) & (values == 0.0))
+                    go_left = np.where(missing, self.default_left[node], values <= self.threshold[node])
+                    node = np.where(go_left, self.left[node], self.right[node])
+                scores[start:start + len(batch)] = self.value[node].sum(axis=1)
+            return scores + self.base_score
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_proba(self, x) -> np.ndarray:
+        """
+        Class probabilities (n_rows x 2) like the predict_proba of the native classifier
+        """
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(x)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, x, threshold: float = 0.5) -> np.ndarray:
+        return (self.predict_proba(x)[:, 1] >= threshold).astype(np.uint8)
+
+    def save(self, file_path: str) -> None:
+        """
+        Write the ensemble to a .npz file, no pickle is involved
+        """
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            np.savez_compressed(
+                file_path, **{name: getattr(self, name) for name in self.ARRAY_FIELDS},
+                base_score=self.base_score, max_depth=self.max_depth, n_features=self.n_features,
+                input_dtype=self.input_dtype.str, format_version=FORMAT_VERSION
+            )
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @classmethod
+    def load(cls, file_path: str) -> "TreeEnsemble":
+        try:
+            with np.load(file_path, allow_pickle=False) as data:
+                if int(data["format_version"]) != FORMAT_VERSION:
+                    raise ValueError(f"Unsupported tree ensemble format version {int(data['format_version'])} in {file_path}")
+                return cls(
+                    **{name: data[name] for name in cls.ARRAY_FIELDS},
+                    base_score=float(data["base_score"]), max_depth=int(data["max_depth"]),
+                    n_features=int(data["n_features"]), input_dtype=str(data["input_dtype"])
+                )
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+class _TreeBuilder:
+    """
+    Collects the nodes of several trees into the flat arrays of a TreeEnsemble
+    """
+    def __init__(self):
+        self.nodes = {name: [] for name in ("feature", "threshold", "left", "right", "default_left", "missing_type", "value")}
+        self.roots = []
+        self.max_depth = 0
+
+    def add_node(self) -> int:
+        position = len(self.nodes["feature"])
+        for name, default in (("feature", 0), ("threshold", 0.0), ("left", position), ("right", position),
+                              ("default_left", True), ("missing_type", MISSING_NAN), ("value", 0.0)):
+            self.nodes[name].append(default)
+        return position
+
+    def set_split(self, position: int, feature: int, threshold: float, left: int, right: int, default_left: bool,
+                  missing_type: int) -> None:
+        for name, value in (("feature", feature), ("threshold", threshold), ("left", left), ("right", right),
+                            ("default_left", default_left), ("missing_type", missing_type)):
+            self.nodes[name][position] = value
+
+    def set_leaf(self, position: int, value: float) -> None:
+        self.nodes["value"][position] = value
+
+    def build(self, base_score: float, n_features: int) -> TreeEnsemble:
+        return TreeEnsemble(**self.nodes, roots=self.roots, base_score=base_score, max_depth=self.max_depth,
+                            n_features=n_features)
+
+
+def from_lightgbm(model) -> TreeEnsemble:
+    """
+    Convert a fitted LGBMClassifier (binary objective, numerical splits) using the iterations its predict uses
+    """
+    try:
+        dump = model.booster_.dump_model()
+        objective = dump["objective"].split()
+        if objective[0] != "binary":
+            raise ValueError(f"Only the binary objective can be exported, got [{dump['objective']}]")
+        sigmoid = float(next((part.split(":")[1] for part in objective if part.startswith("sigmoid:")), 1.0))
+        builder = _TreeBuilder()
+
+        def add(node: dict, depth: int) -> int:
+            position = builder.add_node()
+            builder.max_depth = max(builder.max_depth, depth)
+            if "leaf_value" in node:
+                builder.set_leaf(position, sigmoid * node["leaf_value"])
+                return position
+            if node["decision_type"] != "<=":
+                raise ValueError(f"Categorical split [{node['decision_type']}] cannot be exported")
+            left, right = add(node["left_child"], depth + 1), add(node["right_child"], depth + 1)
+            builder.set_split(position, node["split_feature"], node["threshold"], left, right, node["default_left"],
+                              LIGHTGBM_MISSING_TYPES[node["missing_type"]])
+            return position
+
+        for tree in dump["tree_info"]:
+            builder.roots.append(add(tree["tree_structure"], 0))
+        return builder.build(base_score=0.0, n_features=dump["max_feature_idx"] + 1)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def from_xgboost(model) -> TreeEnsemble:
+    """
+    Convert a fitted XGBClassifier (binary:logistic) up to its best iteration like its predict_proba
+    """
+    try:
+        booster = model.get_booster()
+        config = json.loads(booster.save_config())["learner"]
+        if config["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"Only binary:logistic can be exported, got [{config['objective']['name']}]")
+        base_probability = float(str(config["learner_model_param"]["base_score"]).strip("[]"))
+        n_features = int(config["learner_model_param"]["num_feature"])
+        feature_index = {name: i for i, name in enumerate(booster.feature_names or [])}
+        dumps = booster.get_dump(dump_format="json")
+        best_iteration = getattr(model, "best_iteration", None)
+        if best_iteration is not None:
+            dumps = dumps[:best_iteration + 1]
+        builder = _TreeBuilder()
+
+        def add(node: dict, depth: int) -> int:
+            position = builder.add_node()
+            builder.max_depth = max(builder.max_depth, depth)
+            if "leaf" in node:
+                builder.set_leaf(position, node["leaf"])
+                return position
+            children = {child["nodeid"]: child for child in node["children"]}
+            left, right = add(children[node["yes"]], depth + 1), add(children[node["no"]], depth + 1)
+            split = node["split"]
+            feature = feature_index[split] if split in feature_index else int(split.lstrip("f"))
+            # xgboost goes left on x < t in float32, for float32 inputs that is x <= the float32 below t
+            threshold = np.nextafter(np.float32(node["split_condition"]), np.float32(-np.inf))
+            builder.set_split(position, feature, float(threshold), left, right, node["missing"] == node["yes"], MISSING_NAN)
+            return position
+
+        for tree in dumps:
+            builder.roots.append(add(json.loads(tree), 0))
+        return builder.build(base_score=float(np.log(base_probability / (1 - base_probability))), n_features=n_features)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def from_catboost(model) -> TreeEnsemble:
+    """
+    Convert a fitted CatBoostClassifier with float features only, each oblivious tree becomes a full binary tree
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "model.json")
+            model.save_model(file_path, format="json")
+            with open(file_path) as model_file:
+                dump = json.load(model_file)
+        features_info = dump["features_info"]
+        if features_info.get("categorical_features"):
+            raise ValueError("Categorical features of CatBoost cannot be exported")
+        float_features = features_info["float_features"]
+        scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+        bias = bias[0] if isinstance(bias, list) else bias
+        builder = _TreeBuilder()
+
+        def add(tree: dict, depth: int, leaf_index: int) -> int:
+            position = builder.add_node()
+            splits = tree["splits"]
+            if depth == len(splits):
+                builder.set_leaf(position, scale * tree["leaf_values"][leaf_index])
+                return position
+            # bit `depth` of the leaf index is the outcome of splits[depth], value > border goes right
+            split = splits[depth]
+            feature_info = float_features[split["float_feature_index"]]
+            left, right = add(tree, depth + 1, leaf_index), add(tree, depth + 1, leaf_index | (1 << depth))
+            builder.set_split(position, feature_info["flat_feature_index"], split["border"], left, right,
+                              feature_info.get("nan_value_treatment") != "AsTrue", MISSING_NAN)
+            return position
+
+        for tree in dump["oblivious_trees"]:
+            builder.max_depth = max(builder.max_depth, len(tree["splits"]))
+            builder.roots.append(add(tree, 0, 0))
+        n_features = max(info["flat_feature_index"] for info in float_features) + 1
+        return builder.build(base_score=bias, n_features=n_features)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+EXPORTERS = {"lightgbm": from_lightgbm, "xgboost": from_xgboost, "catboost": from_catboost}
+
+
+def export_tree_ensemble(model_name: str, model) -> TreeEnsemble:
+    """
+    Convert a fitted booster of one of the supported libraries, the library itself is not imported here
+    """
+    try:
+        if model_name not in EXPORTERS:
+            raise ValueError(f"Unknown model [{model_name}], expected one of {tuple(EXPORTERS)}")
+        return EXPORTERS[model_name](model)
+    except Exception as e:
+        raise MyException(e, sys) from e
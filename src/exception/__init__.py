@@ -43,7 +43,7 @@
 
 
 import sys
-import logging
+from src.logger import logging
 
 def error_message_details(error: Exception, error_detail: sys)-> str:
     """
@@ -88,4 +88,10 @@ class MyException(Exception):
         """
         Return the string representation of the error message
         """
-        return self.error_message
\ No newline at end of file
+        return self.error_message
+
+
+class SchemaError(ValueError):
+    """
+    Raised when values cannot be stored with the dtype config/schema.yaml declares for their column.
+    """
@@ -1,7 +1,6 @@
-import logging
+import logging as _logging
 import os
-from logging.handlers import RotatingFileHandler
-from from_root import from_root
+import threading
 from datetime import datetime
 
 # constants for log configuration
@@ -10,30 +9,36 @@ LOG_FILE_NAME = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 LOG_MAX_SIZE = 5 * 1024 * 1024  # 5 MB
 LOG_BACKUP_COUNT = 5 # 5 log files
 
-# consturcts log  file path
-log_dir_path = os.path.join(from_root(), LOG_DIR)
-os.makedirs(log_dir_path,exist_ok=True)
-log_file_path = os.path.join(log_dir_path, LOG_FILE_NAME)
+_configure_lock = threading.Lock()
+_configured = False
 
 def configure_logger():
     """
     configures logging with a rotating file handler and a console handler
     """
+    from logging.handlers import RotatingFileHandler
+    from from_root import from_root
+
+    # consturcts log  file path
+    log_dir_path = os.path.join(from_root(), LOG_DIR)
+    os.makedirs(log_dir_path,exist_ok=True)
+    log_file_path = os.path.join(log_dir_path, LOG_FILE_NAME)
+
     # Create a custom logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    logger = _logging.getLogger()
+    logger.setLevel(_logging.DEBUG)
 
     # Define a custom formatter
-    formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
+    formatter = _logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
     # file handler with rotation
     file_handler = RotatingFileHandler(log_file_path, maxBytes=LOG_MAX_SIZE, backupCount=LOG_BACKUP_COUNT)
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(_logging.DEBUG)
     file_handler.setFormatter(formatter)
 
     # console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
+    console_handler = _logging.StreamHandler()
+    console_handler.setLevel(_logging.DEBUG)
     console_handler.setFormatter(formatter)
 
     # add handlers to logger
@@ -41,11 +46,33 @@ def configure_logger():
     logger.addHandler(console_handler)
 
     # suppress pymongo debug logs
-    logging.getLogger("pymongo").setLevel(logging.WARNING)
-    logging.getLogger("pymongo.topology").setLevel(logging.WARNING)
-    logging.getLogger("pymongo.connection").setLevel(logging.WARNING)
-    logging.getLogger("pymongo.serverSelection").setLevel(logging.WARNING)
-    logging.getLogger("pymongo.command").setLevel(logging.WARNING)
-
-# configure logger
-configure_logger()
\ No newline at end of file
+    _logging.getLogger("pymongo").setLevel(_logging.WARNING)
+    _logging.getLogger("pymongo.topology").setLevel(_logging.WARNING)
+    _logging.getLogger("pymongo.connection").setLevel(_logging.WARNING)
+    _logging.getLogger("pymongo.serverSelection").setLevel(_logging.WARNING)
+    _logging.getLogger("pymongo.command").setLevel(_logging.WARNING)
+
+def ensure_configured():
+    """
+    Configure the logger once, on the first log call instead of at import time
+    """
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if not _configured:
+            configure_logger()
+            _configured = True
+
+
+class _LazyLogging:
+    """
+    Stands in for the logging module (`from src.logger import logging`), the logs dir and the handlers
+    are only created when something is actually logged
+    """
+    def __getattr__(self, name):
+        ensure_configured()
+        return getattr(_logging, name)
+
+
+logging = _LazyLogging()
@@ -0,0 +1,108 @@
+import sys
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_object
+from src.entity.config_entity import LoanPredictorConfig
+from src.entity.estimator import LoanModel
+from src.entity.tree_ensemble import TreeEnsemble
+
+
+class LoanData:
+    def __init__(self,
+                annual_income,
+                debt_to_income_ratio,
+                credit_score,
+                loan_amount,
+                interest_rate,
+                gender,
+                marital_status,
+                education_level,
+                employment_status,
+                loan_purpose,
+                grade_subgrade,
+                id=0
+                ):
+        """
+        Loan Data constructor
+        Input: all features of the trained model for prediction
+        """
+        try:
+            self.id = id
+            self.annual_income = annual_income
+            self.debt_to_income_ratio = debt_to_income_ratio
+            self.credit_score = credit_score
+            self.loan_amount = loan_amount
+            self.interest_rate = interest_rate
+            self.gender = gender
+            self.marital_status = marital_status
+            self.education_level = education_level
+            self.employment_status = employment_status
+            self.loan_purpose = loan_purpose
+            self.grade_subgrade = grade_subgrade
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_loan_data_as_dict(self)-> dict:
+        """
+        This function returns a raw record of the input fields, the form LoanModel scores
+        """
+        logging.info("Entered get_loan_data_as_dict method as LoanData class")
+        try:
+            return dict(self.__dict__)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+class LoanDataClassifier:
+    """
+    Scores raw loan records with the exported numpy tree ensemble and the compiled feature transform.
+    Only numpy (and the project's own modules) are needed, no boosting library or sklearn is imported.
+    """
+    def __init__(self, prediction_pipeline_config: LoanPredictorConfig = LoanPredictorConfig()) -> None:
+        """
+        :param prediction_pipeline_config: Configuration for prediction the value
+        """
+        try:
+            self.prediction_pipeline_config = prediction_pipeline_config
+            self._model = None
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_model(self)-> LoanModel:
+        """
+        Load the compiled model once and warm it up, later calls return the loaded model
+        """
+        try:
+            if self._model is None:
+                config = self.prediction_pipeline_config
+                logging.info(f"Loading compiled model from {config.compiled_model_file_path}")
+                self._model = LoanModel(
+                    transform=load_object(file_path=config.feature_transform_file_path),
+                    trained_model=TreeEnsemble.load(config.compiled_model_file_path),
+                    batch_size=config.batch_size
+                ).warm_up()
+            return self._model
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_proba(self, data)-> np.ndarray:
+        """
+        Probability of the loan being paid back for a record dict, a list of record dicts or a DataFrame
+        """
+        try:
+            return self.load_model().predict_proba(data)[:, 1]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict(self, data)-> np.ndarray:
+        """
+        This is the method of LoanDataClassifier
+        Returns: predicted label (1 = paid back) of every record
+        """
+        try:
+            logging.info("Entered predict method of LoanDataClassifier class")
+            return self.load_model().predict(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
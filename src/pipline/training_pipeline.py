@@ -4,16 +4,49 @@ from src.logger import logging
 
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
+from src.components.data_drift import DataDrift
 from src.components.data_transformation import DataTransformation
-from src.entity.config_entity import DataIngestionConfig,DataValidationConfig,DataTransformationConfig
+from src.components.model_trainer import ModelTrainer
+from src.components.model_evaluation import ModelEvaluation
+from src.components.model_pusher import ModelPusher
+from src.entity.config_entity import DataIngestionConfig,DataValidationConfig,DataDriftConfig,DataTransformationConfig,ModelTrainerConfig,ModelEvaluationConfig,ModelPusherConfig
+from src.entity.config_entity import training_pipeline_config
+from src.utils.artifact_writer import AsyncArtifactWriter
+from src.utils.stage_cache import StageCache
+from src.constants import SCHEMA_FILE_PATH
 
-from src.entity.artifact_entity import DataIngestionArtifact,DataValidationArtifact,DataTransformationArtifact
+from src.entity.artifact_entity import DataIngestionArtifact,DataValidationArtifact,DataDriftArtifact,DataTransformationArtifact,ModelTrainerArtifact,ModelEvaluationArtifact,ModelPusherArtifact
 
 class TrainingPipeline:
     def __init__(self):
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
+        self.data_drift_config = DataDriftConfig()
         self.data_transformation_config = DataTransformationConfig()
+        self.model_trainer_config = ModelTrainerConfig()
+        self.model_evaluation_config = ModelEvaluationConfig()
+        self.model_pusher_config = ModelPusherConfig()
+        # background writer used to persist artifacts while the next stage works on the in-memory objects
+        self.artifact_writer = AsyncArtifactWriter() if training_pipeline_config.in_memory else None
+        self.stage_cache = StageCache(artifacts_dir=training_pipeline_config.artifacts_dir) if training_pipeline_config.stage_cache else None
+
+    def _run_cached_stage(self, stage_name: str, config: object, input_files: list, stage_cls: type, artifact_cls: type, run_stage):
+        """
+        Returns the cached artifact of the stage when its inputs, config and code are unchanged, otherwise runs it
+        """
+        if self.stage_cache is None:
+            return run_stage()
+        if self.artifact_writer is not None:
+            # input files have to be on disk to be hashed
+            self.artifact_writer.wait()
+        key = self.stage_cache.compute_key(stage_name, config, input_files, [stage_cls.__module__])
+        artifact = self.stage_cache.load(stage_name, key, artifact_cls)
+        if artifact is None:
+            artifact = run_stage()
+            if self.artifact_writer is not None:
+                self.artifact_writer.wait()
+            self.stage_cache.store(stage_name, key, artifact)
+        return artifact
 
 
     def start_data_ingestion(self)-> DataIngestionArtifact:
@@ -23,7 +56,7 @@ class TrainingPipeline:
         try:
             logging.info("Entered the start_data_ingestion method of TrainingPipeline class")
             logging.info("Getting the data from mongoDB")
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config, artifact_writer=self.artifact_writer)
             data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
             logging.info("Get the train_set and test_set from mongoDB")
             logging.info("Exited the start_data_ingestion method of TrainingPipeline class")
@@ -38,13 +71,32 @@ class TrainingPipeline:
         logging.info("Entered the start_data_validation method of TrainingPipeline class")
         try:
             data_validation = DataValidation(data_validation_config=self.data_validation_config, data_ingestion_artifact=data_ingestion_artifact)
-            data_validation_artifact = data_validation.initiate_data_validation()
+            data_validation_artifact = self._run_cached_stage(
+                stage_name="data_validation",
+                config=self.data_validation_config,
+                input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path, SCHEMA_FILE_PATH],
+                stage_cls=DataValidation,
+                artifact_cls=DataValidationArtifact,
+                run_stage=data_validation.initiate_data_validation
+            )
             logging.info("Performed the data validation operation")
             logging.info("Exited the start_data_validation method of TrainingPipeline class")
             return data_validation_artifact
         except Exception as e:
             raise MyException(e,sys)
 
+    def start_data_drift(self, data_ingestion_artifact: DataIngestionArtifact)-> DataDriftArtifact:
+        """
+        This method of TrainingPipeline class is responsible for starting data drift component
+        """
+        try:
+            # not cached, every run compares against the baseline of the last promoted model, the model pusher
+            # replaces the baseline when the new model is accepted
+            data_drift = DataDrift(data_ingestion_artifact=data_ingestion_artifact, data_drift_config=self.data_drift_config)
+            return data_drift.initiate_data_drift()
+        except Exception as e:
+            raise MyException(e, sys)
+
     def start_data_transformation(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact)-> DataTransformationArtifact:
         """
         This method of TrainingPipeline class is responsible for starting data transformation component
@@ -53,16 +105,69 @@ class TrainingPipeline:
             data_transformation = DataTransformation(
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact,
-                data_transformation_config=self.data_transformation_config
+                data_transformation_config=self.data_transformation_config,
+                artifact_writer=self.artifact_writer
             )
 
-            data_transformation_artifact = data_transformation.initiate_data_transformation()
+            data_transformation_artifact = self._run_cached_stage(
+                stage_name="data_transformation",
+                config=self.data_transformation_config,
+                input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path, SCHEMA_FILE_PATH],
+                stage_cls=DataTransformation,
+                artifact_cls=DataTransformationArtifact,
+                run_stage=data_transformation.initiate_data_transformation
+            )
             return data_transformation_artifact
         except Exception as e:
             raise MyException(e, sys)
 
 
 
+    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact)-> ModelTrainerArtifact:
+        """
+        This method of TrainingPipeline class is responsible for starting model training
+        """
+        try:
+            if self.artifact_writer is not None:
+                # the trainer (and the search workers) memory map the transformed arrays from disk
+                self.artifact_writer.wait()
+            model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
+                                         model_trainer_config=self.model_trainer_config)
+            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            return model_trainer_artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def start_model_evaluation(self, data_ingestion_artifact: DataIngestionArtifact,
+                               data_transformation_artifact: DataTransformationArtifact,
+                               model_trainer_artifact: ModelTrainerArtifact)-> ModelEvaluationArtifact:
+        """
+        This method of TrainingPipeline class is responsible for starting model evaluation
+        """
+        try:
+            model_evaluation = ModelEvaluation(model_eval_config=self.model_evaluation_config,
+                                               data_ingestion_artifact=data_ingestion_artifact,
+                                               data_transformation_artifact=data_transformation_artifact,
+                                               model_trainer_artifact=model_trainer_artifact)
+            model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+            return model_evaluation_artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact, model_trainer_artifact: ModelTrainerArtifact,
+                           data_drift_artifact: DataDriftArtifact)-> ModelPusherArtifact:
+        """
+        This method of TrainingPipeline class is responsible for promoting the accepted model to production
+        """
+        try:
+            model_pusher = ModelPusher(model_evaluation_artifact=model_evaluation_artifact,
+                                       model_trainer_artifact=model_trainer_artifact,
+                                       model_pusher_config=self.model_pusher_config,
+                                       data_drift_artifact=data_drift_artifact)
+            return model_pusher.initiate_model_pusher()
+        except Exception as e:
+            raise MyException(e, sys)
+
     def run_pipeline(self,)-> None:
         """
         This method is TrainingPipeline class is responsible for running complete pipline 
@@ -70,7 +175,21 @@ class TrainingPipeline:
         try:
             data_ingestion_artifact = self.start_data_ingestion()
             data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            data_drift_artifact = self.start_data_drift(data_ingestion_artifact=data_ingestion_artifact)
             data_transformation_artifact = self.start_data_transformation(data_ingestion_artifact=data_ingestion_artifact,data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
+                                                                    data_transformation_artifact=data_transformation_artifact,
+                                                                    model_trainer_artifact=model_trainer_artifact)
+            if not model_evaluation_artifact.is_model_accepted:
+                logging.info("Trained model is not better than the production model")
+            else:
+                self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact,
+                                        model_trainer_artifact=model_trainer_artifact,
+                                        data_drift_artifact=data_drift_artifact)
 
+            if self.artifact_writer is not None:
+                # make sure every artifact is on disk before the run is reported as finished
+                self.artifact_writer.wait()
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
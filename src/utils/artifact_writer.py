@@ -0,0 +1,118 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pandas import DataFrame
+
+from src.exception import MyException
+from src.logger import logging
+from src.constants import DATA_ARTIFACT_COMPRESSION
+from src.utils.main_utils import _artifact_format
+
+
+class AsyncArtifactWriter:
+    """
+    Persists pipeline artifacts on a background thread.
+
+    Stages submit their save calls (save_dataframe, save_numpy_array_data, save_object, ...) and carry
+    on with the in-memory objects, the files written are exactly the ones the synchronous path writes.
+    Submitted objects must not be mutated afterwards.
+    """
+    def __init__(self, max_workers: int = 1):
+        """
+        :param max_workers: number of files written at the same time
+        """
+        try:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact_writer")
+            self._futures = []
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def submit(self, save_fn, *args, **kwargs)-> None:
+        """
+        Schedule save_fn(*args, **kwargs) on the writer thread
+        """
+        try:
+            self._futures.append(self._executor.submit(save_fn, *args, **kwargs))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def wait(self)-> None:
+        """
+        Block until every submitted write finished, re-raising the first failure
+        """
+        try:
+            futures, self._futures = self._futures, []
+            for future in futures:
+                future.result()
+            logging.info(f"Background artifact writer flushed {len(futures)} writes")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def shutdown(self)-> None:
+        """
+        Flush pending writes and stop the writer thread
+        """
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+class ChunkedDataFrameWriter:
+    """
+    Writes one dataframe file chunk by chunk without holding the whole frame in memory.
+
+    The format is taken from the file extension like save_dataframe: parquet chunks become row groups,
+    feather/arrow chunks record batches and csv chunks are appended. Every chunk must have the columns
+    and dtypes of the first one. Use as a context manager, the file is complete once it is closed.
+    """
+    def __init__(self, file_path: str, compression: str = DATA_ARTIFACT_COMPRESSION):
+        """
+        :param file_path: location of the file to be written (.parquet, .feather, .arrow or .csv)
+        :param compression: codec used by the columnar formats
+        """
+        try:
+            self.file_path = file_path
+            self.compression = compression
+            self.file_format = _artifact_format(file_path)
+            self.n_rows = 0
+            self._writer = None
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def write(self, dataframe: DataFrame)-> None:
+        """
+        Append a chunk to the file
+        """
+        try:
+            if self.file_format == "csv":
+                dataframe.to_csv(self.file_path, mode="w" if self.n_rows == 0 else "a", index=False, header=self.n_rows == 0)
+            else:
+                import pyarrow as pa
+                table = pa.Table.from_pandas(dataframe, preserve_index=False)
+                if self._writer is None:
+                    if self.file_format == "parquet":
+                        import pyarrow.parquet as pq
+                        self._writer = pq.ParquetWriter(self.file_path, table.schema, compression=self.compression)
+                    else:
+                        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                        self._writer = pa.ipc.new_file(self.file_path, table.schema, options=options)
+                self._writer.write_table(table)
+            self.n_rows += len(dataframe)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def close(self)-> None:
+        try:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def __enter__(self)-> "ChunkedDataFrameWriter":
+        return self
+
+    def __exit__(self, *exc_info)-> None:
+        self.close()
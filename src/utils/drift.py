@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+# pandas is imported by DatasetProfile.update, the prediction service only profiles raw records
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+from src.constants import QUANTILE_SKETCH_SIZE, DATA_DRIFT_N_BINS
+from src.exception import MyException
+from src.utils.sketches import QuantileSketch, CategoryCounts
+
+# keeps empty bins from turning the PSI logarithm into +-inf
+PSI_EPSILON = 1e-6
+
+
+class DatasetProfile:
+    """
+    Constant memory summary of a dataset for drift detection.
+
+    Holds one QuantileSketch per numerical column and one CategoryCounts per categorical column of
+    the schema. Profiles are updated chunk by chunk (update), from raw serving records
+    (update_records), merged across partitions or workers (merge) and stored as JSON (save/load).
+    """
+    def __init__(self, numerical_columns: list, categories: dict, sketch_size: int = QUANTILE_SKETCH_SIZE):
+        """
+        :param numerical_columns: columns summarized with quantile sketches
+        :param categories: categorical column -> vocabulary, summarized with count tables
+        :param sketch_size: points kept per quantile sketch
+        """
+        self.sketch_size = sketch_size
+        self.numerical = {column: QuantileSketch(size=sketch_size) for column in numerical_columns}
+        self.categorical = {column: CategoryCounts(values) for column, values in categories.items()}
+
+    @classmethod
+    def from_schema(cls, schema_config: dict, sketch_size: int = QUANTILE_SKETCH_SIZE) -> "DatasetProfile":
+        return cls(schema_config["numerical_columns"], schema_config.get("categories", {}), sketch_size)
+
+    def update(self, dataframe: "DataFrame") -> "DatasetProfile":
+        """
+        Add a chunk of rows, columns missing from the chunk are left untouched
+        """
+        try:
+            import pandas as pd
+            for column, sketch in self.numerical.items():
+                if column in dataframe.columns:
+                    sketch.update(pd.to_numeric(dataframe[column], errors="coerce").to_numpy(dtype=np.float64))
+            for column, table in self.categorical.items():
+                if column not in dataframe.columns:
+                    continue
+                series = dataframe[column]
+                if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == table.categories:
+                    table.update_codes(series.cat.codes.to_numpy())
+                else:
+                    table.update(series.to_numpy(dtype=object))
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def update_records(self, records) -> "DatasetProfile":
+        """
+        Add raw records (a dict or a list of dicts, e.g. prediction requests) without keeping them
+        """
+        try:
+            if isinstance(records, dict):
+                records = [records]
+            for column, sketch in self.numerical.items():
+                values = [record[column] for record in records if column in record]
+                if values:
+                    sketch.update(np.array([np.nan if v is None or v == "na" else v for v in values], dtype=np.float64))
+            for column, table in self.categorical.items():
+                table.update(record[column] for record in records if column in record)
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def merge(self, other: "DatasetProfile") -> "DatasetProfile":
+        """
+        Fold a profile over the same columns into this one
+        """
+        try:
+            for column, sketch in self.numerical.items():
+                sketch.merge(other.numerical[column])
+            for column, table in self.categorical.items():
+                table.merge(other.categorical[column])
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def to_dict(self) -> dict:
+        return {
+            "sketch_size": self.sketch_size,
+            "numerical": {column: sketch.to_dict() for column, sketch in self.numerical.items()},
+            "categorical": {column: table.to_dict() for column, table in self.categorical.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DatasetProfile":
+        profile = cls([], {}, state["sketch_size"])
+        profile.numerical = {column: QuantileSketch.from_dict(s) for column, s in state["numerical"].items()}
+        profile.categorical = {column: CategoryCounts.from_dict(s) for column, s in state["categorical"].items()}
+        return profile
+
+    def save(self, file_path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as profile_file:
+                json.dump(self.to_dict(), profile_file)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @classmethod
+    def load(cls, file_path: str) -> "DatasetProfile":
+        try:
+            with open(file_path, "r") as profile_file:
+                return cls.from_dict(json.load(profile_file))
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+class ServingProfile:
+    """
+    DatasetProfile of the records scored by the prediction service.
+
+    observe only queues a scored batch, the profile is updated on one background thread so the requests never
+    wait for it. flush folds the records observed since the last flush into the profile stored at file_path,
+    which therefore covers every record served, across restarts, and can be compared with the drift baseline.
+    Updates and flushes run on the same thread, the profile needs no lock.
+    """
+    def __init__(self, schema_config: dict, file_path: str, sketch_size: int = QUANTILE_SKETCH_SIZE):
+        """
+        :param schema_config: schema (config/schema.yaml) whose columns are profiled
+        :param file_path: JSON file the profile is merged into on every flush
+        :param sketch_size: points kept per quantile sketch
+        """
+        self.schema_config = schema_config
+        self.file_path = file_path
+        self.sketch_size = sketch_size
+        self.n_observed = 0
+        self._window = DatasetProfile.from_schema(schema_config, sketch_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serving-profile")
+
+    def observe(self, records: list) -> None:
+        """
+        Queue a batch of raw records for the profile and return at once
+        """
+        self._executor.submit(self._update, records)
+
+    def _update(self, records: list) -> None:
+        self._window.update_records(records)
+        self.n_observed += len(records)
+
+    def flush(self) -> Future:
+        """
+        Merge the records observed so far into the stored profile, after the batches queued before the call.
+        Returns a future of the stored profile.
+        """
+        return self._executor.submit(self._flush)
+
+    def _flush(self) -> DatasetProfile:
+        try:
+            if os.path.exists(self.file_path):
+                stored = DatasetProfile.load(self.file_path)
+            else:
+                stored = DatasetProfile.from_schema(self.schema_config, self.sketch_size)
+            stored.merge(self._window)
+            # written next to the target and renamed, a reader never sees a partly written profile
+            tmp_file_path = f"{self.file_path}.tmp"
+            stored.save(tmp_file_path)
+            os.replace(tmp_file_path, self.file_path)
+            self._window = DatasetProfile.from_schema(self.schema_config, self.sketch_size)
+            return stored
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def close(self) -> None:
+        """
+        Flush what was observed and stop the background thread
+        """
+        try:
+            self.flush().result()
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    PSI between two binned distributions given as fractions
+    """
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def numerical_drift(baseline: QuantileSketch, current: QuantileSketch, n_bins: int = DATA_DRIFT_N_BINS) -> dict:
+    """
+    PSI over the baseline quantile bins and the two sample KS statistic of two quantile sketches
+    """
+    edges = np.unique(baseline.quantile(np.linspace(0, 1, n_bins + 1))[1:-1])
+    expected = np.diff(np.concatenate([[0.0], baseline.cdf(edges), [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], current.cdf(edges), [1.0]]))
+    # the sketch cdfs are step functions, their largest gap is reached at one of the stored points
+    points = np.concatenate([baseline.values, current.values])
+    ks = float(np.max(np.abs(baseline.cdf(points) - current.cdf(points)))) if len(points) else 0.0
+    return {"psi": population_stability_index(expected, actual), "ks": ks}
+
+
+def categorical_drift(baseline: CategoryCounts, current: CategoryCounts) -> dict:
+    """
+    PSI and total variation distance of two count tables, the other and missing buckets included
+    """
+    expected, actual = baseline.frequencies(), current.frequencies()
+    return {"psi": population_stability_index(expected, actual), "tvd": float(np.abs(expected - actual).sum() / 2)}
+
+
+def compare_profiles(baseline: DatasetProfile, current: DatasetProfile, psi_threshold: float, ks_threshold: float) -> dict:
+    """
+    Per column drift statistics of current against baseline, a column drifts when its PSI or KS
+    exceeds the threshold. Columns empty in either profile (e.g. the target at serving time) are skipped.
+    """
+    try:
+        columns = {}
+        for column, sketch in current.numerical.items():
+            reference = baseline.numerical.get(column)
+            if reference is None or reference.count == 0 or sketch.count == 0:
+                continue
+            stats = numerical_drift(reference, sketch)
+            stats["drift"] = stats["psi"] > psi_threshold or stats["ks"] > ks_threshold
+            columns[column] = stats
+        for column, table in current.categorical.items():
+            reference = baseline.categorical.get(column)
+            if reference is None or reference.count + reference.n_missing == 0 or table.count + table.n_missing == 0:
+                continue
+            stats = categorical_drift(reference, table)
+            stats["drift"] = stats["psi"] > psi_threshold
+            columns[column] = stats
+        drifted = [column for column, stats in columns.items() if stats["drift"]]
+        return {"drift_detected": len(drifted) > 0, "drifted_columns": drifted, "columns": columns}
+    except Exception as e:
+        raise MyException(e, sys)
@@ -1,16 +1,22 @@
 import os
+import json
 import numpy as np
 import sys
-from pandas import DataFrame
-import dill
-import yaml
+from typing import TYPE_CHECKING
 
-from src.exception import MyException
+# pandas, dill and yaml are imported by the functions using them, so that importing this module
+# (e.g. from the prediction pipeline) does not pay for libraries it never calls
+if TYPE_CHECKING:
+    from pandas import Categorical, CategoricalDtype, DataFrame
+
+from src.constants import DATA_ARTIFACT_COMPRESSION
+from src.exception import MyException, SchemaError
 from src.logger import logging
 
 
 def read_yaml_file(file_path: str)-> dict:
     try:
+        import yaml
         with open(file_path, "r") as yaml_file:
             return yaml.safe_load(yaml_file)
     except Exception as e:
@@ -18,6 +24,7 @@ def read_yaml_file(file_path: str)-> dict:
 
 def write_yml_file(file_path: str, content: object, replace: bool = None)-> None:
     try:
+        import yaml
         if replace:
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -27,6 +34,22 @@ def write_yml_file(file_path: str, content: object, replace: bool = None)-> None
     except Exception as e:
         raise MyException (e,sys) from e
 
+def write_json_file(file_path: str, content: dict)-> None:
+    """
+    Write content as JSON atomically: a temporary file in the same directory is renamed over file_path,
+    so readers see either the previous or the new content and never a partly written file
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_file_path = f"{file_path}.tmp"
+        with open(tmp_file_path, "w") as file_obj:
+            json.dump(content, file_obj, indent=4)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        os.replace(tmp_file_path, file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
 def load_object(file_path: str)-> object:
     """
     Return model/object from directory
@@ -34,43 +57,371 @@ def load_object(file_path: str)-> object:
     return: model/object
     """
     try:
+        import dill
         with open(file_path, "rb") as file_obj:
             return dill.load(file_obj)
     except Exception as e:
         raise MyException(e,sys) from e 
     
-def save_numpy_array_data(file_path: str, array: np.array):
+def save_numpy_array_data(file_path: str, array: np.array, dtype: str = None):
     """
     Save numpy array data to file
     file_path: str location of the file to be saved
-    array: np.array data to be saved
+    array: np.array data to be saved, object arrays are rejected so the file can be loaded without pickle
+    dtype: str optional fixed numeric dtype the array is cast to before saving
     """
     try:
+        array = np.ascontiguousarray(array, dtype=dtype)
+        if array.dtype.hasobject:
+            raise TypeError(f"Refusing to save object array to {file_path}, cast it to a numeric dtype first")
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         with open(file_path, "wb") as file_obj:
-            np.save(file_obj, array)
+            np.save(file_obj, array, allow_pickle=False)
     except Exception as e:
         raise MyException(e, sys) from e
     
-def load_numpy_array_data(file_path: str)-> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = "r")-> np.array:
     """
     load numpy array data from file
     file_path: str location of the file to be loaded
+    mmap_mode: str memory map the file (default read only, shared through the page cache), None reads it into RAM
     return: np.array data loaded
     """
     try:
-        with open(file_path, "rb") as file_obj:
-            return np.load(file_obj, allow_pickle=True)
+        return np.load(file_path, mmap_mode=mmap_mode, allow_pickle=False)
     except Exception as e:
         raise MyException(e, sys) from e
     
 def save_object(file_path: str, obj: object)-> None:
     logging.info("Entered the save_object method of MainUtils class")
     try:
+        import dill
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         with open(file_path, "wb") as file_obj:
             dill.dump(obj, file_obj)
         logging.info("Exited the save_object method of MainUtils class")
     except Exception as e:
-        raise MyException(e, sys) from e
\ No newline at end of file
+        raise MyException(e, sys) from e
+
+def _artifact_format(file_path: str)-> str:
+    """
+    Return the artifact format (parquet, feather, arrow or csv) from the file extension
+    """
+    file_format = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if file_format not in ("parquet", "feather", "arrow", "csv"):
+        raise ValueError(f"Unsupported artifact format [{file_format}] for file: {file_path}")
+    return file_format
+
+def dataframe_part_files(file_path: str)-> list:
+    """
+    Return the files holding a dataframe: the numbered part files of a dataset directory in order,
+    or the file itself
+    """
+    if not os.path.isdir(file_path):
+        return [file_path]
+    extension = os.path.splitext(file_path)[1]
+    return [
+        os.path.join(file_path, name) for name in sorted(os.listdir(file_path))
+        if name.startswith("part-") and name.endswith(extension)
+    ]
+
+def save_dataframe(file_path: str, dataframe: "DataFrame", compression: str = DATA_ARTIFACT_COMPRESSION)-> None:
+    """
+    Save dataframe to file, the format is taken from the file extension
+    file_path: str location of the file to be saved (.parquet, .feather, .arrow or .csv), a dataset
+               directory at this path is replaced by the file
+    dataframe: DataFrame data to be saved, dtypes are kept by the columnar formats
+    compression: str codec used by the columnar formats
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if os.path.isdir(file_path):
+            import shutil
+            shutil.rmtree(file_path)
+        file_format = _artifact_format(file_path)
+        if file_format == "csv":
+            dataframe.to_csv(file_path, index=False, header=True)
+        elif file_format == "parquet":
+            dataframe.to_parquet(file_path, index=False, compression=compression)
+        else:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+            table = pa.Table.from_pandas(dataframe, preserve_index=False)
+            # feather v2 and the arrow IPC file format are the same on disk
+            feather.write_feather(table, file_path, compression=compression)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def _stored_columns(file_path: str)-> list:
+    """
+    Return the column names of a parquet or feather file from its schema, without reading the data
+    """
+    import pyarrow as pa
+    if _artifact_format(file_path) == "parquet":
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(file_path)
+    else:
+        schema = pa.ipc.open_file(pa.memory_map(file_path, "r")).schema
+    return [name for name in schema.names if not name.startswith("__index_level_")]
+
+def append_dataframe(file_path: str, dataframe: "DataFrame")-> None:
+    """
+    Append rows to an existing dataframe file (or create it)
+    CSV is appended in place. The columnar formats are stored as a dataset directory at file_path and every
+    append writes one new numbered part file, the rows already stored are never read or rewritten. A single
+    file at file_path becomes the first part file of the directory.
+    """
+    try:
+        if _artifact_format(file_path) == "csv":
+            if not os.path.exists(file_path):
+                save_dataframe(file_path, dataframe)
+            else:
+                dataframe.to_csv(file_path, mode="a", index=False, header=False)
+            return
+        extension = os.path.splitext(file_path)[1]
+        if os.path.isfile(file_path):
+            moved_file_path = f"{file_path}.tmp"
+            os.replace(file_path, moved_file_path)
+            os.makedirs(file_path)
+            os.replace(moved_file_path, os.path.join(file_path, f"part-00000{extension}"))
+        os.makedirs(file_path, exist_ok=True)
+        part_files = dataframe_part_files(file_path)
+        columns = _stored_columns(part_files[0]) if part_files else list(dataframe.columns)
+        part_number = int(os.path.basename(part_files[-1])[len("part-"):-len(extension)]) + 1 if part_files else 0
+        # written under a temporary name and renamed, a reader never sees a partly written part
+        part_file_path = os.path.join(file_path, f"part-{part_number:05d}{extension}")
+        tmp_file_path = os.path.join(file_path, f".part-{part_number:05d}{extension}")
+        save_dataframe(tmp_file_path, dataframe[columns])
+        os.replace(tmp_file_path, part_file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def read_dataframe(file_path: str, columns: list = None, dtype: dict = None)-> "DataFrame":
+    """
+    Load dataframe from file, the format is taken from the file extension
+    file_path: str location of the file (or dataset directory of part files) to be loaded
+    columns: list optional column projection, only these columns are read from disk
+    dtype: dict optional column -> dtype applied while reading (e.g. category dtypes from the schema)
+    return: DataFrame data loaded
+    """
+    try:
+        import pandas as pd
+        file_format = _artifact_format(file_path)
+        if file_format == "csv":
+            return pd.read_csv(file_path, usecols=columns, dtype=dtype)
+        import pyarrow as pa
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            tables = [pq.read_table(part_file_path, columns=columns) for part_file_path in dataframe_part_files(file_path)]
+        else:
+            import pyarrow.feather as feather
+            tables = [feather.read_table(part_file_path, columns=columns) for part_file_path in dataframe_part_files(file_path)]
+        # the parts are joined as arrow chunks, the DataFrame is built once
+        dataframe = pa.concat_tables(tables).to_pandas()
+        if dtype:
+            dataframe = dataframe.astype({column: d for column, d in dtype.items() if column in dataframe.columns})
+        return dataframe
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def iter_dataframe_chunks(file_path: str, chunksize: int, columns: list = None, dtype: dict = None):
+    """
+    Yield the file as dataframes of at most chunksize rows without loading it whole
+    file_path: str location of the file (or dataset directory of part files) to be read
+    chunksize: int rows per chunk (columnar files yield their stored batches when those are smaller)
+    columns: list optional column projection
+    dtype: dict optional column -> dtype applied to every chunk
+    """
+    try:
+        import pandas as pd
+        file_format = _artifact_format(file_path)
+        if file_format == "csv":
+            yield from pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize)
+            return
+        for part_file_path in dataframe_part_files(file_path):
+            if file_format == "parquet":
+                import pyarrow.parquet as pq
+                batches = pq.ParquetFile(part_file_path).iter_batches(batch_size=chunksize, columns=columns)
+            else:
+                import pyarrow as pa
+                reader = pa.ipc.open_file(pa.memory_map(part_file_path, "r"))
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            for batch in batches:
+                dataframe = batch.to_pandas()
+                if columns is not None:
+                    dataframe = dataframe[columns]
+                if dtype:
+                    dataframe = dataframe.astype({column: d for column, d in dtype.items() if column in dataframe.columns})
+                yield dataframe
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def count_dataframe_rows(file_path: str)-> int:
+    """
+    Return the number of rows of a dataframe file (or dataset directory), from metadata for the columnar formats
+    """
+    try:
+        import pandas as pd
+        file_format = _artifact_format(file_path)
+        if file_format == "csv":
+            first_column = pd.read_csv(file_path, nrows=0).columns[:1].tolist()
+            return sum(len(chunk) for chunk in pd.read_csv(file_path, usecols=first_column, chunksize=1_000_000))
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            return sum(pq.ParquetFile(part_file_path).metadata.num_rows for part_file_path in dataframe_part_files(file_path))
+        import pyarrow as pa
+        n_rows = 0
+        for part_file_path in dataframe_part_files(file_path):
+            reader = pa.ipc.open_file(pa.memory_map(part_file_path, "r"))
+            n_rows += sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return n_rows
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def schema_dtypes(schema_config: dict)-> dict:
+    """
+    Return column -> dtype from the schema 'dtypes' section, "category" columns get a
+    pd.CategoricalDtype with their fixed categories
+    """
+    try:
+        categorical_dtypes = schema_categorical_dtypes(schema_config)
+        return {
+            column: categorical_dtypes[column] if dtype == "category" else np.dtype(dtype)
+            for column, dtype in schema_config.get("dtypes", {}).items()
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def cast_integer_values(values, dtype: np.dtype, column: str)-> np.ndarray:
+    """
+    Cast the values of column to its integer schema dtype
+    Missing ('na', None, NaN), non numeric, fractional and out of range values raise a SchemaError naming the
+    column instead of the bare TypeError/ValueError of the cast, integer columns have no missing value marker.
+    """
+    import pandas as pd
+    dtype = np.dtype(dtype)
+    numeric = pd.to_numeric(pd.Series(values, copy=False), errors="coerce")
+    if numeric.dtype.kind in "iu":
+        array = numeric.to_numpy()
+    else:
+        array = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        n_missing = int(np.isnan(array).sum())
+        if n_missing:
+            raise SchemaError(f"Column [{column}] has {n_missing} missing or non numeric values, its schema dtype {dtype} cannot hold them")
+        n_fractional = int((array != np.trunc(array)).sum())
+        if n_fractional:
+            raise SchemaError(f"Column [{column}] has {n_fractional} fractional values, its schema dtype is {dtype}")
+    info = np.iinfo(dtype)
+    if len(array) and (array.min() < info.min or array.max() > info.max):
+        raise SchemaError(f"Column [{column}] has values in [{array.min()}, {array.max()}], outside the range of its schema dtype {dtype}")
+    return array.astype(dtype)
+
+def cast_category_values(values, dtype: "CategoricalDtype", column: str)-> "Categorical":
+    """
+    Cast the values of column to its categorical schema dtype
+    Missing values ('na', None, NaN) stay missing. Any other value outside the schema vocabulary raises a
+    SchemaError naming the column and the values, a plain astype would silently turn them into NaN.
+    """
+    import pandas as pd
+    series = pd.Series(values, copy=False)
+    placeholder = series.isin(["na"])
+    unknown = series[series.notna() & ~placeholder & ~series.isin(dtype.categories)]
+    if len(unknown):
+        values_found = sorted(str(value) for value in pd.unique(unknown))
+        raise SchemaError(f"Column [{column}] has {len(unknown)} values outside its schema categories: {values_found[:10]}")
+    if placeholder.any():
+        series = series.mask(placeholder)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # pandas warns about categories missing from the target dtype even when no value uses them
+        series = series.cat.remove_unused_categories()
+    return pd.Categorical(series, dtype=dtype)
+
+def apply_schema_dtypes(dataframe: "DataFrame", dtypes: dict, stage: str = None)-> "DataFrame":
+    """
+    Cast the columns whose dtype differs from the schema, logging a memory report when something changed
+    Integer columns are cast with cast_integer_values, so missing values raise a SchemaError naming the column,
+    category columns with cast_category_values, so values outside the vocabulary raise one too.
+    """
+    try:
+        to_convert = {
+            column: dtype for column, dtype in dtypes.items()
+            if column in dataframe.columns and dataframe[column].dtype != dtype
+        }
+        if not to_convert:
+            return dataframe
+        import pandas as pd
+        integer_columns = {column: dtype for column, dtype in to_convert.items() if isinstance(dtype, np.dtype) and dtype.kind in "iu"}
+        category_columns = {column: dtype for column, dtype in to_convert.items() if isinstance(dtype, pd.CategoricalDtype)}
+        converted = dataframe.astype({
+            column: dtype for column, dtype in to_convert.items() if column not in integer_columns and column not in category_columns
+        })
+        for column, dtype in integer_columns.items():
+            converted[column] = cast_integer_values(dataframe[column], dtype, column)
+        for column, dtype in category_columns.items():
+            converted[column] = cast_category_values(dataframe[column], dtype, column)
+        if stage is not None:
+            log_memory_report(stage, converted, before=dataframe)
+        return converted
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def log_memory_report(stage: str, dataframe: "DataFrame", before: "DataFrame" = None)-> dict:
+    """
+    Log the bytes used by every column of dataframe (and of before, when given) and return the report
+    """
+    try:
+        after_usage = dataframe.memory_usage(index=False, deep=True)
+        before_usage = before.memory_usage(index=False, deep=True) if before is not None else None
+        report = {}
+        for column, nbytes in after_usage.items():
+            report[column] = {"bytes": int(nbytes), "dtype": str(dataframe[column].dtype)}
+            if before_usage is not None and column in before_usage:
+                report[column]["bytes_before"] = int(before_usage[column])
+                report[column]["dtype_before"] = str(before[column].dtype)
+        total = int(after_usage.sum())
+        if before_usage is not None:
+            logging.info(f"[{stage}] memory: {before_usage.sum() / 2**20:.1f} MiB -> {total / 2**20:.1f} MiB")
+        else:
+            logging.info(f"[{stage}] memory: {total / 2**20:.1f} MiB")
+        for column, entry in report.items():
+            if "bytes_before" in entry:
+                logging.info(f"[{stage}]   {column}: {entry['dtype_before']} {entry['bytes_before']} B -> {entry['dtype']} {entry['bytes']} B")
+            else:
+                logging.info(f"[{stage}]   {column}: {entry['dtype']} {entry['bytes']} B")
+        return report
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def schema_categorical_dtypes(schema_config: dict)-> dict:
+    """
+    Return column -> pd.CategoricalDtype with the fixed categories declared in the schema
+    """
+    try:
+        import pandas as pd
+        return {
+            column: pd.CategoricalDtype(categories=categories)
+            for column, categories in schema_config.get("categories", {}).items()
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def read_dataframe_schema(file_path: str)-> "DataFrame":
+    """
+    Return an empty dataframe with the columns (and for columnar formats the dtypes) of the file
+    without reading any rows, for a dataset directory the schema of its first part file
+    """
+    try:
+        import pandas as pd
+        file_format = _artifact_format(file_path)
+        if file_format == "csv":
+            return pd.read_csv(file_path, nrows=0)
+        schema_file_path = dataframe_part_files(file_path)[0]
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_schema(schema_file_path).empty_table().to_pandas()
+        import pyarrow as pa
+        with pa.memory_map(schema_file_path, "r") as source:
+            return pa.ipc.open_file(source).schema.empty_table().to_pandas()
+    except Exception as e:
+        raise MyException(e, sys) from e
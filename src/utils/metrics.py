@@ -0,0 +1,138 @@
+import sys
+import numpy as np
+
+from src.exception import MyException
+
+# probabilities are clipped to [LOG_LOSS_EPSILON, 1 - LOG_LOSS_EPSILON] for the log loss
+LOG_LOSS_EPSILON = 1e-15
+
+
+def prepare_scores(y_true: np.ndarray, y_score: np.ndarray, n_bins: int = 10, threshold: float = 0.5) -> dict:
+    """
+    Sort the predictions once and precompute everything weighted_metrics needs, so that metrics of the
+    full set and of any bootstrap replicate only take sums, cumulative sums and reduceat.
+
+    Returns a dict of arrays in ascending score order: order (row index of the original arrays), float32 y, p,
+    log_loss and squared_error per row, pred_start (the first row predicted positive, as a one element array)
+    and the start offsets of the tied score groups and of the calibration bins. Ties and bins are found on the
+    float64 scores, float32 only rounds the per row values.
+    """
+    try:
+        y_score = np.asarray(y_score, dtype=np.float64)
+        order = np.argsort(y_score, kind="stable")
+        p = y_score[order]
+        y = np.asarray(y_true, dtype=np.float64)[order]
+        clipped = np.clip(p, LOG_LOSS_EPSILON, 1 - LOG_LOSS_EPSILON)
+        bins = np.minimum((p * n_bins).astype(np.int64), n_bins - 1)
+        return {
+            "order": order,
+            "y": y.astype(np.float32),
+            "p": p.astype(np.float32),
+            "log_loss": (-(y * np.log(clipped) + (1 - y) * np.log1p(-clipped))).astype(np.float32),
+            "squared_error": ((p - y) ** 2).astype(np.float32),
+            # the scores are sorted, the rows predicted positive are the tail
+            "pred_start": np.array([np.searchsorted(p, threshold, side="left")]),
+            "group_starts": np.flatnonzero(np.r_[True, p[1:] != p[:-1]]),
+            # only the non empty bins, the scores are sorted so every bin is one contiguous run
+            "bin_starts": np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]]),
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def _chunk_run_offsets(run_starts: np.ndarray, start: int, stop: int) -> tuple:
+    """
+    Offsets, relative to start, of the runs (tied groups or bins) starting in rows [start, stop). Offset 0 is
+    always first, continues tells whether that first run began in an earlier chunk.
+    """
+    low, high = np.searchsorted(run_starts, [start, stop])
+    offsets = run_starts[low:high] - start
+    continues = len(offsets) == 0 or offsets[0] != 0
+    return (np.r_[0, offsets] if continues else offsets), continues
+
+
+def weighted_metrics(prepared: dict, weights: np.ndarray, chunk_size: int = None) -> dict:
+    """
+    roc_auc, log_loss, brier, precision, recall, f1 and expected calibration error (ece) for every row of
+    weights (shape n_replicates x n_rows, in the sorted order of prepared). A row of ones gives the plain
+    metrics, Poisson or multinomial counts give bootstrap replicates. No per threshold or per row Python loop:
+    ties are handled by summing tied groups with np.add.reduceat, the rest are sums of weighted rows.
+
+    The rows are processed chunk_size at a time (all at once by default) so the temporaries stay bounded
+    for large test sets. The tied group and the calibration bin open at the end of a chunk are carried into
+    the next one together with the negatives below them, the result does not depend on chunk_size.
+    The weighted rows keep the dtype of weights and prepared (float32 for bootstrap counts), every sum
+    is accumulated in float64.
+    """
+    try:
+        w = np.atleast_2d(weights)
+        n_replicates, n_rows = w.shape
+        chunk_size = max(1, chunk_size or n_rows)
+        pred_start = int(prepared["pred_start"][0])
+        total, positives, true_positive, false_positive, log_loss_sum, brier_sum, auc_sum, ece_sum = np.zeros((8, n_replicates))
+        # negatives of the closed groups, the open group and the open bin carried between chunks
+        neg_before, open_pos, open_neg, open_bin_y, open_bin_p = np.zeros((5, n_replicates))
+
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            wc = w[:, start:stop]
+            wy = wc * prepared["y"][start:stop]
+            wn = wc - wy
+            total += wc.sum(axis=1, dtype=np.float64)
+            positives += wy.sum(axis=1, dtype=np.float64)
+            true_positive += wy[:, max(pred_start - start, 0):].sum(axis=1, dtype=np.float64)
+            false_positive += wn[:, max(pred_start - start, 0):].sum(axis=1, dtype=np.float64)
+            log_loss_sum += (wc * prepared["log_loss"][start:stop]).sum(axis=1, dtype=np.float64)
+            brier_sum += (wc * prepared["squared_error"][start:stop]).sum(axis=1, dtype=np.float64)
+
+            # Mann-Whitney: every positive beats the negatives scored lower and half of the tied ones
+            offsets, continues = _chunk_run_offsets(prepared["group_starts"], start, stop)
+            group_pos = np.add.reduceat(wy, offsets, axis=1, dtype=np.float64)
+            group_neg = np.add.reduceat(wn, offsets, axis=1, dtype=np.float64)
+            if continues:
+                group_pos[:, 0] += open_pos
+                group_neg[:, 0] += open_neg
+            else:
+                auc_sum += open_pos * (neg_before + 0.5 * open_neg)
+                neg_before += open_neg
+            neg_below = neg_before[:, None] + np.cumsum(group_neg, axis=1) - group_neg
+            auc_sum += (group_pos[:, :-1] * (neg_below[:, :-1] + 0.5 * group_neg[:, :-1])).sum(axis=1)
+            neg_before += group_neg[:, :-1].sum(axis=1)
+            open_pos, open_neg = group_pos[:, -1], group_neg[:, -1]
+
+            offsets, continues = _chunk_run_offsets(prepared["bin_starts"], start, stop)
+            bin_weight_y = np.add.reduceat(wy, offsets, axis=1, dtype=np.float64)
+            bin_weight_p = np.add.reduceat(wc * prepared["p"][start:stop], offsets, axis=1, dtype=np.float64)
+            if continues:
+                bin_weight_y[:, 0] += open_bin_y
+                bin_weight_p[:, 0] += open_bin_p
+            else:
+                ece_sum += np.abs(open_bin_y - open_bin_p)
+            ece_sum += np.abs(bin_weight_y[:, :-1] - bin_weight_p[:, :-1]).sum(axis=1)
+            open_bin_y, open_bin_p = bin_weight_y[:, -1], bin_weight_p[:, -1]
+
+        auc_sum += open_pos * (neg_before + 0.5 * open_neg)
+        ece_sum += np.abs(open_bin_y - open_bin_p)
+        negatives = total - positives
+        false_negative = positives - true_positive
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "roc_auc": auc_sum / (positives * negatives),
+                "log_loss": log_loss_sum / total,
+                "brier": brier_sum / total,
+                "precision": true_positive / (true_positive + false_positive),
+                "recall": true_positive / positives,
+                "f1": 2 * true_positive / (2 * true_positive + false_positive + false_negative),
+                "ece": ece_sum / total,
+            }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def classification_metrics(y_true: np.ndarray, y_score: np.ndarray, n_bins: int = 10, threshold: float = 0.5) -> dict:
+    """
+    Plain (unweighted) metrics of predicted probabilities as floats
+    """
+    prepared = prepare_scores(y_true, y_score, n_bins, threshold)
+    metrics = weighted_metrics(prepared, np.ones((1, len(prepared["y"]))))
+    return {name: float(values[0]) for name, values in metrics.items()}
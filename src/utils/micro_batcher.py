@@ -0,0 +1,165 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+
+from src.logger import logging
+
+
+class QueueFullError(Exception):
+    """
+    Raised by MicroBatcher.submit when max_queue_size requests are already waiting
+    """
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single record requests into batches for one vectorized model call.
+
+    A batch is flushed when it holds max_batch_size records or when max_wait_ms have passed since its first
+    record arrived. At most max_concurrent_batches model calls run at once in the executor, so the event loop
+    never blocks on the model; while they are busy new requests keep queueing and the next batch grows, the
+    batch size adapts to the load on its own.
+    """
+    def __init__(self, predict_batch, executor: Executor, max_batch_size: int = 256, max_wait_ms: float = 5.0,
+                 max_concurrent_batches: int = 2, max_queue_size: int = 10_000, on_batch=None):
+        """
+        :param predict_batch: callable mapping a list of records to one result per record (runs in the executor)
+        :param executor: executor the model calls run in
+        :param max_batch_size: records per model call at most
+        :param max_wait_ms: longest time the first record of a batch waits for more records
+        :param max_concurrent_batches: model calls in flight at once, at most the executor's workers
+        :param max_queue_size: waiting requests above which submit fails fast instead of queueing
+        :param on_batch: optional callable receiving the records of every scored batch, called on the event loop
+                         so it must only hand them off (e.g. ServingProfile.observe)
+        """
+        self.predict_batch = predict_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_queue_size = max_queue_size
+        self.on_batch = on_batch
+        self.stats = {"requests": 0, "batches": 0, "rejected": 0, "max_batch_size_seen": 0, "model_seconds": 0.0}
+        self._queue = None
+        self._slots = None
+        self._worker = None
+        self._in_flight = set()
+
+    async def start(self) -> None:
+        # queue and semaphore bind to the running loop, so they are created here and not in __init__
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        """
+        Stop collecting, let the batches in flight finish and fail the requests still queued
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction service is shutting down"))
+
+    async def submit(self, record):
+        """
+        Queue one record and return its result once the batch holding it has been scored
+        """
+        if self._worker is None:
+            raise RuntimeError("MicroBatcher is not started")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((record, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise QueueFullError(f"{self.max_queue_size} requests are already waiting")
+        self.stats["requests"] += 1
+        return await future
+
+    async def submit_many(self, records: list) -> list:
+        """
+        Score a list of records that already is a batch. It is split into chunks of max_batch_size and every
+        chunk waits for a model call slot like a collected batch, so a long list shares the executor with the
+        single record requests instead of bypassing the max_concurrent_batches bound.
+        """
+        if self._worker is None:
+            raise RuntimeError("MicroBatcher is not started")
+        self.stats["requests"] += 1
+        chunks = [records[start:start + self.max_batch_size] for start in range(0, len(records), self.max_batch_size)]
+        results = await asyncio.gather(*(self._score_chunk(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+
+    async def _score_chunk(self, records: list) -> list:
+        async with self._slots:
+            return await self._predict(records)
+
+    async def _predict(self, records: list) -> list:
+        """
+        One model call in the executor, the caller holds a model call slot
+        """
+        start = time.perf_counter()
+        results = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict_batch, records)
+        self.stats["batches"] += 1
+        self.stats["model_seconds"] += time.perf_counter() - start
+        self.stats["max_batch_size_seen"] = max(self.stats["max_batch_size_seen"], len(records))
+        if self.on_batch is not None:
+            try:
+                self.on_batch(records)
+            except Exception as e:
+                # monitoring must never fail a prediction
+                logging.error(f"on_batch failed for a batch of {len(records)} records: {e}")
+        return results
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # only start a batch once a model call slot is free, requests arriving meanwhile join it
+            await self._slots.acquire()
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                # stopped while collecting, the records taken off the queue would otherwise wait forever
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Prediction service is shutting down"))
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._flush(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            batch = [(record, future) for record, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            try:
+                results = await self._predict([record for record, _ in batch])
+            except Exception as e:
+                logging.error(f"Batch of {len(batch)} records failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
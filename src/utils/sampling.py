@@ -0,0 +1,101 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from src.exception import MyException
+
+
+def stratified_fold_ids(y: np.ndarray, n_splits: int, random_state: int = 42) -> np.ndarray:
+    """
+    Assign every row to one of n_splits folds with the class ratio of y preserved in each fold
+    y: np.ndarray class labels
+    return: np.ndarray int8 fold id per row
+    """
+    try:
+        if n_splits > np.iinfo(np.int8).max:
+            raise ValueError(f"At most {np.iinfo(np.int8).max} folds fit in an int8 fold array, got {n_splits}")
+        y = np.asarray(y)
+        rng = np.random.default_rng(random_state)
+        folds = np.empty(len(y), dtype=np.int8)
+        offset = 0
+        for label in np.unique(y):
+            rows = np.flatnonzero(y == label)
+            # shuffled rows of the class dealt round robin, the start fold rotates so fold sizes stay even
+            folds[rng.permutation(rows)] = (np.arange(len(rows)) + offset) % n_splits
+            offset += len(rows)
+        return folds
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def fold_indices(folds: np.ndarray, fold: int) -> tuple:
+    """
+    Return (train_index, valid_index) of one fold of a fold id array
+    """
+    valid = folds == fold
+    return np.flatnonzero(~valid), np.flatnonzero(valid)
+
+
+def undersample_indices(y: np.ndarray, index: np.ndarray = None, random_state: int = 42) -> np.ndarray:
+    """
+    Randomly keep the same number of rows of every class, as a sorted index array (no data is copied)
+    y: np.ndarray class labels of all rows
+    index: np.ndarray optional rows to sample from, e.g. the training rows of a fold; defaults to all rows
+    """
+    try:
+        index = np.arange(len(y)) if index is None else np.asarray(index)
+        labels = np.asarray(y)[index]
+        classes, counts = np.unique(labels, return_counts=True)
+        n_per_class = counts.min()
+        rng = np.random.default_rng(random_state)
+        kept = [rng.choice(index[labels == label], size=n_per_class, replace=False) for label in classes]
+        return np.sort(np.concatenate(kept))
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def fold_balanced_indices(y: np.ndarray, folds: np.ndarray, random_state: int = 42) -> np.ndarray:
+    """
+    Undersample every fold separately, so the rows of any set of folds taken from the result are balanced
+    return: np.ndarray sorted int64 row index
+    """
+    try:
+        kept = [undersample_indices(y, np.flatnonzero(folds == fold), random_state + int(fold)) for fold in np.unique(folds)]
+        return np.sort(np.concatenate(kept)).astype(np.int64)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def balanced_sample_weights(y: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Per row weight n_rows / (n_classes * n_rows_of_class), every class gets the same total weight
+    """
+    try:
+        classes, inverse, counts = np.unique(np.asarray(y), return_inverse=True, return_counts=True)
+        return (len(y) / (len(classes) * counts))[inverse].astype(dtype)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def hash_test_mask(keys, test_ratio: float) -> np.ndarray:
+    """
+    True for the rows assigned to the test set, from a stable hash of their key (e.g. the id column).
+    A row's assignment only depends on its own key, so it is the same chunk by chunk, run after run and
+    when new rows are added.
+    keys: array-like split key of every row
+    test_ratio: float expected fraction of test rows
+    """
+    try:
+        keys = np.asarray(keys)
+        if keys.dtype.kind == "f" and np.all(np.mod(keys, 1) == 0):
+            keys = keys.astype(np.int64)
+        if keys.dtype.kind in "iub":
+            # the hash of a number depends on its width, int32 and int64 ids must land in the same set
+            keys = keys.astype(np.int64)
+        elif keys.dtype.kind != "f":
+            keys = keys.astype(str).astype(object)
+        hashes = pd.util.hash_array(keys, categorize=False)
+        # top 53 bits as a uniform number in [0, 1)
+        return (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53) < test_ratio
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -0,0 +1,210 @@
+import sys
+import numpy as np
+
+from src.exception import MyException
+
+
+class QuantileSketch:
+    """
+    Fixed size, mergeable summary of a numeric stream for approximate quantiles.
+
+    The sketch keeps at most `size` weighted points. Whenever it grows past that, the points are
+    sorted and replaced by `size` equally weighted points at evenly spaced ranks, so memory stays
+    constant no matter how many values are added. Sketches built on separate chunks, partitions or
+    workers are combined with merge(). Exact count, min and max are tracked alongside.
+    """
+    def __init__(self, size: int = 2048):
+        """
+        :param size: number of points kept, the rank error is roughly 1 / size per compaction level
+        """
+        self.size = size
+        self.values = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.n_missing = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _compress(self) -> None:
+        if len(self.values) <= self.size:
+            return
+        order = np.argsort(self.values, kind="stable")
+        values, weights = self.values[order], self.weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        targets = (np.arange(self.size) + 0.5) * (total / self.size)
+        index = np.minimum(np.searchsorted(cumulative, targets), len(values) - 1)
+        self.values = values[index]
+        self.weights = np.full(self.size, total / self.size)
+
+    def update(self, values) -> "QuantileSketch":
+        """
+        Add a batch of values, NaNs are only counted as missing
+        """
+        try:
+            values = np.asarray(values, dtype=np.float64).ravel()
+            missing = np.isnan(values)
+            self.n_missing += int(missing.sum())
+            values = values[~missing]
+            if len(values) == 0:
+                return self
+            self.count += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.values = np.concatenate([self.values, values])
+            self.weights = np.concatenate([self.weights, np.ones(len(values))])
+            self._compress()
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Fold another sketch into this one
+        """
+        try:
+            self.count += other.count
+            self.n_missing += other.n_missing
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self.values = np.concatenate([self.values, other.values])
+            self.weights = np.concatenate([self.weights, other.weights])
+            self._compress()
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) for q in [0, 1], NaN for an empty sketch
+        """
+        try:
+            q = np.asarray(q, dtype=np.float64)
+            if self.count == 0:
+                return np.full(q.shape, np.nan)
+            order = np.argsort(self.values, kind="stable")
+            values, weights = self.values[order], self.weights[order]
+            # rank of each point at the middle of its weight, interpolated like pandas' linear method
+            cumulative = np.cumsum(weights)
+            positions = (cumulative - weights / 2) / cumulative[-1]
+            result = np.interp(q, positions, values)
+            result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+            return result
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def cdf(self, x):
+        """
+        Approximate fraction of values <= x
+        """
+        order = np.argsort(self.values, kind="stable")
+        values, weights = self.values[order], self.weights[order]
+        if len(values) == 0:
+            return np.zeros(np.shape(x))
+        cumulative = np.cumsum(weights) / weights.sum()
+        index = np.searchsorted(values, np.asarray(x, dtype=np.float64), side="right")
+        return np.where(index == 0, 0.0, cumulative[np.maximum(index - 1, 0)])
+
+    def to_dict(self) -> dict:
+        """
+        JSON serializable state, restored with from_dict
+        """
+        return {
+            "size": self.size, "count": self.count, "n_missing": self.n_missing,
+            "min": self.min, "max": self.max,
+            "values": self.values.tolist(), "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(size=state["size"])
+        sketch.count, sketch.n_missing = state["count"], state["n_missing"]
+        sketch.min, sketch.max = state["min"], state["max"]
+        sketch.values = np.asarray(state["values"], dtype=np.float64)
+        sketch.weights = np.asarray(state["weights"], dtype=np.float64)
+        return sketch
+
+
+class CategoryCounts:
+    """
+    Fixed size, mergeable count table of a categorical stream.
+
+    One counter per category of a fixed vocabulary plus one for values outside it and one for
+    missing values, so memory does not depend on the number of rows or on unseen values.
+    """
+    MISSING_VALUES = (None, "na")
+
+    def __init__(self, categories: list):
+        """
+        :param categories: vocabulary of the column, e.g. from the schema 'categories' section
+        """
+        self.categories = list(categories)
+        self._index = {category: i for i, category in enumerate(self.categories)}
+        self.counts = np.zeros(len(self.categories), dtype=np.int64)
+        self.n_other = 0
+        self.n_missing = 0
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.n_other
+
+    def update_codes(self, codes) -> "CategoryCounts":
+        """
+        Add a batch of category codes in vocabulary order, -1 is missing (pandas .cat.codes)
+        """
+        try:
+            codes = np.asarray(codes)
+            valid = codes >= 0
+            self.counts += np.bincount(codes[valid], minlength=len(self.categories))
+            self.n_missing += int(len(codes) - valid.sum())
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def update(self, values) -> "CategoryCounts":
+        """
+        Add a batch of raw values (e.g. single prediction requests), unknown values go to the other counter
+        """
+        try:
+            for value in values:
+                if value in self.MISSING_VALUES or (isinstance(value, float) and np.isnan(value)):
+                    self.n_missing += 1
+                elif value in self._index:
+                    self.counts[self._index[value]] += 1
+                else:
+                    self.n_other += 1
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def merge(self, other: "CategoryCounts") -> "CategoryCounts":
+        """
+        Fold another count table over the same vocabulary into this one
+        """
+        try:
+            if other.categories != self.categories:
+                raise ValueError("Cannot merge category counts over different vocabularies")
+            self.counts += other.counts
+            self.n_other += other.n_other
+            self.n_missing += other.n_missing
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def frequencies(self) -> np.ndarray:
+        """
+        Counts of the categories, the other bucket and the missing bucket as fractions of all values
+        """
+        counts = np.append(self.counts, [self.n_other, self.n_missing]).astype(np.float64)
+        total = counts.sum()
+        return counts / total if total else counts
+
+    def to_dict(self) -> dict:
+        return {"categories": self.categories, "counts": self.counts.tolist(), "n_other": self.n_other, "n_missing": self.n_missing}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "CategoryCounts":
+        table = cls(state["categories"])
+        table.counts = np.asarray(state["counts"], dtype=np.int64)
+        table.n_other, table.n_missing = state["n_other"], state["n_missing"]
+        return table
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import ast
+import hashlib
+from dataclasses import fields, is_dataclass
+
+from src.constants import STAGE_CACHE_DIR
+from src.exception import MyException
+from src.logger import logging
+
+
+class StageCache:
+    """
+    Content addressed cache of pipeline stage artifacts.
+
+    A stage is keyed by the hash of its input files, its config object (with the run specific
+    artifacts directory stripped from paths) and the source code of the modules implementing it,
+    including every module of the package they import, directly or inside a function.
+    On a hit the artifact recorded by an earlier run is returned, its files are reused in place.
+    """
+    def __init__(self, cache_dir: str = STAGE_CACHE_DIR, artifacts_dir: str = None):
+        """
+        :param cache_dir: directory holding one manifest per (stage, key)
+        :param artifacts_dir: run specific artifacts directory, removed from config values before hashing
+        """
+        try:
+            self.cache_dir = cache_dir
+            self.artifacts_dir = artifacts_dir
+            self._file_hashes = {}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _hash_file(self, file_path: str)-> str:
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    digest.update(block)
+            self._file_hashes[memo_key] = digest.hexdigest()
+        return self._file_hashes[memo_key]
+
+    def _config_state(self, config: object)-> dict:
+        state = {}
+        for name in dir(config):
+            if name.startswith("_"):
+                continue
+            value = getattr(config, name)
+            if callable(value):
+                continue
+            if isinstance(value, str) and self.artifacts_dir:
+                value = value.replace(self.artifacts_dir, "<artifacts_dir>")
+            state[name] = repr(value)
+        return state
+
+    @staticmethod
+    def source_files(module_names: list, package: str = "src")-> list:
+        """
+        Return the source files of the modules and of every module of package they import, transitively.
+        The imports are read from the source without importing anything, so the lazy imports inside
+        functions count as well, and the __init__ of every parent package is included since importing
+        a module runs it.
+        """
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(sys.modules[package].__file__)))
+        files, pending, seen = {}, list(module_names), set()
+        while pending:
+            module_name = pending.pop()
+            if module_name in seen or not (module_name == package or module_name.startswith(f"{package}.")):
+                continue
+            seen.add(module_name)
+            module_path = os.path.join(root_dir, *module_name.split("."))
+            # a name imported from a module (`from src.utils.main_utils import load_object`) has no file
+            file_path = next((f for f in (f"{module_path}.py", os.path.join(module_path, "__init__.py")) if os.path.isfile(f)), None)
+            if file_path is None:
+                continue
+            files[module_name] = file_path
+            if "." in module_name:
+                pending.append(module_name.rsplit(".", 1)[0])
+            with open(file_path, "r") as source_file:
+                tree = ast.parse(source_file.read(), filename=file_path)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    pending.extend(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                    pending.append(node.module)
+                    # `from src.utils import main_utils` imports a submodule, not a name
+                    pending.extend(f"{node.module}.{alias.name}" for alias in node.names)
+        return [files[name] for name in sorted(files)]
+
+    def compute_key(self, stage_name: str, config: object, input_files: list, code_modules: list)-> str:
+        """
+        Return the cache key of a stage run
+        stage_name: str name of the stage
+        config: stage config object (e.g. DataTransformationConfig)
+        input_files: list of files the stage reads
+        code_modules: list of modules implementing the stage, the package modules they import are hashed with them
+        """
+        try:
+            module_names = [module if isinstance(module, str) else module.__name__ for module in code_modules]
+            payload = {
+                "stage": stage_name,
+                "config": self._config_state(config),
+                "inputs": [self._hash_file(file_path) for file_path in input_files],
+                "code": {
+                    os.path.relpath(file_path): self._hash_file(file_path) for file_path in self.source_files(module_names)
+                },
+            }
+            return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _manifest_path(self, stage_name: str, key: str)-> str:
+        return os.path.join(self.cache_dir, stage_name, f"{key}.json")
+
+    def load(self, stage_name: str, key: str, artifact_cls: type):
+        """
+        Return the cached artifact for key or None when missing or when its files were removed
+        """
+        try:
+            manifest_path = self._manifest_path(stage_name, key)
+            if not os.path.exists(manifest_path):
+                return None
+            with open(manifest_path, "r") as manifest_file:
+                values = json.load(manifest_file)
+            artifact = artifact_cls(**values)
+            missing = [value for name, value in values.items() if name.endswith("file_path") and not os.path.exists(value)]
+            if missing:
+                logging.info(f"Stage cache entry for [{stage_name}] is stale, missing files: {missing}")
+                return None
+            logging.info(f"Stage cache hit for [{stage_name}] key {key[:12]}")
+            return artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def store(self, stage_name: str, key: str, artifact: object)-> None:
+        """
+        Record the artifact of a finished stage run under key, in-memory fields are not stored
+        """
+        try:
+            if not is_dataclass(artifact):
+                raise TypeError(f"Stage artifact must be a dataclass, got {type(artifact)}")
+            values = {f.name: getattr(artifact, f.name) for f in fields(artifact) if not f.metadata.get("in_memory")}
+            manifest_path = self._manifest_path(stage_name, key)
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            with open(manifest_path, "w") as manifest_file:
+                json.dump(values, manifest_file, indent=4)
+            logging.info(f"Stored stage cache entry for [{stage_name}] key {key[:12]}")
+        except Exception as e:
+            raise MyException(e, sys)
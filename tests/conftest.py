@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # config/schema.yaml and the artifact paths are relative to the repository root
+    monkeypatch.chdir(ROOT_DIR)
+    return ROOT_DIR
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.utils.micro_batcher import QueueFullError
+
+RECORD = {
+    "id": 0, "annual_income": 52_000.0, "debt_to_income_ratio": 0.2, "credit_score": 690.0, "loan_amount": 12_000.0,
+    "interest_rate": 11.5, "gender": "Female", "marital_status": "Single", "education_level": "Bachelor's",
+    "employment_status": "Employed", "loan_purpose": "Car", "grade_subgrade": "B2",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # no lifespan: the model is not loaded and the batcher is replaced per test
+    monkeypatch.setattr(app_module.classifier, "load_model", lambda: SimpleNamespace(threshold=0.5))
+    return TestClient(app_module.app)
+
+
+def test_full_queue_is_reported_as_503(client, monkeypatch):
+    async def submit(record):
+        raise QueueFullError("2 requests are already waiting")
+    monkeypatch.setattr(app_module.batcher, "submit", submit)
+
+    response = client.post("/predict", json=RECORD)
+
+    assert response.status_code == 503
+    assert "already waiting" in response.json()["detail"]
+
+
+def test_record_without_id_is_rejected_with_422(client, monkeypatch):
+    async def submit(record):
+        raise AssertionError("a record without its id must not reach the model")
+    monkeypatch.setattr(app_module.batcher, "submit", submit)
+
+    response = client.post("/predict", json={name: value for name, value in RECORD.items() if name != "id"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "id"]
+
+
+def test_batch_goes_through_the_batcher(client, monkeypatch):
+    submitted = []
+
+    async def submit_many(records):
+        submitted.append(records)
+        return [0.2, 0.7]
+    monkeypatch.setattr(app_module.batcher, "submit_many", submit_many)
+
+    response = client.post("/predict/batch", json=[RECORD, {**RECORD, "id": 1}])
+
+    assert response.status_code == 200
+    assert response.json() == [{"probability": 0.2, "loan_paid_back": 0}, {"probability": 0.7, "loan_paid_back": 1}]
+    assert [record["id"] for record in submitted[0]] == [0, 1]
+
+
+def test_oversized_batch_is_rejected_with_422(client, monkeypatch):
+    monkeypatch.setattr(app_module, "PREDICTION_MAX_BATCH_RECORDS", 2)
+
+    async def submit_many(records):
+        raise AssertionError("an oversized batch must not reach the model")
+    monkeypatch.setattr(app_module.batcher, "submit_many", submit_many)
+
+    response = client.post("/predict/batch", json=[RECORD] * 3)
+
+    assert response.status_code == 422
+    assert "At most 2 records" in response.json()["detail"]
+
+
+def test_drift_compares_served_records_with_the_baseline(client, monkeypatch, tmp_path):
+    from src.utils.drift import DatasetProfile, ServingProfile
+    from src.utils.main_utils import read_yaml_file
+
+    schema_config = read_yaml_file(app_module.SCHEMA_FILE_PATH)
+    baseline_file_path = str(tmp_path / "drift_baseline" / "profile.json")
+    monkeypatch.setattr(app_module, "DATA_DRIFT_BASELINE_FILE_PATH", baseline_file_path)
+    assert client.get("/drift").status_code == 404
+
+    DatasetProfile.from_schema(schema_config).update_records([RECORD] * 100).save(baseline_file_path)
+    serving_profile = ServingProfile(schema_config, str(tmp_path / "serving_profile" / "profile.json"))
+    monkeypatch.setattr(app_module, "serving_profile", serving_profile)
+    serving_profile.observe([{**RECORD, "loan_purpose": "Home"}] * 100)
+
+    response = client.get("/drift")
+    serving_profile.close()
+
+    assert response.status_code == 200
+    assert response.json()["drifted_columns"] == ["loan_purpose"]
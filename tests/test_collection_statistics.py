@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("mongomock")
+
+from src.components.data_validation import DataValidation
+from src.entity.config_entity import DataValidationConfig
+from tests.test_proj1_data import COLLECTION, make_documents, make_proj1_data
+
+NUMERICAL_STATISTICS = ("dtype", "null_count", "min", "max", "is_integral")
+
+
+@pytest.fixture
+def validation():
+    return DataValidation(data_ingestion_artifact=None, data_validation_config=DataValidationConfig())
+
+
+def both_statistics(validation: DataValidation, documents: list) -> tuple:
+    """
+    Server side statistics of the documents and DataValidation statistics of the frame they load as
+    ('na' and missing fields become NaN)
+    """
+    proj1_data = make_proj1_data(documents)
+    server = proj1_data.compute_collection_statistics(COLLECTION)
+    columns = proj1_data._schema_config["columns"]
+    dataframe = pd.DataFrame(documents, columns=columns).replace("na", np.nan).infer_objects()
+    return server, validation.compute_statistics(dataframe), len(dataframe)
+
+
+def assert_statistics_agree(server: dict, local: dict, n_rows: int, numerical_columns: list, categorical_columns: list):
+    assert server["n_rows"] == n_rows
+    for column in numerical_columns:
+        expected = dict(local[column])
+        # pandas only checks integrality of float columns, integer columns are integral by dtype
+        expected.setdefault("is_integral", True)
+        actual = {name: server["columns"][column][name] for name in NUMERICAL_STATISTICS}
+        assert actual["dtype"] == expected["dtype"], column
+        assert actual["null_count"] == expected["null_count"], column
+        assert actual["is_integral"] == expected["is_integral"], column
+        assert actual["min"] == pytest.approx(expected["min"]) and actual["max"] == pytest.approx(expected["max"]), column
+    for column in categorical_columns:
+        for name in ("null_count", "categories", "cardinality"):
+            assert server["columns"][column][name] == local[column][name], (column, name)
+
+
+def test_statistics_of_a_clean_collection_agree(validation):
+    server, local, n_rows = both_statistics(validation, make_documents(300))
+    schema = validation._schema_config
+
+    assert_statistics_agree(server, local, n_rows, ["id"] + schema["numerical_columns"], schema["calegorical_columns"])
+    assert DataValidation.check_statistics(server["columns"], schema) == []
+    assert DataValidation.check_statistics(local, schema) == []
+
+
+def test_na_none_and_missing_fields_count_as_null_on_both_sides(validation):
+    documents = make_documents(300)
+    documents[0]["credit_score"] = "na"
+    documents[1]["credit_score"] = None
+    del documents[2]["credit_score"]
+    documents[3]["annual_income"] = "na"
+    documents[4]["gender"] = "na"
+    documents[5]["gender"] = None
+    del documents[6]["gender"]
+    documents[7]["loan_purpose"] = None
+    server, local, n_rows = both_statistics(validation, documents)
+    schema = validation._schema_config
+
+    assert_statistics_agree(server, local, n_rows, ["id"] + schema["numerical_columns"], schema["calegorical_columns"])
+    assert server["columns"]["credit_score"]["null_count"] == 3
+    assert server["columns"]["annual_income"]["null_count"] == 1
+    assert server["columns"]["gender"]["null_count"] == 3
+    assert server["columns"]["gender"]["count"] == n_rows - 3
+    # nulls in nullable float columns are reported but are no error, a null category fails the check
+    expected_errors = ["gender: 3 null values", "loan_purpose: 1 null values"]
+    assert DataValidation.check_statistics(server["columns"], schema) == expected_errors
+    assert DataValidation.check_statistics(local, schema) == expected_errors
+
+
+def test_range_category_and_not_null_violations_are_reported_the_same(validation):
+    documents = make_documents(300)
+    documents[0]["interest_rate"] = 120.0
+    documents[1]["credit_score"] = 250
+    documents[2]["loan_purpose"] = "Boat"
+    documents[3]["grade_subgrade"] = "Z9"
+    documents[4]["loan_paid_back"] = None
+    documents[5]["loan_paid_back"] = 2
+    server, local, n_rows = both_statistics(validation, documents)
+    schema = validation._schema_config
+
+    assert_statistics_agree(server, local, n_rows, ["id"] + schema["numerical_columns"], schema["calegorical_columns"])
+    server_errors = DataValidation.check_statistics(server["columns"], schema)
+    assert server_errors == DataValidation.check_statistics(local, schema)
+    assert any(error.startswith("interest_rate: values [") for error in server_errors)
+    assert any(error.startswith("credit_score: values [250.0, ") for error in server_errors)
+    assert "loan_purpose: unknown categories ['Boat']" in server_errors
+    assert "grade_subgrade: unknown categories ['Z9']" in server_errors
+    assert "loan_paid_back: 1 null values" in server_errors
+    assert any(error.startswith("loan_paid_back: dtype float64 does not conform") for error in server_errors)
+    assert "loan_paid_back: values [0.0, 2.0] outside [0, 1]" in server_errors
+
+
+def test_fractional_and_non_numeric_values_fail_the_integer_dtype_on_both_sides(validation):
+    documents = make_documents(100)
+    documents[0]["id"] = 0.5
+    documents[1]["loan_paid_back"] = "yes"
+    server, local, _ = both_statistics(validation, documents)
+    schema = validation._schema_config
+
+    assert server["columns"]["id"]["is_integral"] is False and local["id"]["is_integral"] is False
+    assert server["columns"]["loan_paid_back"]["dtype"] == local["loan_paid_back"]["dtype"] == "object"
+    for errors in (DataValidation.check_statistics(server["columns"], schema), DataValidation.check_statistics(local, schema)):
+        assert any(error.startswith("id: dtype float64 does not conform") for error in errors)
+        assert any(error.startswith("loan_paid_back: dtype object does not conform") for error in errors)
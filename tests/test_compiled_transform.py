@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from src.components.data_transformation import DataTransformation
+from src.constants import TARGET_COLUMN
+from src.entity.config_entity import DataTransformationConfig
+from tests.test_proj1_data import make_documents
+
+
+@pytest.fixture
+def transformation():
+    return DataTransformation(data_ingestion_artifact=None, data_transformation_config=DataTransformationConfig(),
+                              data_validation_artifact=None)
+
+
+@pytest.fixture
+def raw_rows():
+    documents = make_documents(2_000)
+    # outliers past the clipping bounds, missing numbers, missing and unknown categories
+    documents[0]["annual_income"] = 5e7
+    documents[1]["loan_amount"] = 1e-3
+    documents[2]["credit_score"] = None
+    documents[3]["interest_rate"] = None
+    documents[4]["gender"] = None
+    documents[5]["grade_subgrade"] = "Z9"
+    documents[6]["employment_status"] = "Astronaut"
+    documents[7]["education_level"] = None
+    documents[8]["loan_purpose"] = "Boat"
+    return documents
+
+
+def unknown_as_missing(transformation: DataTransformation, raw_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Training data with the unknown categories blanked, ingestion rejects them while serving encodes them as missing
+    """
+    return raw_df.assign(**{
+        column: raw_df[column].where(raw_df[column].isin(dtype.categories))
+        for column, dtype in transformation._categorical_dtypes.items()
+    })
+
+
+def fit_pandas_path(transformation: DataTransformation, raw_df: pd.DataFrame) -> tuple:
+    """
+    The pandas/sklearn feature path of initiate_data_transformation, returns (compiled transform, expected features)
+    """
+    train_df = transformation.apply_schema_dtypes(unknown_as_missing(transformation, raw_df))
+    categories = transformation.fit_categorical_encoders(train_df)
+    outlier_clipper = transformation.fit_outlier_clipper(train_df)
+    model_input = transformation.build_model_input(train_df, outlier_clipper, categories).drop(columns=[TARGET_COLUMN])
+    expected, _, scaler = transformation.standerd_scale_data(model_input.to_numpy(dtype=np.float64),
+                                                             model_input.to_numpy(dtype=np.float64)[:1])
+    compiled = transformation.compile_feature_transform(outlier_clipper, categories, scaler, list(model_input.columns))
+    return compiled, expected
+
+
+def test_compiled_transform_matches_pandas_path_on_dataframe_rows(transformation, raw_rows):
+    raw_df = pd.DataFrame(raw_rows)
+    compiled, expected = fit_pandas_path(transformation, raw_df)
+
+    features = compiled.transform(raw_df[compiled.raw_columns].to_numpy(dtype=object))
+
+    assert features.shape == expected.shape
+    np.testing.assert_allclose(features, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_compiled_transform_matches_pandas_path_on_record_dicts(transformation, raw_rows):
+    compiled, expected = fit_pandas_path(transformation, pd.DataFrame(raw_rows))
+    out = np.full((len(raw_rows) + 10, expected.shape[1]), np.inf)
+
+    single = compiled.transform(raw_rows[4])
+    batch = compiled.transform(raw_rows, out=out)
+
+    np.testing.assert_allclose(single, expected[4:5], rtol=1e-12, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(batch, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+    assert np.isinf(out[len(raw_rows):]).all()
+
+
+def test_compiled_transform_matches_chunked_scaler(transformation, raw_rows):
+    raw_df = transformation.apply_schema_dtypes(unknown_as_missing(transformation, pd.DataFrame(raw_rows)))
+    categories = transformation.fit_categorical_encoders(raw_df)
+    outlier_clipper = transformation.fit_outlier_clipper(raw_df)
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    chunks = [raw_df.iloc[start:start + 300] for start in range(0, len(raw_df), 300)]
+    for chunk in chunks:
+        scaler.partial_fit(transformation.build_model_input(chunk, outlier_clipper, categories)
+                           .drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64))
+    model_input = transformation.build_model_input(chunks[0], outlier_clipper, categories).drop(columns=[TARGET_COLUMN])
+    compiled = transformation.compile_feature_transform(outlier_clipper, categories, scaler, list(model_input.columns))
+
+    expected = scaler.transform(model_input.to_numpy(dtype=np.float64))
+    features = compiled.transform(pd.DataFrame(raw_rows[:300])[compiled.raw_columns].to_numpy(dtype=object))
+
+    np.testing.assert_allclose(features, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
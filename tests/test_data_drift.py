@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_drift import DataDrift
+from src.constants import DATA_DRIFT_KS_THRESHOLD, DATA_DRIFT_PSI_THRESHOLD, SCHEMA_FILE_PATH
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.entity.config_entity import DataDriftConfig
+from src.utils.drift import DatasetProfile, ServingProfile, compare_profiles
+from src.utils.main_utils import read_yaml_file
+from src.utils.micro_batcher import MicroBatcher
+
+
+def make_loans(n_rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(n_rows),
+        "annual_income": rng.uniform(5_000, 200_000, n_rows),
+        "debt_to_income_ratio": rng.uniform(0, 0.6, n_rows),
+        "credit_score": rng.integers(300, 851, n_rows).astype(float),
+        "loan_amount": rng.uniform(500, 50_000, n_rows),
+        "interest_rate": rng.uniform(3, 25, n_rows),
+        "gender": rng.choice(["Female", "Male", "Other"], n_rows),
+        "marital_status": rng.choice(["Divorced", "Married", "Single", "Widowed"], n_rows),
+        "education_level": rng.choice(["Bachelor's", "High School", "Master's", "Other", "PhD"], n_rows),
+        "employment_status": rng.choice(["Employed", "Retired", "Self-employed", "Student", "Unemployed"], n_rows),
+        "loan_purpose": rng.choice(["Business", "Car", "Education", "Home", "Other"], n_rows),
+        "grade_subgrade": rng.choice(["A1", "B2", "C3", "D4", "E5", "F1"], n_rows),
+        "loan_paid_back": rng.integers(0, 2, n_rows),
+    })
+
+
+@pytest.fixture
+def drift_config(tmp_path):
+    data_drift_dir = str(tmp_path / "data_drift")
+    return DataDriftConfig(
+        data_drift_dir=data_drift_dir,
+        drift_report_file_path=os.path.join(data_drift_dir, "report.json"),
+        train_profile_file_path=os.path.join(data_drift_dir, "train_profile.json"),
+        baseline_profile_file_path=str(tmp_path / "drift_baseline" / "profile.json"),
+    )
+
+
+def run_drift(drift_config: DataDriftConfig, seed: int):
+    ingestion = DataIngestionArtifact(trained_file_path="", test_file_path="",
+                                      train_df=make_loans(2_000, seed), test_df=make_loans(500, seed + 1))
+    artifact = DataDrift(ingestion, drift_config).initiate_data_drift()
+    with open(artifact.drift_report_file_path) as report_file:
+        return artifact, json.load(report_file)
+
+
+def test_drift_stage_leaves_the_baseline_alone(drift_config):
+    artifact, report = run_drift(drift_config, seed=0)
+
+    assert os.path.exists(artifact.train_profile_file_path)
+    assert "baseline_vs_train" not in report
+    assert not os.path.exists(drift_config.baseline_profile_file_path)
+
+
+def test_later_runs_compare_against_the_promoted_baseline(drift_config):
+    first, _ = run_drift(drift_config, seed=0)
+    # what the model pusher does once the first model is accepted
+    os.makedirs(os.path.dirname(drift_config.baseline_profile_file_path))
+    shutil.copyfile(first.train_profile_file_path, drift_config.baseline_profile_file_path)
+    with open(drift_config.baseline_profile_file_path) as baseline_file:
+        promoted_baseline = baseline_file.read()
+
+    _, report = run_drift(drift_config, seed=10)
+
+    assert "baseline_vs_train" in report
+    with open(drift_config.baseline_profile_file_path) as baseline_file:
+        assert baseline_file.read() == promoted_baseline
+
+
+def serve(serving_profile: ServingProfile, loans: pd.DataFrame, batch_size: int = 256) -> DatasetProfile:
+    # requests carry the features only, the target column stays empty in the serving profile
+    records = loans.drop(columns=["loan_paid_back"]).to_dict("records")
+    for start in range(0, len(records), batch_size):
+        serving_profile.observe(records[start:start + batch_size])
+    return serving_profile.flush().result()
+
+
+@pytest.fixture
+def schema_config():
+    return read_yaml_file(SCHEMA_FILE_PATH)
+
+
+@pytest.fixture
+def baseline(drift_config, schema_config):
+    return DatasetProfile.from_schema(schema_config, drift_config.sketch_size).update(make_loans(5_000, seed=0))
+
+
+def test_serving_profile_without_drift_matches_the_baseline(baseline, schema_config, tmp_path):
+    serving_profile = ServingProfile(schema_config, str(tmp_path / "serving" / "profile.json"))
+    served = serve(serving_profile, make_loans(3_000, seed=1))
+    serving_profile.close()
+
+    comparison = compare_profiles(baseline, served, DATA_DRIFT_PSI_THRESHOLD, DATA_DRIFT_KS_THRESHOLD)
+
+    assert comparison["drift_detected"] is False
+    assert "loan_paid_back" not in comparison["columns"]
+    assert set(comparison["columns"]) == set(schema_config["numerical_columns"]) - {"loan_paid_back"} | set(schema_config["categories"])
+
+
+def test_serving_profile_detects_shifted_requests(baseline, schema_config, tmp_path):
+    serving_profile = ServingProfile(schema_config, str(tmp_path / "serving" / "profile.json"))
+    shifted = make_loans(3_000, seed=2)
+    shifted["interest_rate"] += 10
+    shifted["gender"] = "Other"
+    served = serve(serving_profile, shifted)
+    serving_profile.close()
+
+    comparison = compare_profiles(baseline, served, DATA_DRIFT_PSI_THRESHOLD, DATA_DRIFT_KS_THRESHOLD)
+
+    assert sorted(comparison["drifted_columns"]) == ["gender", "interest_rate"]
+
+
+def test_serving_profile_accumulates_across_flushes_and_restarts(schema_config, tmp_path):
+    file_path = str(tmp_path / "serving" / "profile.json")
+    serving_profile = ServingProfile(schema_config, file_path)
+    serve(serving_profile, make_loans(300, seed=3))
+    serve(serving_profile, make_loans(200, seed=4))
+    serving_profile.close()
+
+    restarted = ServingProfile(schema_config, file_path)
+    stored = serve(restarted, make_loans(100, seed=5))
+    restarted.close()
+
+    assert stored.numerical["credit_score"].count == 600
+    assert int(stored.categorical["loan_purpose"].counts.sum()) == 600
+    assert DatasetProfile.load(file_path).numerical["credit_score"].count == 600
+    assert not os.path.exists(f"{file_path}.tmp")
+
+
+def test_micro_batcher_feeds_the_serving_profile(schema_config, tmp_path):
+    serving_profile = ServingProfile(schema_config, str(tmp_path / "serving" / "profile.json"))
+    records = make_loans(50, seed=6).drop(columns=["loan_paid_back"]).to_dict("records")
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batcher = MicroBatcher(lambda batch: [0.5] * len(batch), executor, max_batch_size=16, max_wait_ms=1,
+                                   on_batch=serving_profile.observe)
+            await batcher.start()
+            await asyncio.gather(*(batcher.submit(record) for record in records[:20]), batcher.submit_many(records[20:]))
+            await batcher.stop()
+
+    asyncio.run(main())
+    stored = serving_profile.flush().result()
+    serving_profile.close()
+
+    assert serving_profile.n_observed == 50
+    assert stored.numerical["annual_income"].count == 50
@@ -0,0 +1,114 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("pyarrow")
+
+from src.components import data_ingestion as data_ingestion_module
+from src.components.data_ingestion import DataIngestion
+from src.constants import DATABASE_NAME
+from src.data_access.proj1_data import Proj1Data
+from src.entity.config_entity import DataIngestionConfig
+from src.exception import MyException
+from src.utils.main_utils import dataframe_part_files, read_dataframe
+from src.utils.sampling import hash_test_mask
+from tests.test_proj1_data import make_documents
+
+COLLECTION = "loans"
+
+
+@pytest.fixture
+def store(tmp_path):
+    client = mongomock.MongoClient()
+    collection = client[DATABASE_NAME][COLLECTION]
+    proj1_data = Proj1Data(mongo_client=SimpleNamespace(client=client, database=client[DATABASE_NAME]))
+    config = DataIngestionConfig()
+    config.collection_name = COLLECTION
+    config.incremental = True
+    config.persistent_feature_store_file_path = str(tmp_path / "feature_store" / "data.parquet")
+    config.watermark_file_path = str(tmp_path / "feature_store" / "watermark.json")
+    return SimpleNamespace(collection=collection, proj1_data=proj1_data, ingestion=DataIngestion(config), config=config)
+
+
+def test_incremental_export_appends_only_new_rows(store):
+    documents = make_documents(300)
+    store.collection.insert_many([d for d in documents if d["id"] < 200])
+    first = store.ingestion.export_incremental(store.proj1_data)
+    store.collection.insert_many([d for d in documents if d["id"] >= 200])
+    second = store.ingestion.export_incremental(store.proj1_data)
+
+    assert len(first) == 200
+    assert sorted(second["id"]) == list(range(300))
+    # the new rows went into a second part file next to the first export
+    assert len(dataframe_part_files(store.config.persistent_feature_store_file_path)) == 2
+    with open(store.config.watermark_file_path) as watermark_file:
+        watermark = json.load(watermark_file)
+    assert watermark["value"] == 299 and watermark["rows"] == 300
+
+
+def test_incremental_export_retry_after_failed_watermark_write_does_not_duplicate(store, monkeypatch):
+    documents = make_documents(300)
+    store.collection.insert_many([d for d in documents if d["id"] < 200])
+    store.ingestion.export_incremental(store.proj1_data)
+    store.collection.insert_many([d for d in documents if d["id"] >= 200])
+
+    # the rows are appended to the store, then the run dies before the watermark is advanced
+    write_json_file = data_ingestion_module.write_json_file
+    monkeypatch.setattr(data_ingestion_module, "write_json_file", lambda *args: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(MyException):
+        store.ingestion.export_incremental(store.proj1_data)
+    with open(store.config.watermark_file_path) as watermark_file:
+        assert json.load(watermark_file)["value"] == 199
+
+    monkeypatch.setattr(data_ingestion_module, "write_json_file", write_json_file)
+    retried = store.ingestion.export_incremental(store.proj1_data)
+
+    assert sorted(retried["id"]) == list(range(300))
+    assert store.ingestion.read_watermark() == 299
+
+
+@pytest.fixture
+def chunked(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_ingestion_module, "Proj1Data", lambda: store.proj1_data)
+    config = store.config
+    config.incremental = False
+    config.chunked = True
+    config.chunk_size = 64
+    config.split_mode = "hash"
+    config.validate_before_export = True
+    config.feature_store_file_path = str(tmp_path / "ingested" / "loan_data.parquet")
+    config.training_file_path = str(tmp_path / "ingested" / "train.parquet")
+    config.testing_file_path = str(tmp_path / "ingested" / "test.parquet")
+    return store
+
+
+def test_chunked_ingestion_splits_by_key_hash(chunked):
+    chunked.collection.insert_many(make_documents(1_000))
+    artifact = chunked.ingestion.initiate_data_ingestion()
+
+    train, test = read_dataframe(artifact.trained_file_path), read_dataframe(artifact.test_file_path)
+    assert sorted(train["id"].tolist() + test["id"].tolist()) == list(range(1_000))
+    np.testing.assert_array_equal(hash_test_mask(test["id"].to_numpy(), chunked.config.train_test_split_ratio), True)
+    np.testing.assert_array_equal(hash_test_mask(train["id"].to_numpy(), chunked.config.train_test_split_ratio), False)
+
+
+def test_chunked_ingestion_runs_the_validation_gate_first(chunked):
+    documents = make_documents(1_000)
+    documents[500]["interest_rate"] = 120.0
+    chunked.collection.insert_many(documents)
+
+    with pytest.raises(MyException, match=r"Rejected \[loans\] before export: interest_rate"):
+        chunked.ingestion.initiate_data_ingestion()
+    assert not os.path.exists(chunked.config.training_file_path)
+
+
+def test_chunked_ingestion_rejects_a_random_split(chunked):
+    chunked.collection.insert_many(make_documents(100))
+    chunked.config.split_mode = "random"
+
+    with pytest.raises(MyException, match="split_mode 'hash'"):
+        chunked.ingestion.initiate_data_ingestion()
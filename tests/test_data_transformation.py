@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from src.components.data_transformation import DataTransformation
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.entity.config_entity import DataTransformationConfig
+from src.exception import MyException
+from src.utils.main_utils import apply_schema_dtypes, save_dataframe
+from tests.test_proj1_data import make_documents
+
+
+def test_chunked_transformation_rejects_an_empty_train_file(tmp_path):
+    config = DataTransformationConfig(chunk_size=64)
+    transformation = DataTransformation(data_ingestion_artifact=None, data_transformation_config=config,
+                                        data_validation_artifact=None)
+    loans = apply_schema_dtypes(pd.DataFrame(make_documents(100))[transformation._schema_config["columns"]],
+                                transformation._schema_dtypes)
+    train_file_path, test_file_path = str(tmp_path / "train.parquet"), str(tmp_path / "test.parquet")
+    save_dataframe(train_file_path, loans.iloc[:0])
+    save_dataframe(test_file_path, loans)
+    transformation.data_ingestion_artifact = DataIngestionArtifact(trained_file_path=train_file_path, test_file_path=test_file_path)
+
+    with pytest.raises(MyException, match="has no rows"):
+        transformation.initiate_chunked_data_transformation()
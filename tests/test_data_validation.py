@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_validation import DataValidation
+from src.entity.config_entity import DataValidationConfig
+from src.utils.main_utils import append_dataframe, apply_schema_dtypes, read_dataframe_schema, save_dataframe
+from tests.test_proj1_data import make_documents
+
+
+@pytest.fixture
+def validation():
+    return DataValidation(data_ingestion_artifact=None, data_validation_config=DataValidationConfig())
+
+
+@pytest.fixture
+def loans(validation):
+    return apply_schema_dtypes(pd.DataFrame(make_documents(200))[validation._schema_config["columns"]], validation._schema_dtypes)
+
+
+@pytest.mark.parametrize("file_name", ["train.parquet", "train.feather"])
+def test_file_and_dataframe_give_the_same_statistics(validation, loans, tmp_path, file_name):
+    file_path = str(tmp_path / file_name)
+    save_dataframe(file_path, loans)
+
+    from_file, file_errors = validation.validate_dataset("train", file_path)
+    from_frame, frame_errors = validation.validate_dataset("train", loans)
+
+    assert file_errors == frame_errors == []
+    assert from_file == from_frame
+
+
+def test_extra_stored_column_fails_the_check_without_being_read(validation, loans, tmp_path, monkeypatch):
+    file_path = str(tmp_path / "train.parquet")
+    append_dataframe(file_path, loans.assign(notes="x" * 100))
+    append_dataframe(file_path, loans.assign(notes="y"))
+    read_columns = []
+    read_data = DataValidation.read_data
+    monkeypatch.setattr(DataValidation, "read_data", staticmethod(
+        lambda file_path, columns=None, dtype=None: read_columns.append(columns) or read_data(file_path, columns, dtype)))
+
+    statistics, errors = validation.validate_dataset("train", file_path)
+
+    assert "notes" in read_dataframe_schema(file_path).columns
+    assert read_columns == [validation._schema_config["columns"]]
+    assert "notes" not in statistics["columns"]
+    assert statistics["n_rows"] == 2 * len(loans)
+    assert errors == ["Column are missing in train dataframe"]
+
+
+def test_missing_stored_column_is_reported(validation, loans, tmp_path):
+    file_path = str(tmp_path / "train.parquet")
+    save_dataframe(file_path, loans.drop(columns=["credit_score"]))
+
+    statistics, errors = validation.validate_dataset("train", file_path)
+
+    assert "Columns are missing in train dataframe" in errors
+    assert "credit_score" not in statistics["columns"]
+    assert statistics["columns"]["annual_income"]["null_count"] == 0
+    assert np.isfinite(statistics["columns"]["annual_income"]["max"])
+
+
+def test_missing_category_in_a_stored_file_fails_validation(validation, loans, tmp_path):
+    file_path = str(tmp_path / "train.parquet")
+    loans.loc[[3, 7], "employment_status"] = np.nan
+    save_dataframe(file_path, loans)
+
+    statistics, errors = validation.validate_dataset("train", file_path)
+
+    assert statistics["columns"]["employment_status"]["null_count"] == 2
+    assert errors == ["train employment_status: 2 null values"]
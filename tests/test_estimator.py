@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from src.components.data_transformation import DataTransformation
+from src.entity.config_entity import DataTransformationConfig
+from src.entity.estimator import LoanModel
+from tests.test_compiled_transform import fit_pandas_path
+from tests.test_proj1_data import make_documents
+
+
+class ConstantModel:
+    def predict_proba(self, x):
+        return np.tile([0.25, 0.75], (len(x), 1))
+
+
+@pytest.fixture
+def loan_model():
+    transformation = DataTransformation(data_ingestion_artifact=None, data_transformation_config=DataTransformationConfig(),
+                                        data_validation_artifact=None)
+    compiled, _ = fit_pandas_path(transformation, pd.DataFrame(make_documents(300)))
+    return LoanModel(transform=compiled, trained_model=ConstantModel(), batch_size=16)
+
+
+def test_warm_up_threads_allocates_the_buffers_of_every_executor_thread(loan_model, monkeypatch):
+    warmed = []
+    warm_up = loan_model.warm_up
+
+    def record_thread():
+        warmed.append((threading.current_thread().name, loan_model._local.__dict__.get("buffers")))
+        return warm_up()
+    monkeypatch.setattr(loan_model, "warm_up", record_thread)
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="predict") as executor:
+        loan_model.warm_up_threads(executor, n_threads=3)
+        # afterwards every thread scores on the buffers it allocated while warming up
+        barrier = threading.Barrier(3)
+
+        def buffers_of_thread():
+            barrier.wait()
+            return threading.current_thread().name, loan_model._local.__dict__.get("buffers")
+        after = [future.result() for future in [executor.submit(buffers_of_thread) for _ in range(3)]]
+
+    assert sorted(name for name, _ in warmed) == sorted(name for name, _ in after)
+    assert len({name for name, _ in warmed}) == 3
+    assert all(buffers is None for _, buffers in warmed)
+    assert all(buffers is not None and buffers[0].shape == (16, len(loan_model.transform.feature_columns))
+               for _, buffers in after)
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.exception import MyException, SchemaError
+from src.utils.main_utils import (append_dataframe, apply_schema_dtypes, cast_category_values, cast_integer_values,
+                                  count_dataframe_rows, dataframe_part_files, iter_dataframe_chunks, read_dataframe, save_dataframe)
+
+CATEGORIES = pd.CategoricalDtype(["a", "b", "c"])
+
+
+def frame(ids: range, groups: str) -> pd.DataFrame:
+    return pd.DataFrame({"id": np.array(ids, dtype=np.int32), "group": pd.Categorical(list(groups), dtype=CATEGORIES)})
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_append_writes_part_files_and_reads_them_in_order(tmp_path, file_format):
+    file_path = str(tmp_path / "store" / f"data.{file_format}")
+    save_dataframe(file_path, frame(range(0, 5), "abcab"))
+    append_dataframe(file_path, frame(range(5, 7), "cc")[["group", "id"]])
+    append_dataframe(file_path, frame(range(7, 8), "a"))
+
+    assert [os.path.basename(f) for f in dataframe_part_files(file_path)] == [
+        f"part-0000{i}.{file_format}" for i in range(3)
+    ]
+    dataframe = read_dataframe(file_path)
+    assert dataframe["id"].tolist() == list(range(8))
+    assert list(dataframe.columns) == ["id", "group"]
+    assert dataframe["group"].dtype == CATEGORIES
+    assert count_dataframe_rows(file_path) == 8
+    assert pd.concat(iter_dataframe_chunks(file_path, chunksize=3), ignore_index=True)["id"].tolist() == list(range(8))
+
+
+def test_append_never_rewrites_stored_parts(tmp_path):
+    file_path = str(tmp_path / "data.parquet")
+    append_dataframe(file_path, frame(range(0, 5), "abcab"))
+    first_part = dataframe_part_files(file_path)[0]
+    modified = os.stat(first_part).st_mtime_ns
+    append_dataframe(file_path, frame(range(5, 7), "cc"))
+
+    assert os.stat(first_part).st_mtime_ns == modified
+    assert len(dataframe_part_files(file_path)) == 2
+
+
+def test_save_replaces_a_dataset_directory(tmp_path):
+    file_path = str(tmp_path / "data.parquet")
+    append_dataframe(file_path, frame(range(0, 5), "abcab"))
+    append_dataframe(file_path, frame(range(5, 7), "cc"))
+    save_dataframe(file_path, frame(range(0, 2), "ab"))
+
+    assert os.path.isfile(file_path)
+    assert read_dataframe(file_path)["id"].tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("values, dtype", [([1, 2, 3], np.int32), ([0.0, 1.0], np.uint8), (pd.Series([7, 8], dtype="Int64"), np.int32),
+                                           ([], np.int32)])
+def test_cast_integer_values_keeps_integral_values(values, dtype):
+    array = cast_integer_values(values, np.dtype(dtype), "id")
+
+    assert array.dtype == dtype
+    assert array.tolist() == [int(v) for v in values]
+
+
+@pytest.mark.parametrize("values, dtype, message", [
+    ([1, None, 3], np.int32, "1 missing or non numeric"),
+    ([1, "na", np.nan], np.int32, "2 missing or non numeric"),
+    ([0, "yes"], np.uint8, "1 missing or non numeric"),
+    ([0, 1.5], np.uint8, "fractional"),
+    ([0, 256], np.uint8, "outside the range"),
+    ([-1, 1], np.uint8, "outside the range"),
+])
+def test_cast_integer_values_names_the_column(values, dtype, message):
+    with pytest.raises(SchemaError, match=rf"\[loan_paid_back\].*{message}|{message}.*\[loan_paid_back\]"):
+        cast_integer_values(values, np.dtype(dtype), "loan_paid_back")
+
+
+def test_apply_schema_dtypes_raises_schema_error_for_missing_integers():
+    dataframe = pd.DataFrame({"id": [1.0, np.nan], "loan_paid_back": [1, 0]})
+
+    with pytest.raises(MyException, match=r"\[id\]"):
+        apply_schema_dtypes(dataframe, {"id": np.dtype("int32"), "loan_paid_back": np.dtype("uint8")})
+    converted = apply_schema_dtypes(dataframe.dropna(), {"id": np.dtype("int32"), "loan_paid_back": np.dtype("uint8")})
+    assert converted.dtypes.tolist() == [np.dtype("int32"), np.dtype("uint8")]
+
+
+@pytest.mark.parametrize("values", [["a", "c", None], ["a", "na", np.nan], pd.Categorical(["b", None], categories=["b", "z"])])
+def test_cast_category_values_keeps_missing_values_missing(values):
+    categorical = cast_category_values(values, CATEGORIES, "group")
+
+    assert categorical.dtype == CATEGORIES
+    assert categorical.isna().sum() == pd.Series(values).isin(["na"]).sum() + pd.isna(pd.Series(values)).sum()
+
+
+@pytest.mark.parametrize("values", [["a", "d", "d", "e"], pd.Categorical(["a", "e", "d", "d"], categories=["a", "d", "e"])])
+def test_cast_category_values_names_the_unknown_values(values):
+    with pytest.raises(SchemaError, match=r"\[group\] has 3 values outside its schema categories: \['d', 'e'\]"):
+        cast_category_values(values, CATEGORIES, "group")
+
+
+def test_apply_schema_dtypes_rejects_a_category_outside_the_vocabulary():
+    dataframe = pd.DataFrame({"id": [1, 2], "group": ["a", "x"]})
+
+    with pytest.raises(MyException, match=r"\[group\].*\['x'\]"):
+        apply_schema_dtypes(dataframe, {"id": np.dtype("int32"), "group": CATEGORIES})
+    converted = apply_schema_dtypes(dataframe.iloc[:1], {"id": np.dtype("int32"), "group": CATEGORIES})
+    assert converted["group"].dtype == CATEGORIES
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+metrics_module = pytest.importorskip("sklearn.metrics")
+
+from src.utils.metrics import classification_metrics, prepare_scores, weighted_metrics
+
+
+def make_scores(n_rows: int, decimals: int = None, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, size=n_rows)
+    y_score = np.clip(0.35 * y_true + rng.uniform(0, 0.65, size=n_rows), 0, 1)
+    if decimals is not None:
+        # few distinct scores, most rows share their score with rows of both classes
+        y_score = np.round(y_score, decimals)
+    return y_true, y_score
+
+
+def sklearn_metrics(y_true, y_score, sample_weight=None, threshold: float = 0.5) -> dict:
+    y_pred = (y_score >= threshold).astype(int)
+    return {
+        "roc_auc": metrics_module.roc_auc_score(y_true, y_score, sample_weight=sample_weight),
+        "log_loss": metrics_module.log_loss(y_true, y_score, sample_weight=sample_weight),
+        "brier": metrics_module.brier_score_loss(y_true, y_score, sample_weight=sample_weight),
+        "precision": metrics_module.precision_score(y_true, y_pred, sample_weight=sample_weight),
+        "recall": metrics_module.recall_score(y_true, y_pred, sample_weight=sample_weight),
+        "f1": metrics_module.f1_score(y_true, y_pred, sample_weight=sample_weight),
+    }
+
+
+@pytest.mark.parametrize("decimals", [None, 2, 1])
+def test_plain_metrics_match_sklearn(decimals):
+    y_true, y_score = make_scores(5_000, decimals)
+    actual = classification_metrics(y_true, y_score)
+
+    for name, expected in sklearn_metrics(y_true, y_score).items():
+        assert actual[name] == pytest.approx(expected, rel=1e-6, abs=1e-12), name
+
+
+def test_roc_auc_counts_ties_as_half():
+    y_true = np.array([0, 1, 0, 1, 0, 1])
+    y_score = np.array([0.5, 0.5, 0.2, 0.9, 0.5, 0.5])
+
+    assert classification_metrics(y_true, y_score)["roc_auc"] == pytest.approx(metrics_module.roc_auc_score(y_true, y_score))
+    assert classification_metrics(np.array([0, 1]), np.array([0.3, 0.3]))["roc_auc"] == pytest.approx(0.5)
+
+
+def test_log_loss_clips_certain_mistakes():
+    y_true, y_score = np.array([1, 0, 1, 0]), np.array([0.0, 1.0, 1.0, 0.0])
+
+    assert classification_metrics(y_true, y_score)["log_loss"] == pytest.approx(
+        metrics_module.log_loss(y_true, np.clip(y_score, 1e-15, 1 - 1e-15)))
+
+
+@pytest.mark.parametrize("decimals", [None, 2])
+def test_weighted_replicates_match_sklearn_sample_weights(decimals):
+    y_true, y_score = make_scores(2_000, decimals, seed=1)
+    counts = np.random.default_rng(2).poisson(1.0, size=(4, len(y_true))).astype(np.float32)
+    prepared = prepare_scores(y_true, y_score)
+    actual = weighted_metrics(prepared, counts[:, prepared["order"]])
+
+    for replicate, sample_weight in enumerate(counts):
+        for name, expected in sklearn_metrics(y_true, y_score, sample_weight=sample_weight).items():
+            assert actual[name][replicate] == pytest.approx(expected, rel=1e-6), (name, replicate)
+
+
+def test_expected_calibration_error_of_equal_width_bins():
+    y_true, y_score = make_scores(3_000, seed=3)
+    bins = np.minimum((y_score * 10).astype(int), 9)
+    expected = sum(abs(y_true[bins == b].sum() - y_score[bins == b].sum()) for b in range(10)) / len(y_true)
+
+    assert classification_metrics(y_true, y_score)["ece"] == pytest.approx(expected)
+
+
+def test_single_class_has_undefined_roc_auc():
+    metrics = classification_metrics(np.ones(10), np.linspace(0, 1, 10))
+
+    assert np.isnan(metrics["roc_auc"])
+    assert metrics["recall"] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 999])
+def test_row_chunks_match_a_single_pass(chunk_size):
+    # rounded scores give tied groups and calibration bins spanning the chunk boundaries
+    y_true, y_score = make_scores(1_000, decimals=2, seed=4)
+    counts = np.random.default_rng(5).poisson(1.0, size=(3, len(y_true))).astype(np.float32)
+    prepared = prepare_scores(y_true, y_score)
+    weights = counts[:, prepared["order"]]
+    expected = weighted_metrics(prepared, weights)
+    actual = weighted_metrics(prepared, weights, chunk_size=chunk_size)
+
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, err_msg=name)
+
+
+def test_prepared_rows_are_float32():
+    prepared = prepare_scores(*make_scores(100))
+
+    for name in ("y", "p", "log_loss", "squared_error"):
+        assert prepared[name].dtype == np.float32
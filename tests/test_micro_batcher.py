@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.micro_batcher import MicroBatcher, QueueFullError
+
+
+class RecordingModel:
+    """
+    Doubles every record, remembers the batch sizes and the most model calls running at once
+    """
+    def __init__(self, delay: float = 0.0, release: threading.Event = None):
+        self.delay, self.release = delay, release
+        self.batch_sizes, self.running, self.max_running = [], 0, 0
+        self._lock = threading.Lock()
+
+    def __call__(self, records: list) -> list:
+        with self._lock:
+            self.batch_sizes.append(len(records))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return [2 * record for record in records]
+
+
+def run_with_batcher(model, test, **kwargs):
+    """
+    Run the coroutine test(batcher) against a started batcher and stop it afterwards
+    """
+    async def main():
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            batcher = MicroBatcher(model, executor, **kwargs)
+            await batcher.start()
+            try:
+                return await test(batcher)
+            finally:
+                await batcher.stop()
+    return asyncio.run(main())
+
+
+def test_full_batch_is_flushed_without_waiting():
+    model = RecordingModel()
+
+    async def test(batcher):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = run_with_batcher(model, test, max_batch_size=4, max_wait_ms=5_000, max_concurrent_batches=2)
+
+    assert results == [2 * i for i in range(8)]
+    assert model.batch_sizes == [4, 4]
+    assert elapsed < 1
+
+
+def test_partial_batch_is_flushed_after_the_wait():
+    model = RecordingModel()
+
+    async def test(batcher):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = run_with_batcher(model, test, max_batch_size=100, max_wait_ms=50)
+
+    assert results == [0, 2, 4]
+    assert model.batch_sizes == [3]
+    assert 0.04 <= elapsed < 1
+
+
+def test_full_queue_rejects_new_requests():
+    release = threading.Event()
+    model = RecordingModel(release=release)
+
+    async def test(batcher):
+        # the only model call slot is blocked, so the next requests stay queued
+        first = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0.05)
+        queued = [asyncio.ensure_future(batcher.submit(i)) for i in range(1, 3)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await batcher.submit(3)
+        release.set()
+        return await asyncio.gather(first, *queued), batcher.stats["rejected"]
+
+    results, rejected = run_with_batcher(model, test, max_batch_size=1, max_wait_ms=1, max_concurrent_batches=1,
+                                         max_queue_size=2)
+
+    assert results == [0, 2, 4]
+    assert rejected == 1
+
+
+def test_stop_fails_the_queued_requests():
+    release = threading.Event()
+    model = RecordingModel(release=release)
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(model, executor, max_batch_size=1, max_wait_ms=1, max_concurrent_batches=1)
+            await batcher.start()
+            in_flight = asyncio.ensure_future(batcher.submit(0))
+            await asyncio.sleep(0.05)
+            queued = [asyncio.ensure_future(batcher.submit(i)) for i in range(1, 4)]
+            await asyncio.sleep(0.05)
+            stopping = asyncio.ensure_future(batcher.stop())
+            await asyncio.sleep(0.05)
+            release.set()
+            await stopping
+            return await in_flight, await asyncio.gather(*queued, return_exceptions=True)
+
+    in_flight, queued = asyncio.run(main())
+
+    # the batch in flight finishes, the queued requests fail instead of waiting forever
+    assert in_flight == 0
+    assert all(isinstance(result, RuntimeError) and "shutting down" in str(result) for result in queued)
+
+
+def test_submit_many_uses_the_model_call_slots():
+    model = RecordingModel(delay=0.02)
+
+    async def test(batcher):
+        singles = [batcher.submit(i) for i in range(5)]
+        return await asyncio.gather(batcher.submit_many(list(range(1_000))), *singles)
+
+    results = run_with_batcher(model, test, max_batch_size=64, max_wait_ms=1, max_concurrent_batches=2)
+
+    assert results[0] == [2 * i for i in range(1_000)]
+    assert results[1:] == [2 * i for i in range(5)]
+    assert max(model.batch_sizes) == 64
+    assert model.max_running <= 2
+
+
+def test_submit_needs_a_started_batcher():
+    batcher = MicroBatcher(RecordingModel(), executor=None)
+
+    with pytest.raises(RuntimeError, match="not started"):
+        asyncio.run(batcher.submit(1))
+    with pytest.raises(RuntimeError, match="not started"):
+        asyncio.run(batcher.submit_many([1]))
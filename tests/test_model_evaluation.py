@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+
+from src.components.data_transformation import DataTransformation
+from src.components.model_evaluation import ModelEvaluation
+from src.constants import TARGET_COLUMN
+from src.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, ModelTrainerArtifact
+from src.entity.config_entity import DataTransformationConfig, ModelEvaluationConfig
+from src.entity.estimator import LoanModel
+from src.exception import MyException
+from src.utils.main_utils import save_object
+from tests.test_compiled_transform import fit_pandas_path
+from tests.test_proj1_data import make_documents
+
+
+def make_raw_rows(n_rows: int, seed: int, income_scale: float = 1.0) -> pd.DataFrame:
+    raw_df = pd.DataFrame(make_documents(n_rows, seed=seed)).sort_values("id", ignore_index=True)
+    raw_df["annual_income"] *= income_scale
+    noise = np.random.default_rng(seed).normal(scale=20_000, size=n_rows)
+    raw_df[TARGET_COLUMN] = (raw_df["annual_income"] / income_scale + noise > 100_000).astype(np.int64)
+    return raw_df
+
+
+def fit_loan_model(raw_df: pd.DataFrame) -> LoanModel:
+    """
+    LoanModel of a compiled transform and a logistic regression fitted on raw_df
+    """
+    transformation = DataTransformation(data_ingestion_artifact=None, data_transformation_config=DataTransformationConfig(),
+                                        data_validation_artifact=None)
+    compiled, features = fit_pandas_path(transformation, raw_df)
+    model = LogisticRegression(max_iter=1_000).fit(features.astype(np.float32), raw_df[TARGET_COLUMN])
+    return LoanModel(transform=compiled, trained_model=model, batch_size=128)
+
+
+@pytest.fixture
+def evaluation(tmp_path):
+    # production was trained when incomes were reported in a different unit, its scaler differs from this run's
+    production = fit_loan_model(make_raw_rows(1_500, seed=1, income_scale=3.0))
+    trained = fit_loan_model(make_raw_rows(1_500, seed=2))
+    test_df = make_raw_rows(600, seed=3)
+    x_test = trained.transform.transform(test_df[trained.transform.raw_columns].to_numpy(dtype=object)).astype(np.float32)
+
+    config = ModelEvaluationConfig(model_evaluation_dir=str(tmp_path / "evaluation"),
+                                   evaluation_report_file_path=str(tmp_path / "evaluation" / "report.json"),
+                                   production_model_file_path=str(tmp_path / "production" / "model.pkl"),
+                                   n_bootstrap=20, n_workers=1, batch_size=100)
+    save_object(str(tmp_path / "trained.pkl"), trained)
+    save_object(config.production_model_file_path, production)
+    return production, test_df, ModelEvaluation(
+        model_eval_config=config,
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path=None, test_file_path=None, test_df=test_df),
+        data_transformation_artifact=DataTransformationArtifact(*[None] * 8, test_arr=x_test,
+                                                                test_target=test_df[TARGET_COLUMN].to_numpy()),
+        model_trainer_artifact=ModelTrainerArtifact(trained_model_file_path=str(tmp_path / "trained.pkl"),
+                                                    training_report_file_path=None, metric_artifact=None),
+    )
+
+
+def test_production_model_is_scored_with_its_own_feature_transform(evaluation):
+    production, test_df, model_evaluation = evaluation
+    y_test = test_df[TARGET_COLUMN]
+    expected = roc_auc_score(y_test, production.predict_proba(test_df)[:, 1])
+    # the production classifier on features scaled by this run's transform
+    mismatched = roc_auc_score(y_test, production.trained_model.predict_proba(model_evaluation.data_transformation_artifact.test_arr)[:, 1])
+
+    model_evaluation.initiate_model_evaluation()
+    with open(model_evaluation.model_eval_config.evaluation_report_file_path) as report_file:
+        report = json.load(report_file)
+
+    assert report["production"]["roc_auc"]["value"] == pytest.approx(expected)
+    assert report["production"]["roc_auc"]["value"] != pytest.approx(mismatched)
+    assert report["production"]["roc_auc"]["value"] > 0.9
+
+
+def test_production_model_without_a_feature_transform_is_not_compared(evaluation):
+    production, _, model_evaluation = evaluation
+    save_object(model_evaluation.model_eval_config.production_model_file_path, production.trained_model)
+
+    with pytest.raises(MyException, match="LogisticRegression is not a LoanModel"):
+        model_evaluation.initiate_model_evaluation()
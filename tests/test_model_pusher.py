@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from src.components.model_pusher import ModelPusher
+from src.entity.artifact_entity import ClassificationMetricArtifact, DataDriftArtifact, ModelEvaluationArtifact, ModelTrainerArtifact
+from src.entity.config_entity import ModelPusherConfig
+from src.exception import MyException
+
+
+@pytest.fixture
+def trained(tmp_path):
+    trained_dir = tmp_path / "model_trainer" / "trained_model"
+    trained_dir.mkdir(parents=True)
+    for name in ("model.pkl", "model.npz", "feature_transform.pkl"):
+        (trained_dir / name).write_bytes(f"new {name}".encode())
+    return ModelTrainerArtifact(
+        trained_model_file_path=str(trained_dir / "model.pkl"),
+        training_report_file_path=str(tmp_path / "model_trainer" / "report.json"),
+        metric_artifact=ClassificationMetricArtifact(roc_auc_score=0.9, f1_score=0.8, precision_score=0.8, recall_score=0.8),
+        compiled_model_file_path=str(trained_dir / "model.npz"),
+        feature_transform_file_path=str(trained_dir / "feature_transform.pkl"),
+    )
+
+
+@pytest.fixture
+def config(tmp_path):
+    production_dir = tmp_path / "production_model"
+    config = ModelPusherConfig(
+        production_model_dir=str(production_dir),
+        production_model_file_path=str(production_dir / "model.pkl"),
+        compiled_model_file_path=str(production_dir / "model.npz"),
+        feature_transform_file_path=str(production_dir / "feature_transform.pkl"),
+        baseline_profile_file_path=str(tmp_path / "drift_baseline" / "profile.json"),
+    )
+    return config
+
+
+@pytest.fixture
+def drift(tmp_path):
+    train_profile_file_path = tmp_path / "data_drift" / "train_profile.json"
+    train_profile_file_path.parent.mkdir()
+    train_profile_file_path.write_text("new profile")
+    return DataDriftArtifact(drift_detected=False, drift_report_file_path="", train_profile_file_path=str(train_profile_file_path))
+
+
+def evaluation(accepted: bool) -> ModelEvaluationArtifact:
+    return ModelEvaluationArtifact(is_model_accepted=accepted, changed_accuracy=0.01, trained_model_path="",
+                                   production_model_path=None, evaluation_report_file_path="")
+
+
+def test_accepted_model_replaces_every_production_file(trained, config):
+    os.makedirs(config.production_model_dir)
+    for file_path in (config.production_model_file_path, config.compiled_model_file_path, config.feature_transform_file_path):
+        with open(file_path, "w") as file_obj:
+            file_obj.write("old")
+
+    artifact = ModelPusher(evaluation(True), trained, config).initiate_model_pusher()
+
+    for file_path in (artifact.production_model_file_path, artifact.compiled_model_file_path, artifact.feature_transform_file_path):
+        with open(file_path) as file_obj:
+            assert file_obj.read() == f"new {os.path.basename(file_path)}"
+    assert sorted(os.listdir(config.production_model_dir)) == ["feature_transform.pkl", "model.npz", "model.pkl"]
+
+
+def test_rejected_model_is_not_promoted(trained, config):
+    with pytest.raises(MyException, match="accepted"):
+        ModelPusher(evaluation(False), trained, config).initiate_model_pusher()
+    assert not os.path.exists(config.production_model_dir)
+
+
+def test_nothing_is_replaced_when_a_trained_file_is_missing(trained, config):
+    os.remove(trained.compiled_model_file_path)
+
+    with pytest.raises(MyException, match="missing files"):
+        ModelPusher(evaluation(True), trained, config).initiate_model_pusher()
+    assert not os.path.exists(config.production_model_file_path)
+
+
+def test_accepted_model_promotes_its_train_profile_as_drift_baseline(trained, config, drift):
+    artifact = ModelPusher(evaluation(True), trained, config, data_drift_artifact=drift).initiate_model_pusher()
+
+    with open(artifact.baseline_profile_file_path) as baseline_file:
+        assert baseline_file.read() == "new profile"
+
+
+def test_rejected_model_keeps_the_drift_baseline(trained, config, drift):
+    with pytest.raises(MyException):
+        ModelPusher(evaluation(False), trained, config, data_drift_artifact=drift).initiate_model_pusher()
+    assert not os.path.exists(config.baseline_profile_file_path)
@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.components.model_trainer import FitMemorySampler, current_rss_mb, fit_model, build_model
+
+pytestmark = pytest.mark.skipif(current_rss_mb() is None, reason="resident memory is read from /proc")
+
+
+def test_sampler_measures_memory_allocated_inside_the_block():
+    with FitMemorySampler(interval_seconds=0.01) as memory:
+        block = np.ones(64 * 2**20 // 8)  # 64 MiB, touched so it is resident
+        time.sleep(0.05)
+        del block
+
+    assert memory.increase_mb == pytest.approx(64, abs=16)
+    assert memory.peak_mb >= memory.before_mb + 48
+
+
+def test_sampler_ignores_memory_freed_before_the_block():
+    block = np.ones(64 * 2**20 // 8)
+    del block
+    with FitMemorySampler(interval_seconds=0.01) as memory:
+        time.sleep(0.03)
+
+    assert memory.increase_mb < 16
+
+
+def test_fit_model_reports_the_memory_of_the_fit():
+    pytest.importorskip("lightgbm")
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2_000, 5)).astype(np.float32)
+    y = (x[:, 0] + rng.normal(size=2_000) > 0).astype(np.uint8)
+    model = build_model("lightgbm", {"n_estimators": 20, "verbose": -1}, n_jobs=1, random_state=0, early_stopping_rounds=5)
+
+    stats = fit_model("lightgbm", model, x[:1_500], y[:1_500], x[1_500:], y[1_500:], early_stopping_rounds=5)
+
+    assert stats["fit_peak_memory_mb"] >= stats["fit_memory_increase_mb"] >= 0
+    assert 1 <= stats["best_iteration"] <= stats["n_iterations"] <= 20
@@ -0,0 +1,156 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from src.constants import DATABASE_NAME
+from src.data_access.proj1_data import Proj1Data
+from src.exception import MyException
+
+COLLECTION = "loans"
+
+
+def make_documents(n_rows: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    documents = []
+    for i in range(n_rows):
+        documents.append({
+            "id": i,
+            "annual_income": rng.uniform(5_000, 200_000),
+            "debt_to_income_ratio": rng.uniform(0, 0.6),
+            "credit_score": rng.randint(300, 850),
+            "loan_amount": rng.uniform(500, 50_000),
+            "interest_rate": rng.uniform(3, 25),
+            "gender": rng.choice(["Female", "Male", "Other"]),
+            "marital_status": rng.choice(["Divorced", "Married", "Single", "Widowed"]),
+            "education_level": rng.choice(["Bachelor's", "High School", "Master's", "Other", "PhD"]),
+            "employment_status": rng.choice(["Employed", "Retired", "Self-employed", "Student", "Unemployed"]),
+            "loan_purpose": rng.choice(["Business", "Car", "Education", "Home", "Other"]),
+            "grade_subgrade": rng.choice(["A1", "B2", "C3", "D4", "E5", "F1"]),
+            "loan_paid_back": rng.randint(0, 1),
+        })
+    # inserted out of key order, the export order must come from the partitions and not from the storage order
+    rng.shuffle(documents)
+    return documents
+
+
+def make_proj1_data(documents: list) -> Proj1Data:
+    client = mongomock.MongoClient()
+    if documents:
+        client[DATABASE_NAME][COLLECTION].insert_many(documents)
+    return Proj1Data(mongo_client=SimpleNamespace(client=client, database=client[DATABASE_NAME]))
+
+
+def partition_of(queries: list, key) -> int:
+    for i, query in enumerate(queries):
+        condition = query["id"]
+        if condition is None:
+            continue
+        if not isinstance(condition, dict):
+            if key == condition:
+                return i
+            continue
+        upper_ok = key <= condition["$lte"] if "$lte" in condition else key < condition["$lt"]
+        if key >= condition["$gte"] and upper_ok:
+            return i
+    raise AssertionError(f"id {key} is in no partition")
+
+
+def test_partition_queries_cover_every_key_once():
+    proj1_data = make_proj1_data(make_documents(500))
+    queries = proj1_data.compute_partition_queries(COLLECTION, n_partitions=4)
+    collection = proj1_data._get_collection(COLLECTION)
+
+    assert queries[-1] == {"id": None}
+    assert sum(collection.count_documents(query) for query in queries) == 500
+    for key in range(500):
+        partition_of(queries, key)
+
+
+@pytest.mark.parametrize("n_partitions, max_workers, chunk_size", [(1, 1, 1000), (4, 2, 64), (7, 4, 10)])
+def test_parallel_export_matches_streaming_export(n_partitions, max_workers, chunk_size):
+    documents = make_documents(500)
+    proj1_data = make_proj1_data(documents)
+
+    parallel = proj1_data.export_collection_parallel(COLLECTION, n_partitions=n_partitions, max_workers=max_workers,
+                                                     chunk_size=chunk_size)
+    streamed = proj1_data.export_collection_as_dataframe(COLLECTION, stream=True, chunk_size=chunk_size)
+
+    assert len(parallel) == len(documents)
+    assert parallel.dtypes.to_dict() == streamed.dtypes.to_dict()
+    pd.testing.assert_frame_equal(parallel.sort_values("id", ignore_index=True), streamed.sort_values("id", ignore_index=True))
+    assert [stats["rows"] for stats in proj1_data.partition_stats] == [
+        proj1_data._get_collection(COLLECTION).count_documents(stats["query"]) for stats in proj1_data.partition_stats
+    ]
+
+
+def test_parallel_export_is_in_partition_order():
+    proj1_data = make_proj1_data(make_documents(500))
+    parallel = proj1_data.export_collection_parallel(COLLECTION, n_partitions=5, max_workers=5, chunk_size=16)
+    queries = [stats["query"] for stats in proj1_data.partition_stats]
+
+    partitions = np.array([partition_of(queries, key) for key in parallel["id"]])
+    assert np.all(np.diff(partitions) >= 0)
+
+
+def test_parallel_export_keeps_documents_added_after_counting(monkeypatch):
+    proj1_data = make_proj1_data(make_documents(200))
+    collection = proj1_data._get_collection(COLLECTION)
+    # re-sent copies of the first keys, they land in the first partition after it was counted
+    late_documents = [dict(document, id=i) for i, document in enumerate(make_documents(3, seed=1))]
+    counted = []
+
+    def count_then_insert(query, *args, **kwargs):
+        count = collection.count_documents(query, *args, **kwargs)
+        counted.append(query)
+        if len(counted) == 1:
+            collection.insert_many([dict(document) for document in late_documents])
+        return count
+
+    monkeypatch.setattr(proj1_data, "_get_collection", lambda *args: SimpleNamespace(
+        count_documents=count_then_insert,
+        **{name: getattr(collection, name) for name in ("aggregate", "find", "find_one", "estimated_document_count")}
+    ))
+    parallel = proj1_data.export_collection_parallel(COLLECTION, n_partitions=3, max_workers=1)
+
+    assert len(parallel) == 203
+    assert sorted(parallel["id"]) == sorted(list(range(200)) + [0, 1, 2])
+    queries = [stats["query"] for stats in proj1_data.partition_stats]
+    partitions = np.array([partition_of(queries, key) for key in parallel["id"]])
+    assert np.all(np.diff(partitions) >= 0)
+
+
+def test_parallel_export_of_empty_collection_keeps_schema_dtypes():
+    proj1_data = make_proj1_data([])
+    parallel = proj1_data.export_collection_parallel(COLLECTION, n_partitions=4, max_workers=2)
+
+    assert len(parallel) == 0
+    assert list(parallel.columns) == proj1_data._schema_config["columns"]
+
+
+@pytest.mark.parametrize("column, value", [("id", None), ("id", "na"), ("loan_paid_back", None), ("loan_paid_back", float("nan"))])
+def test_export_names_the_integer_column_with_missing_values(column, value):
+    documents = make_documents(50)
+    documents[10][column] = value
+    proj1_data = make_proj1_data(documents)
+
+    with pytest.raises(MyException, match=rf"\[{column}\] has 1 missing"):
+        proj1_data.export_collection_as_dataframe(COLLECTION, stream=True)
+
+
+@pytest.mark.parametrize("export", [
+    lambda proj1_data: proj1_data.export_collection_as_dataframe(COLLECTION, stream=True),
+    lambda proj1_data: proj1_data.export_collection_parallel(COLLECTION, n_partitions=3, max_workers=2),
+], ids=["streaming", "parallel"])
+def test_export_rejects_a_category_outside_the_vocabulary(export):
+    documents = make_documents(50)
+    documents[10]["loan_purpose"] = "Boat"
+    documents[20]["gender"] = "na"
+    proj1_data = make_proj1_data(documents)
+
+    with pytest.raises(MyException, match=r"\[loan_purpose\] has 1 values outside its schema categories: \['Boat'\]"):
+        export(proj1_data)
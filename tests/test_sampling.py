@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.utils.sampling import hash_test_mask
+
+
+@pytest.fixture
+def ids():
+    return np.random.default_rng(0).permutation(np.arange(200_000, dtype=np.int64) * 7 + 3)
+
+
+def test_int32_int64_and_integral_float_ids_land_in_the_same_set(ids):
+    expected = hash_test_mask(ids, 0.2)
+
+    np.testing.assert_array_equal(hash_test_mask(ids.astype(np.int32), 0.2), expected)
+    np.testing.assert_array_equal(hash_test_mask(ids.astype(np.uint32), 0.2), expected)
+    np.testing.assert_array_equal(hash_test_mask(ids.astype(np.float64), 0.2), expected)
+    np.testing.assert_array_equal(hash_test_mask(ids.tolist(), 0.2), expected)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 999, 65_536])
+def test_chunked_and_whole_frames_land_in_the_same_set(ids, chunk_size):
+    expected = hash_test_mask(ids, 0.2)
+    chunked = np.concatenate([hash_test_mask(ids[start:start + chunk_size].astype(np.int32), 0.2)
+                              for start in range(0, min(len(ids), 50 * chunk_size), chunk_size)])
+
+    np.testing.assert_array_equal(chunked, expected[:len(chunked)])
+
+
+@pytest.mark.parametrize("test_ratio", [0.1, 0.2, 0.5])
+def test_test_ratio_is_about_right(ids, test_ratio):
+    observed = hash_test_mask(ids, test_ratio).mean()
+
+    # binomial standard deviation is below 0.0012 for 200k rows, 5 of them
+    assert observed == pytest.approx(test_ratio, abs=0.006)
+
+
+def test_a_larger_ratio_only_moves_rows_into_the_test_set(ids):
+    small, large = hash_test_mask(ids, 0.1), hash_test_mask(ids, 0.2)
+
+    assert not np.any(small & ~large)
+
+
+def test_string_keys_are_stable(ids):
+    keys = ids[:1_000].astype(str)
+
+    np.testing.assert_array_equal(hash_test_mask(keys, 0.3), hash_test_mask(keys.astype(object), 0.3))
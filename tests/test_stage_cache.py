@@ -0,0 +1,54 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+from src.utils.stage_cache import StageCache
+
+PACKAGE = "stagepkg"
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    files = {
+        "__init__.py": "",
+        "stage.py": "from stagepkg.helpers import scale\n\ndef run():\n    from stagepkg import lazy\n    return lazy.VALUE\n",
+        "helpers.py": "import os\n\ndef scale(x):\n    return 2 * x\n",
+        "lazy.py": "VALUE = 1\n",
+        "unused.py": "VALUE = 2\n",
+    }
+    package_dir = tmp_path / PACKAGE
+    package_dir.mkdir()
+    for name, source in files.items():
+        (package_dir / name).write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.import_module(PACKAGE)
+    yield package_dir
+    sys.modules.pop(PACKAGE, None)
+
+
+def test_source_files_follow_direct_and_lazy_imports(package):
+    files = StageCache.source_files([f"{PACKAGE}.stage"], package=PACKAGE)
+
+    assert sorted(os.path.basename(f) for f in files) == ["__init__.py", "helpers.py", "lazy.py", "stage.py"]
+
+
+def test_key_changes_with_a_module_imported_inside_a_function(package, tmp_path, monkeypatch):
+    source_files = StageCache.source_files
+    monkeypatch.setattr(StageCache, "source_files", staticmethod(lambda names: source_files(names, package=PACKAGE)))
+    cache = StageCache(cache_dir=str(tmp_path / "cache"))
+    compute_key = lambda: cache.compute_key("stage", object(), [], [f"{PACKAGE}.stage"])
+
+    before = compute_key()
+    (package / "unused.py").write_text("VALUE = 3\n")
+    assert compute_key() == before
+    (package / "lazy.py").write_text("VALUE = 4\n")
+    assert compute_key() != before
+
+
+def test_src_stage_closure_includes_the_code_it_calls():
+    files = {os.path.relpath(f) for f in StageCache.source_files(["src.components.data_drift"])}
+
+    assert {os.path.join("src", "utils", "drift.py"), os.path.join("src", "utils", "sketches.py"),
+            os.path.join("src", "utils", "main_utils.py")} <= files
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.constants import MODEL_TRAINER_EXPORT_TOLERANCE
+from src.entity.tree_ensemble import TreeEnsemble, export_tree_ensemble
+from src.exception import MyException
+
+
+def make_data(n_rows: int = 3_000, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n_rows, 6)).astype(np.float32)
+    # a coarse column gives many rows equal to a split threshold, missing values exercise the default children
+    x[:, 5] = np.round(x[:, 5], 1)
+    x[rng.random(size=x.shape) < 0.05] = np.nan
+    logit = 1.5 * np.nan_to_num(x[:, 0]) - np.nan_to_num(x[:, 1]) * np.nan_to_num(x[:, 2]) + np.nan_to_num(x[:, 5])
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return x, y
+
+
+def fit_lightgbm(x, y):
+    lightgbm = pytest.importorskip("lightgbm")
+    return lightgbm.LGBMClassifier(n_estimators=60, num_leaves=15, learning_rate=0.1, verbose=-1).fit(x, y)
+
+
+def fit_xgboost(x, y):
+    xgboost = pytest.importorskip("xgboost")
+    return xgboost.XGBClassifier(n_estimators=60, max_depth=4, learning_rate=0.1, base_score=0.3).fit(x, y)
+
+
+def fit_xgboost_early_stopped(x, y):
+    xgboost = pytest.importorskip("xgboost")
+    model = xgboost.XGBClassifier(n_estimators=300, max_depth=4, learning_rate=0.3, early_stopping_rounds=5)
+    return model.fit(x[:2_000], y[:2_000], eval_set=[(x[2_000:], y[2_000:])], verbose=False)
+
+
+def fit_catboost(x, y):
+    catboost = pytest.importorskip("catboost")
+    return catboost.CatBoostClassifier(iterations=60, depth=4, learning_rate=0.1, random_seed=0, verbose=0,
+                                       allow_writing_files=False).fit(x, y)
+
+
+@pytest.mark.parametrize("model_name, fit", [
+    ("lightgbm", fit_lightgbm), ("xgboost", fit_xgboost), ("xgboost", fit_xgboost_early_stopped),
+    ("catboost", fit_catboost),
+])
+def test_exported_ensemble_matches_native_predictions(model_name, fit, tmp_path):
+    x, y = make_data()
+    model = fit(x, y)
+    ensemble = export_tree_ensemble(model_name, model)
+    x_test, _ = make_data(1_000, seed=1)
+
+    native = model.predict_proba(x_test)[:, 1]
+    np.testing.assert_allclose(ensemble.predict_proba(x_test)[:, 1], native, rtol=0, atol=MODEL_TRAINER_EXPORT_TOLERANCE)
+
+    ensemble.save(str(tmp_path / "model.npz"))
+    loaded = TreeEnsemble.load(str(tmp_path / "model.npz"))
+    np.testing.assert_array_equal(loaded.predict_proba(x_test), ensemble.predict_proba(x_test))
+
+
+def test_small_batches_match_one_batch(monkeypatch):
+    x, y = make_data()
+    ensemble = export_tree_ensemble("lightgbm", fit_lightgbm(x, y))
+    expected = ensemble.decision_function(x)
+    monkeypatch.setattr(TreeEnsemble, "MAX_BATCH_PAIRS", ensemble.n_trees * 7)
+
+    np.testing.assert_array_equal(ensemble.decision_function(x), expected)
+
+
+def test_wrong_number_of_features_is_rejected():
+    x, y = make_data()
+    ensemble = export_tree_ensemble("lightgbm", fit_lightgbm(x, y))
+
+    with pytest.raises(MyException, match="Expected 6 features"):
+        ensemble.predict_proba(x[:, :5])
+
+
+def test_unknown_library_is_rejected():
+    with pytest.raises(MyException, match="Unknown model"):
+        export_tree_ensemble("sklearn", object())